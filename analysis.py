@@ -0,0 +1,378 @@
+import os
+import time
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from compact import CompactPairs, compact_frame
+from correlation import EwmaCorrelation, eigen_analysis, lead_lag_pairs, overlap_counts
+from exposure import maruziyet_tablosu
+from history import SnapshotStore
+from market_data import download_columns, get_safe_returns, yf_download, yf_history
+from offload import get_executor, parallel_corr
+from panel_store import PanelStore
+from profiler import stage
+from quality import clean_panel
+from results import ResultStore
+from signals import sektor_momentumu
+from universes import COLUMN_OPTIONS, ENDEKS, SEKTOR_ENDEKSLERI, interval_for
+
+# Downloaded data is reused across sessions (and by the warm-up) for this long
+VERI_TTL = int(os.environ.get("BIST_CACHE_TTL", "300"))
+
+# BIST_COMPACT=1 also stores the shared price/volume downloads as float32, halving the cache
+KOMPAKT_ONBELLEK = os.environ.get("BIST_COMPACT", "0") == "1"
+
+# Sector momentum needs the 60-day window plus its 20-day volume baseline
+SEKTOR_PERIYODU = "6mo"
+
+
+@st.cache_resource(show_spinner=False)
+def ortak_panel(interval):
+    """Read-only shared price panel for ``interval`` if BIST_PANEL_STORE points to one."""
+    root = os.environ.get("BIST_PANEL_STORE")
+    if not root:
+        return None
+    try:
+        return PanelStore.open(os.path.join(root, interval))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+@st.cache_resource(show_spinner=False)
+def gecmis_deposu():
+    """Append-only history of every full-analysis run in BIST_HISTORY_DIR, or None when unset."""
+    path = os.environ.get("BIST_HISTORY_DIR")
+    return SnapshotStore(os.path.expanduser(path)) if path else None
+
+
+@st.cache_resource(show_spinner=False)
+def sonuc_deposu():
+    """Process-wide store of the latest full-analysis results (BIST_RESULT_DIR persists them)."""
+    return ResultStore(os.environ.get("BIST_RESULT_DIR"), history=gecmis_deposu())
+
+
+@st.cache_resource(show_spinner=False)
+def islem_havuzu():
+    """Process pool shared by all sessions for CPU-heavy stages."""
+    return get_executor()
+
+
+def offload_kullan(is_yuku, esik):
+    """BIST_OFFLOAD=1 forces the process pool, 0 disables it, 'auto' uses it from ``esik`` up."""
+    mod = os.environ.get("BIST_OFFLOAD", "auto")
+    return mod == "1" or (mod == "auto" and is_yuku >= esik)
+
+
+def korelasyon_matrisi(returns, progress=None):
+    """``returns.corr()``, computed on the process pool for large universes."""
+    if offload_kullan(returns.shape[1], 150):
+        return parallel_corr(islem_havuzu(), returns, progress=progress)
+    return returns.corr()
+
+
+@st.cache_data(ttl=VERI_TTL, show_spinner=False)
+def kolon_verileri(tickers, period, interval):
+    """Cached Close and Volume panels from one ``download_columns`` pass; batching adapts through the shared pacer."""
+    frames = download_columns(
+        list(tickers),
+        period=period,
+        interval=interval,
+        columns=("Close", "Volume"),
+        auto_adjust=True,
+        tries=2,
+    )
+    if KOMPAKT_ONBELLEK:
+        frames = {column: compact_frame(df) for column, df in frames.items()}
+    return frames
+
+
+def kolon_verisi(tickers, period, interval, selected_column):
+    """One column of ``kolon_verileri``; asking for the other column later is a cache hit."""
+    return kolon_verileri(tickers, period, interval)[selected_column]
+
+
+def fiyat_verisi(tickers, *, period, interval, selected_column):
+    """
+    Wide Close/Volume frame for the page's universe.
+
+    Reads from the shared memory-mapped panel when one is configured, is
+    up to date and covers the tickers; anything missing is downloaded (and
+    cached) as before, and a store whose writer has fallen behind is
+    bypassed.
+    """
+    store = ortak_panel(interval)
+    if store is not None and selected_column in store.fields and store.refresh().is_current(interval):
+        df = store.frame_for_period(selected_column, period, tickers)
+        missing = [t for t in tickers if t not in df.columns]
+        if not missing:
+            return df
+        if not df.empty:
+            extra = kolon_verisi(tuple(missing), period, interval, selected_column)
+            return pd.concat([df, extra], axis=1)
+
+    return kolon_verisi(tuple(tickers), period, interval, selected_column)
+
+
+def hacim_verisi(tickers, *, period, interval, selected_column):
+    """Volume panel for the Close quality stage (None for volume analyses); shares the Close download."""
+    if selected_column != "Close":
+        return None
+    return fiyat_verisi(tickers, period=period, interval=interval, selected_column="Volume")
+
+
+def temiz_getiriler(df, interval, selected_column, volume=None):
+    """
+    Returns for the correlation stages plus the data quality report.
+
+    Close prices go through the calendar alignment and quality stage, with
+    ``volume`` telling dead bars from quiet ones; volume series have no
+    price semantics and keep ``get_safe_returns``.
+    """
+    if selected_column != "Close":
+        return get_safe_returns(df), pd.DataFrame()
+    _, returns, rapor = clean_panel(df, volume, interval=interval)
+    return returns, rapor
+
+
+def korelasyon_ve_sayilar(returns, yarilanma=None, progress=None):
+    """
+    Correlation matrix and per-pair observation counts for the pair statistics.
+
+    With ``yarilanma`` (half-life in bars) the matrix is the EWMA correlation
+    and the counts are its effective sample sizes, so p-values reflect how
+    few bars really carry the weight.
+    """
+    if yarilanma:
+        ewm = EwmaCorrelation.from_returns(returns, yarilanma)
+        return ewm.corr(), pd.DataFrame(ewm.effective_counts(), index=returns.columns, columns=returns.columns)
+    corr = korelasyon_matrisi(returns, progress)
+    return corr, pd.DataFrame(overlap_counts(returns), index=returns.columns, columns=returns.columns)
+
+
+def piyasa_maruziyeti(returns, sektor_haritasi, period, interval):
+    """
+    Rolling XU100 and sector-index exposure of a Close returns panel.
+
+    The indices come in one cached download on the same calendar as the
+    stocks; the window is 60 bars or half the sample when shorter. Empty
+    when XU100 could not be downloaded.
+    """
+    endeksler = {h: SEKTOR_ENDEKSLERI.get(s) for h, s in (sektor_haritasi or {}).items()}
+    semboller = tuple([ENDEKS] + sorted({e for e in endeksler.values() if e}))
+    with stage("fetch: index"):
+        df = kolon_verisi(semboller, period, interval, "Close")
+    if returns.empty or df.empty or ENDEKS not in df.columns:
+        return pd.DataFrame()
+    _, endeks_getiri, _ = clean_panel(df, interval=interval, min_coverage=0)
+    endeks_getiri = endeks_getiri.reindex(returns.index)
+
+    sektor = None
+    if any(e in endeks_getiri.columns for e in endeksler.values()):
+        sektor = pd.DataFrame(
+            {h: endeks_getiri[endeksler[h]] if endeksler.get(h) in endeks_getiri.columns else np.nan
+             for h in returns.columns},
+            index=returns.index,
+        )
+    with stage("compute: exposure"):
+        return maruziyet_tablosu(
+            returns,
+            endeks_getiri[ENDEKS],
+            sector_returns=sektor,
+            window=min(60, max(len(returns) // 2, 10)),
+        )
+
+
+@st.cache_data(ttl=VERI_TTL, show_spinner=False)
+def uzun_gecmis(tickers, period="5y"):
+    """Daily Close and Volume over several years for backtests (one batched download)."""
+    frames = download_columns(list(tickers), period=period, interval="1d", tries=2)
+    return frames["Close"], frames["Volume"]
+
+
+@st.cache_data(ttl=VERI_TTL, show_spinner=False)
+def hisse_gecmisi(hisse, max_deneme=3, bekleme_suresi=2):
+    """
+    Bir hisse için 1 aylık veri çekme fonksiyonu - retry mekanizması ile
+    """
+    for deneme in range(max_deneme):
+        try:
+            if deneme > 0:
+                time.sleep(bekleme_suresi * deneme)
+            hisse_df = yf_history(hisse, period="1mo", auto_adjust=True, timeout=20)
+
+            if hisse_df.empty:
+                if deneme < max_deneme - 1:
+                    continue
+                else:
+                    return None
+            return hisse_df
+        except Exception:
+            if deneme < max_deneme - 1:
+                continue
+            else:
+                return None
+    return None
+
+
+@st.cache_data(ttl=VERI_TTL, show_spinner=False)
+def gunluk_veri(tickers, period="1mo"):
+    """Günlük OHLCV verisi; varsayılan son 1 ay (hacim analizi), sektör momentumu ``SEKTOR_PERIYODU`` ister."""
+    data = yf_download(list(tickers), period=period, auto_adjust=True, threads=False, progress=False, timeout=20)
+    return compact_frame(data) if KOMPAKT_ONBELLEK else data
+
+
+def veri_onbellegini_temizle():
+    """Drop cached downloads so the next fetches go to the provider (an explicit fresh-data run)."""
+    for fetcher in (kolon_verileri, hisse_gecmisi, gunluk_veri):
+        fetcher.clear()
+
+
+def tam_analiz(tickers, sektor_haritasi, period, column_label, *, kompakt=False, yarilanma=None, progress=None):
+    """
+    Bist30-Full / Kontrat-Tum pipeline: correlation, para akışı, sektörel and hacim.
+
+    Returns a dict keyed like the pages' session state. ``yarilanma`` switches
+    the correlation to EWMA with that half-life in bars. ``progress`` is an
+    optional ``(fraction, text)`` callback.
+    """
+    def ilerleme(oran, metin=None):
+        if progress is not None:
+            progress(oran, metin)
+
+    selected_column = COLUMN_OPTIONS[column_label]
+    sonuc = {}
+
+    # 1. Correlation Analysis
+    ilerleme(0.1, "1/4: Korelasyon analizi yapılıyor...")
+
+    with stage("fetch: prices"):
+        close_df = fiyat_verisi(
+            tickers,
+            period=period,
+            interval=interval_for(period),
+            selected_column=selected_column,
+        )
+        volume_df = hacim_verisi(tickers, period=period, interval=interval_for(period), selected_column=selected_column)
+    with stage("compute: data quality"):
+        returns, sonuc['veri_kalitesi_df'] = temiz_getiriler(
+            close_df, interval_for(period), selected_column, volume=volume_df
+        )
+        if kompakt:
+            returns = compact_frame(returns)
+    with stage("compute: correlation"):
+        corr_matrix, sayilar = korelasyon_ve_sayilar(returns, yarilanma, lambda f: ilerleme(0.1 + 0.15 * f))
+
+        # Create correlation pairs (sorted labels keep Stock 1 < Stock 2) with p-values and CIs
+        sonuc['correlation_matrix'] = corr_matrix
+        sirali = corr_matrix.sort_index().sort_index(axis=1)
+        sonuc['correlation_pairs'] = CompactPairs.from_corr(
+            sirali, sayilar.loc[sirali.index, sirali.columns], compact=kompakt
+        )
+    # Lead-lag: which ticker moves first, up to 5 bars (hours on intraday periods)
+    with stage("compute: lead-lag"):
+        sonuc['lead_lag_df'] = lead_lag_pairs(returns, max_lag=5)
+    # Factor structure: market mode share, secondary-factor loadings, residual correlation
+    with stage("compute: eigen"):
+        sonuc['eigen_df'], sonuc['eigen_loadings_df'], sonuc['residual_corr'] = eigen_analysis(corr_matrix)
+    # Market exposure: beta to XU100 and each ticker's sector index (Close only)
+    sonuc['maruziyet_df'] = (
+        piyasa_maruziyeti(returns, sektor_haritasi, period, interval_for(period))
+        if selected_column == "Close" else pd.DataFrame()
+    )
+    ilerleme(0.25)
+
+    # 2. Para Akisi Analizi
+    ilerleme(0.35, "2/4: Para akışı analizi yapılıyor...")
+
+    with stage("fetch+compute: para akışı"):
+        analiz_listesi = []
+        for hisse in tickers:
+            hisse_df = hisse_gecmisi(hisse)
+            if hisse_df is None:
+                continue
+            try:
+                close_prices = hisse_df['Close']
+                volumes = hisse_df['Volume']
+                if len(close_prices) < 6 or len(volumes) < 20:
+                    continue
+                fiyat_5g = close_prices.pct_change(5).iloc[-1] * 100
+                hacim_ort_20 = volumes.rolling(window=20).mean().iloc[-1]
+                son_hacim = volumes.iloc[-1]
+                hacim_gucu = son_hacim / hacim_ort_20 if hacim_ort_20 else 0.0
+
+                if fiyat_5g > 0 and hacim_gucu > 1.2:
+                    durum, puan = "GÜÇLÜ GİRİŞ", 3
+                elif fiyat_5g < 0 and hacim_gucu > 1.2:
+                    durum, puan = "GÜÇLÜ ÇIKIŞ", -3
+                else:
+                    durum, puan = "NORMAL / ROTASYON", 0
+
+                analiz_listesi.append({
+                    'Tarih': datetime.now().strftime('%Y-%m-%d'),
+                    'Hisse': hisse,
+                    'Fiyat Değişim (5G %)': round(fiyat_5g, 2),
+                    'Hacim Gücü (x)': round(hacim_gucu, 2),
+                    'Para Akış Sinyali': durum,
+                    'Skor': puan
+                })
+            except Exception:
+                continue
+
+    sonuc['para_akisi_df'] = pd.DataFrame(analiz_listesi)
+    if not sonuc['para_akisi_df'].empty:
+        sonuc['para_akisi_df'] = sonuc['para_akisi_df'].sort_values(by='Skor', ascending=False)
+    ilerleme(0.5)
+
+    # 3. Sektorel Analiz
+    ilerleme(0.6, "3/4: Sektörel analiz yapılıyor...")
+
+    with stage("fetch: daily"):
+        data = gunluk_veri(tuple(tickers), period=SEKTOR_PERIYODU)
+    with stage("compute: sektörel"):
+        if not data.empty:
+            sonuc['sektor_ozet_df'], sonuc['sektor_detay_df'] = sektor_momentumu(
+                data['Close'], data['Volume'], sektor_haritasi
+            )
+        else:
+            sonuc['sektor_ozet_df'] = pd.DataFrame()
+            sonuc['sektor_detay_df'] = pd.DataFrame()
+
+    ilerleme(0.75)
+
+    # 4. Hacim Analizi
+    ilerleme(0.85, "4/4: Hacim analizi yapılıyor...")
+
+    # The hacim table only looks at the last 20 bars, so the sector download serves it too
+    with stage("compute: hacim"):
+        if not data.empty:
+            returns_hacim = data['Close'].pct_change(5).iloc[-1] * 100
+            volumes_hacim = data['Volume'].iloc[-1] / data['Volume'].rolling(20).mean().iloc[-1]
+            current_prices = data['Close'].iloc[-1]
+
+            hacim_df = pd.DataFrame({
+                'Hisse': returns_hacim.index,
+                'Güncel Fiyat': current_prices.values,
+                'Haftalık Getiri %': returns_hacim.values,
+                'Hacim Gücü': volumes_hacim.values
+            })
+            hacim_df['Güncel Fiyat'] = hacim_df['Güncel Fiyat'].round(2)
+            sonuc['hacim_analiz_df'] = hacim_df.sort_values('Hacim Gücü', ascending=False).reset_index(drop=True)
+        else:
+            sonuc['hacim_analiz_df'] = pd.DataFrame()
+
+    ilerleme(1.0, "✅ Tüm analizler tamamlandı!")
+
+    # Store metadata
+    sonuc['run_id'] = uuid.uuid4().hex
+    sonuc['analysis_metadata'] = {
+        'analysis_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'period': period,
+        'column_type': column_label,
+        'correlation_method': f"EWMA (half-life {yarilanma} bars)" if yarilanma else "equal-weight",
+        'last_bar': str(returns.index[-1]) if not returns.empty else None
+    }
+    return sonuc
@@ -0,0 +1,196 @@
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from results import ResultStore
+
+SECTIONS = ("all", "matrix", "pairs", "lead_lag", "eigen", "exposure", "signals", "sectors", "volume")
+GZIP_MIN_BYTES = 1024
+MAX_CACHED_RESPONSES = 512
+
+
+def _positive_int(query, name, default):
+    """Integer query parameter; ValueError (HTTP 400) unless it is a positive integer."""
+    raw = query.get(name, default)
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        value = 0
+    if value < 1:
+        raise ValueError(f"{name} must be a positive integer, got {raw!r}")
+    return value
+
+
+def _finite(value):
+    return isinstance(value, (int, float)) and math.isfinite(value)
+
+
+def _pairs(payload, query):
+    """Top-k correlation pairs, optionally for one ticker and ascending."""
+    k = _positive_int(query, "k", 20)
+    pairs = payload["correlation"]["pairs"]
+    ticker = query.get("ticker")
+    if ticker:
+        pairs = [p for p in pairs if ticker in (p.get("Stock 1"), p.get("Stock 2"))]
+    ascending = query.get("order") == "asc"
+    pairs = sorted(
+        (p for p in pairs if _finite(p.get("Correlation"))),
+        key=lambda p: p["Correlation"],
+        reverse=not ascending,
+    )
+    return pairs[:k]
+
+
+def section(payload, name, query):
+    """The part of an export payload served by one endpoint."""
+    if name == "all":
+        return payload
+    if name == "matrix":
+        return payload["correlation"]["matrix"]
+    if name == "pairs":
+        return _pairs(payload, query)
+    if name == "lead_lag":
+        return payload["correlation"].get("lead_lag", [])
+    if name == "eigen":
+        return payload["correlation"].get("eigen", {})
+    if name == "exposure":
+        return payload.get("maruziyet", [])
+    if name == "signals":
+        return payload["para_akisi"]
+    if name == "sectors":
+        return payload["sektorel"]
+    return payload["hacim_analizi"]
+
+
+class ResultAPI:
+    """
+    Read-only JSON views of a ``ResultStore``.
+
+    Responses are encoded (and gzipped) once per stored version and kept, so
+    repeated requests only hash-compare ETags or copy cached bytes; nothing
+    here ever downloads or recomputes data.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._responses = {}
+        self._lock = threading.Lock()
+
+    def response(self, key, name, query):
+        """(etag, body, gzipped body) or None when ``key`` has no results."""
+        found = self.store.payload(key)
+        if found is None:
+            return None
+        version, payload = found
+        cache_key = (key, name, tuple(sorted(query.items())))
+        with self._lock:
+            cached = self._responses.get(cache_key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        body = json.dumps(
+            {"key": list(key), "metadata": payload.get("metadata", {}), "data": section(payload, name, query)},
+            ensure_ascii=False,
+            allow_nan=False,
+            default=str,
+        ).encode("utf-8")
+        etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        packed = gzip.compress(body, compresslevel=5) if len(body) >= GZIP_MIN_BYTES else None
+        with self._lock:
+            if len(self._responses) >= MAX_CACHED_RESPONSES:
+                self._responses.clear()
+            self._responses[cache_key] = (version, (etag, body, packed))
+        return etag, body, packed
+
+    def index(self):
+        return json.dumps({"results": [list(k) for k in self.store.keys()], "sections": SECTIONS}).encode("utf-8")
+
+
+def _handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body=b"", etag=None, packed=None):
+            use_gzip = packed is not None and "gzip" in self.headers.get("Accept-Encoding", "")
+            if use_gzip:
+                body = packed
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Vary", "Accept-Encoding")
+            if etag:
+                self.send_header("ETag", etag)
+            if use_gzip:
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            parts = [p for p in url.path.split("/") if p]
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+            if parts in ([], ["v1"]):
+                return self._send(200, api.index())
+            if parts == ["health"]:
+                return self._send(200, b'{"status": "ok"}')
+            if len(parts) not in (4, 5) or parts[0] != "v1":
+                return self._send(404, b'{"error": "not found"}')
+            name = parts[4] if len(parts) == 5 else "all"
+            if name not in SECTIONS:
+                return self._send(404, b'{"error": "unknown section"}')
+
+            try:
+                found = api.response(tuple(parts[1:4]), name, query)
+            except ValueError as e:
+                return self._send(400, json.dumps({"error": str(e)}).encode("utf-8"))
+            if found is None:
+                return self._send(404, b'{"error": "no cached results for this universe/period/column"}')
+            etag, body, packed = found
+            if etag in self.headers.get("If-None-Match", ""):
+                return self._send(304, etag=etag)
+            self._send(200, body, etag, packed)
+
+        do_HEAD = do_GET
+
+    return Handler
+
+
+def serve(store, host="127.0.0.1", port=8502):
+    """
+    Serve ``store`` on a daemon thread and return the server.
+
+    Routes: ``/v1`` lists cached keys; ``/v1/<universe>/<period>/<column>[/<section>]``
+    returns one result set (sections: all, matrix, pairs, lead_lag, eigen,
+    exposure, signals, sectors, volume). ``pairs`` accepts ``k``, ``order=asc`` and ``ticker``.
+    """
+    server = ThreadingHTTPServer((host, port), _handler(ResultAPI(store)))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="result-api", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the app's cached results (BIST_RESULT_DIR) as JSON.")
+    parser.add_argument("directory", help="result directory written by the app (BIST_RESULT_DIR)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    args = parser.parse_args(argv)
+    server = serve(ResultStore(args.directory), args.host, args.port)
+    print(f"Serving {args.directory} on http://{args.host}:{args.port}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,98 +1,470 @@
 import streamlit as st
-import yfinance as yf
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import time
 import io
 import json
+import os
 from datetime import datetime
 
-def _chunk_list(items, size):
-    for i in range(0, len(items), size):
-        yield items[i : i + size]
-
-
-def download_selected_column(
-    tickers,
-    *,
-    period,
-    interval,
-    selected_column,
-    auto_adjust=True,
-    batch_size=20,
-    pause_s=2.0,
-    tries=3,
-    timeout=20,
-):
+from analysis import (
+    fiyat_verisi,
+    gecmis_deposu,
+    gunluk_veri,
+    hacim_verisi,
+    hisse_gecmisi,
+    islem_havuzu,
+    korelasyon_ve_sayilar,
+    offload_kullan,
+    piyasa_maruziyeti,
+    sonuc_deposu,
+    tam_analiz,
+    temiz_getiriler,
+    uzun_gecmis,
+    veri_onbellegini_temizle,
+    KOMPAKT_ONBELLEK,
+    SEKTOR_PERIYODU,
+    VERI_TTL,
+)
+from api import serve
+from backtest import backtest_para_akisi, parametre_taramasi
+from compact import CompactPairs, compact_frame
+from correlation import top_k_partners, top_k_peers
+from live import LiveMonitor
+from offload import build_excel
+from profiler import StageProfiler, set_lookup, stage
+from results import json_payload
+from signals import sektor_momentumu
+from universes import BIST30, BIST30_SEKTOR, BIST_DATA, KONTRAT, KONTRAT_SEKTOR, MSCI
+from warmup import start_warmup
+
+
+@st.cache_resource(show_spinner=False)
+def canli_izleyici(tickers, interval="1d", cadence_s=60):
+    """Process-wide live poller shared by every session watching the same universe at the same cadence."""
+    return LiveMonitor(list(tickers), interval=interval, cadence_s=cadence_s).start()
+
+
+def canli_panel(tickers, render, key, intervals=("1d",)):
     """
-    Download a single OHLCV column (Close/Volume) for many tickers.
+    Live mode toggle plus a fragment that reruns on its own at the chosen cadence.
 
-    Uses batching + small pauses to reduce timeouts/throttling and returns a
-    DataFrame indexed by datetime with tickers as columns.
+    Only the fragment is re-executed on each tick; the data comes from the
+    shared poller, so nothing is downloaded by the session itself. With more
+    than one entry in ``intervals`` the bar interval is selectable.
     """
-    tickers_list = list(tickers) if isinstance(tickers, (list, tuple, set)) else [tickers]
-    frames = []
+    if not st.toggle("🔴 Canlı Mod", key=f"{key}_canli"):
+        return False
+    yenileme = st.number_input(
+        "Yenileme Aralığı (saniye):", min_value=15, max_value=3600, value=60, step=15, key=f"{key}_yenileme"
+    )
+    interval = intervals[0]
+    if len(intervals) > 1:
+        interval = st.selectbox("Bar Aralığı:", intervals, key=f"{key}_aralik")
+    monitor = canli_izleyici(tuple(tickers), interval, int(yenileme))
+
+    @st.fragment(run_every=int(yenileme))
+    def _panel():
+        snapshot = monitor.snapshot()
+        if snapshot is None:
+            st.info("Canlı veriler hazırlanıyor...")
+            if monitor.last_error:
+                st.warning(f"Son hata: {monitor.last_error}")
+            return
+        st.caption(f"Son güncelleme: {snapshot['updated_at']} · Son bar: {snapshot['last_bar']}")
+        render(snapshot)
+
+    _panel()
+    return True
+
+
+def korelasyon_yontemi(key):
+    """Equal-weight / EWMA choice shown next to a period dropdown; the half-life in bars or None."""
+    col1, col2 = st.columns(2)
+    with col1:
+        yontem = st.selectbox("Korelasyon Yöntemi:", ["Eşit Ağırlıklı", "EWMA"], key=f"{key}_yontem")
+    with col2:
+        yarilanma = st.number_input(
+            "Yarılanma Ömrü (bar):", min_value=2, max_value=500, value=20, step=1,
+            key=f"{key}_yarilanma", disabled=yontem != "EWMA",
+        )
+    return int(yarilanma) if yontem == "EWMA" else None
 
-    for batch in _chunk_list(tickers_list, batch_size):
-        last = None
-        for attempt in range(tries):
-            try:
-                last = yf.download(
-                    batch,
-                    period=period,
-                    interval=interval,
-                    group_by="column",
-                    auto_adjust=auto_adjust,
-                    threads=False,
-                    progress=False,
-                    timeout=timeout,
-                )
-            except Exception:
-                last = None
 
-            if isinstance(last, pd.DataFrame) and not last.empty:
-                break
-            time.sleep(pause_s * (attempt + 1))
+def sonuc_yasi(sonuc):
+    """Seconds since a results dict was computed, from its analysis metadata."""
+    tarih = (sonuc.get('analysis_metadata') or {}).get('analysis_date')
+    if not tarih:
+        return None
+    return int((datetime.now() - datetime.strptime(tarih, '%Y-%m-%d %H:%M:%S')).total_seconds())
 
-        if last is None or last.empty:
-            time.sleep(pause_s)
-            continue
 
-        try:
-            selected = last[selected_column]
-        except Exception:
-            time.sleep(pause_s)
-            continue
+def taze_veri_secimi(key):
+    """Checkbox that makes the run skip stored results and cached downloads."""
+    return st.checkbox(
+        "Taze veri indir (önbelleği atla)",
+        key=key,
+        help=f"Kapalıyken son {VERI_TTL} saniyede indirilen veriler ve hesaplanan sonuçlar yeniden kullanılır.",
+    )
+
+
+def oturum_profili():
+    """Profiler of the session whose script (or fragment) runs on this thread, if profiling is on."""
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    if not st.session_state.get('profil_modu'):
+        return None
+    return st.session_state.get('profil')
+
+
+def sonuc_anahtari(evren, period, column_label, yarilanma):
+    """Result-store key; EWMA runs are kept apart from the equal-weight default."""
+    return (evren, f"{period}-ewm{yarilanma}" if yarilanma else period, column_label)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def korelasyon_isi_haritasi(corr, title, figsize=(9, 6)):
+    """Render the correlation heatmap once per matrix and return PNG bytes."""
+    with stage("render: heatmap"):
+        fig, ax = plt.subplots(figsize=figsize)
+        sns.heatmap(
+            corr,
+            annot=True,
+            fmt=".2f",
+            cmap="coolwarm",
+            vmin=-1,
+            vmax=1,
+            linewidths=0.5,
+            ax=ax
+        )
+        ax.set_title(title)
+        plt.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=150)
+        plt.close(fig)
+    return buffer.getvalue()
+
+
+def _sonuc(prefix, name):
+    """Session-state result of a full-analysis page, or an empty DataFrame."""
+    value = st.session_state.get(prefix + name)
+    if isinstance(value, CompactPairs):
+        return value.to_frame()
+    return value if value is not None else pd.DataFrame()
+
+
+def ciftler_excel(pairs):
+    """Excel bytes of a filtered pair set."""
+    excel_buffer = io.BytesIO()
+    pairs.to_frame().to_excel(excel_buffer, index=False, engine="openpyxl")
+    return excel_buffer.getvalue()
+
+
+@st.fragment
+def cift_tarayici(pairs, key, sektor_haritasi=None, dosya_adi=None):
+    """
+    Paged correlation pair browser.
+
+    Pairs stay server-side as sorted CompactPairs arrays; filters are boolean
+    masks over those arrays and only the visible page is decoded and sent to
+    the browser, so the payload does not grow with the universe.
+    """
+    # Sorted once per pair set; later interactions only mask and slice
+    sirali = st.session_state.get(f"{key}_sirali")
+    if sirali is None or sirali[0] is not pairs:
+        sirali = (pairs, pairs.sort())
+        st.session_state[f"{key}_sirali"] = sirali
+    secili = sirali[1]
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        hisse = st.selectbox("Hisse:", ["Tümü"] + sorted(secili.tickers), key=f"{key}_hisse")
+    with col2:
+        sektorler = sorted(set((sektor_haritasi or {}).values()))
+        sektor = st.selectbox("Sektör:", ["Tümü"] + sektorler, key=f"{key}_sektor", disabled=not sektorler)
+    with col3:
+        aralik = st.slider("Korelasyon Aralığı:", -1.0, 1.0, (-1.0, 1.0), step=0.05, key=f"{key}_aralik")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        mod = st.radio("Gösterim:", ["Tümü", "En yüksek k", "En düşük k"], horizontal=True, key=f"{key}_mod")
+    with col2:
+        k = st.number_input("k:", min_value=1, max_value=10_000, value=20, key=f"{key}_k", disabled=mod == "Tümü")
+    with col3:
+        boyut = st.selectbox("Sayfa Boyutu:", [25, 50, 100, 250], index=1, key=f"{key}_boyut")
+
+    anlamli = secili.has_stats and st.checkbox("Yalnızca anlamlı çiftler (p < 0.05)", key=f"{key}_anlamli")
+    secili = secili.filter(
+        min_corr=aralik[0] if aralik[0] > -1.0 else None,
+        max_corr=aralik[1] if aralik[1] < 1.0 else None,
+        ticker=None if hisse == "Tümü" else hisse,
+        tickers=None if sektor == "Tümü" else [h for h, s in sektor_haritasi.items() if s == sektor],
+        max_p=0.05 if anlamli else None,
+    )
+    if mod != "Tümü":
+        secili = secili.top(int(k), ascending=(mod == "En düşük k"))
+
+    sayfa_sayisi = max(-(-len(secili) // boyut), 1)
+    # A new filter starts from the first page; the widget would keep a page past the new end
+    imza = (pairs, hisse, sektor, aralik, mod, int(k), anlamli)
+    filtre = imza + (boyut,)
+    if st.session_state.get(f"{key}_filtre") != filtre:
+        st.session_state[f"{key}_filtre"] = filtre
+        st.session_state[f"{key}_sayfa"] = 1
+    elif st.session_state.get(f"{key}_sayfa", 1) > sayfa_sayisi:
+        st.session_state[f"{key}_sayfa"] = sayfa_sayisi
+    sayfa = st.number_input("Sayfa:", min_value=1, max_value=sayfa_sayisi, key=f"{key}_sayfa")
+    st.caption(f"{len(secili):,} çift · Sayfa {sayfa}/{sayfa_sayisi}")
+    st.dataframe(secili.page(int(sayfa), boyut).to_frame(), use_container_width=True, hide_index=True)
+
+    if dosya_adi:
+        # Built only on request and offered only while the same pair set and filter are shown
+        if st.button("📥 Filtrelenmiş Çiftleri Excel'e Aktar", key=f"{key}_excel_olustur"):
+            with stage("export: pairs excel"):
+                st.session_state[f"{key}_excel_dosyasi"] = (imza, ciftler_excel(secili))
+        excel = st.session_state.get(f"{key}_excel_dosyasi")
+        if excel is not None and excel[0] == imza:
+            st.download_button(
+                "📥 Excel Dosyasını İndir",
+                excel[1],
+                dosya_adi,
+                key=f"{key}_excel",
+                on_click="ignore",
+            )
+
+
+# Fewer baseline bars than this make the regime distance meaningless
+REJIM_MIN_BAZ = 60
 
-        if isinstance(selected, pd.Series):
-            # Single ticker edge case
-            name = batch[0] if batch else selected_column
-            selected = selected.to_frame(name=name)
+MARUZIYET_ACIKLAMA = (
+    "Beta ve korelasyon kayan pencerede XU100'e (ve hissenin sektör endeksine) göre; "
+    "Özgün Getiri = getiri − önceki barın betası × endeks getirisi."
+)
 
-        frames.append(selected)
-        time.sleep(pause_s)
 
-    if not frames:
-        return pd.DataFrame()
+def gecmis_paneli(log, prefix):
+    """Stored runs of this universe/period/column: one pair's correlation over time and the biggest movers."""
+    with st.expander(f"🗂️ Korelasyon Geçmişi · {len(log)} kayıt", expanded=False):
+        st.caption(f"{len(log.tickers)} hisse · {log.nbytes / 1024:.0f} KB · her analiz çalıştırması bir kayıt ekler")
+        if len(log) < 2:
+            st.info("Karşılaştırma için bu dönem ve veri türünde en az iki kayıt gerekir.")
+            return
+        hisseler = list(log.matrix().columns)
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            hisse_a = st.selectbox("Hisse 1:", hisseler, key=prefix + 'gecmis_a')
+        with col2:
+            hisse_b = st.selectbox("Hisse 2:", hisseler, index=min(1, len(hisseler) - 1), key=prefix + 'gecmis_b')
+        with col3:
+            son = int(st.number_input("Son N kayıt:", min_value=2, max_value=1000, value=60, key=prefix + 'gecmis_son'))
+        st.line_chart(log.pair_history([(hisse_a, hisse_b)], last=son))
+
+        geri = min(son, len(log)) - 1
+        fark = log.matrix() - log.matrix(-1 - geri)
+        degisim = CompactPairs.from_corr(fark.sort_index().sort_index(axis=1))
+        st.subheader(f"En Çok Değişen Çiftler ({geri} kayıt öncesine göre)")
+        col1, col2 = st.columns(2)
+        for col, artan in ((col1, True), (col2, False)):
+            with col:
+                tablo = degisim.top(10, ascending=not artan).to_frame().rename(columns={'Correlation': 'Değişim'})
+                st.dataframe(tablo, use_container_width=True, hide_index=True)
+
+
+@st.fragment
+def sonuc_paneli(prefix, sektor_haritasi=None):
+    """Result expanders of a full-analysis page, rerun in isolation from the page."""
+    with stage("render: results"):
+        if prefix + 'correlation_matrix' in st.session_state:
+            with st.expander("📊 Korelasyon Analizi", expanded=False):
+                st.subheader("Korelasyon Matrisi")
+                st.dataframe(_sonuc(prefix, 'correlation_matrix'), use_container_width=True)
+                st.subheader("Korelasyon Çiftleri")
+                cift_tarayici(st.session_state[prefix + 'correlation_pairs'], prefix + 'ciftler', sektor_haritasi)
+                if not _sonuc(prefix, 'lead_lag_df').empty:
+                    st.subheader("Öncü / Gecikmeli Çiftler")
+                    st.caption("Lag > 0: Stock 1 önce hareket ediyor (bar cinsinden) · en güçlü 500 çift")
+                    st.dataframe(_sonuc(prefix, 'lead_lag_df').head(500), use_container_width=True, height=300)
+
+        anahtar = st.session_state.get(prefix + 'sonuc_anahtari')
+        if anahtar is not None and gecmis_deposu() is not None:
+            gecmis_paneli(gecmis_deposu().log(anahtar), prefix)
+
+        if not _sonuc(prefix, 'eigen_df').empty:
+            with st.expander("🧭 Faktör Yapısı (PCA)", expanded=False):
+                st.caption("PC1 piyasa modudur; açıklanan varyansı ortak hareketin payını gösterir.")
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.subheader("Açıklanan Varyans")
+                    st.dataframe(_sonuc(prefix, 'eigen_df'), use_container_width=True, hide_index=True)
+                with col2:
+                    st.subheader("En Yüksek Yüklemeler")
+                    st.dataframe(_sonuc(prefix, 'eigen_loadings_df'), use_container_width=True, hide_index=True, height=300)
+                st.subheader("Piyasa Modu Çıkarılmış En Yüksek Çiftler")
+                artik = CompactPairs.from_corr(_sonuc(prefix, 'residual_corr')).top(20)
+                st.dataframe(artik.to_frame(), use_container_width=True, hide_index=True)
+
+        if not _sonuc(prefix, 'maruziyet_df').empty:
+            with st.expander("📉 Piyasa Maruziyeti (XU100)", expanded=False):
+                st.caption(MARUZIYET_ACIKLAMA)
+                st.dataframe(_sonuc(prefix, 'maruziyet_df'), use_container_width=True, hide_index=True)
+
+        if not _sonuc(prefix, 'veri_kalitesi_df').empty:
+            with st.expander("🧹 Veri Kalitesi", expanded=False):
+                st.dataframe(_sonuc(prefix, 'veri_kalitesi_df'), use_container_width=True, hide_index=True)
+
+        if not _sonuc(prefix, 'para_akisi_df').empty:
+            with st.expander("💰 Para Akışı Analizi", expanded=False):
+                st.dataframe(_sonuc(prefix, 'para_akisi_df'), use_container_width=True)
+
+        if not _sonuc(prefix, 'sektor_ozet_df').empty:
+            with st.expander("🏭 Sektörel Analiz", expanded=False):
+                st.subheader("Sektörel Özet")
+                st.dataframe(_sonuc(prefix, 'sektor_ozet_df'), use_container_width=True)
+                st.subheader("Hisse Detayları")
+                st.dataframe(_sonuc(prefix, 'sektor_detay_df'), use_container_width=True)
+
+        if not _sonuc(prefix, 'hacim_analiz_df').empty:
+            with st.expander("📈 Hacim Analizi", expanded=False):
+                st.dataframe(_sonuc(prefix, 'hacim_analiz_df'), use_container_width=True)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def excel_raporu(run_id, _sheets):
+    """Multi-sheet Excel bytes; built once per analysis run (``run_id``)."""
+    with stage("export: excel"):
+        if offload_kullan(sum(df.size for df, _ in _sheets.values()), 200_000):
+            return build_excel(islem_havuzu(), _sheets)
+        excel_buffer = io.BytesIO()
+        with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
+            for sheet_name, (df, index) in _sheets.items():
+                df.to_excel(writer, sheet_name=sheet_name, index=index)
+        return excel_buffer.getvalue()
 
-    df = pd.concat(frames, axis=1)
-    df = df.loc[:, ~df.columns.duplicated()]
-    return df
 
+@st.cache_data(show_spinner=False, max_entries=8)
+def json_raporu(run_id, _payload):
+    """UTF-8 JSON bytes; built once per analysis run (``run_id``)."""
+    with stage("export: json"):
+        return json.dumps(_payload, indent=2, ensure_ascii=False, allow_nan=False, default=str).encode('utf-8')
+
+
+@st.fragment
+def disa_aktarim_paneli(prefix, tag, dosya_oneki):
+    """Excel/JSON export panel; its buttons rerun only this fragment."""
+    if prefix + 'correlation_matrix' not in st.session_state:
+        return
+    run_id = st.session_state.get(prefix + 'run_id')
+
+    st.subheader("📥 Veri Dışa Aktarım")
+    col1, col2 = st.columns(2)
+
+    with col1:
+        # Excel Export
+        if st.button("📥 Excel Dosyası Oluştur", key=f"export_excel_{tag}"):
+            try:
+                sheets = {
+                    'Correlation Matrix': (_sonuc(prefix, 'correlation_matrix'), True),
+                    'Correlation Pairs': (_sonuc(prefix, 'correlation_pairs'), False),
+                }
+                if not _sonuc(prefix, 'residual_corr').empty:
+                    sheets['Residual Correlation'] = (_sonuc(prefix, 'residual_corr'), True)
+                for sheet_name, name in [
+                    ('Lead-Lag', 'lead_lag_df'),
+                    ('Maruziyet', 'maruziyet_df'),
+                    ('Eigen', 'eigen_df'),
+                    ('Eigen Loadings', 'eigen_loadings_df'),
+                    ('Para Akisi', 'para_akisi_df'),
+                    ('Sektorel Ozet', 'sektor_ozet_df'),
+                    ('Sektorel Detay', 'sektor_detay_df'),
+                    ('Hacim Analizi', 'hacim_analiz_df'),
+                ]:
+                    if not _sonuc(prefix, name).empty:
+                        sheets[sheet_name] = (_sonuc(prefix, name), False)
+                st.session_state[prefix + 'excel_buffer'] = (run_id, excel_raporu(run_id, sheets))
+                st.success("✅ Excel dosyası hazır! İndir butonuna tıklayın.")
+            except Exception as e:
+                st.error(f"Excel dosyası oluşturulurken hata: {e}")
+
+        excel = st.session_state.get(prefix + 'excel_buffer')
+        if excel is not None and excel[0] == run_id:
+            st.download_button(
+                label="📥 Excel Dosyasını İndir",
+                data=excel[1],
+                file_name=f"{dosya_oneki}_{datetime.now().strftime('%Y-%m-%d')}.xlsx",
+                mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                key=f"download_excel_{tag}",
+                on_click="ignore",
+            )
+
+    with col2:
+        # JSON Export
+        if st.button("📄 JSON Dosyası Oluştur", key=f"export_json_{tag}"):
+            try:
+                json_data = json_payload({
+                    name: st.session_state.get(prefix + name)
+                    for name in [
+                        'analysis_metadata',
+                        'correlation_matrix',
+                        'correlation_pairs',
+                        'lead_lag_df',
+                        'maruziyet_df',
+                        'eigen_df',
+                        'eigen_loadings_df',
+                        'para_akisi_df',
+                        'sektor_ozet_df',
+                        'sektor_detay_df',
+                        'hacim_analiz_df',
+                    ]
+                })
+                st.session_state[prefix + 'json_bytes'] = (run_id, json_raporu(run_id, json_data))
+                st.success("✅ JSON dosyası hazır! İndir butonuna tıklayın.")
+            except Exception as e:
+                st.error(f"JSON dosyası oluşturulurken hata: {e}")
+
+        json_bytes = st.session_state.get(prefix + 'json_bytes')
+        if json_bytes is not None and json_bytes[0] == run_id:
+            st.download_button(
+                label="📄 JSON Dosyasını İndir",
+                data=json_bytes[1],
+                file_name=f"{dosya_oneki}_{datetime.now().strftime('%Y-%m-%d')}.json",
+                mime='application/json',
+                key=f"download_json_{tag}",
+                on_click="ignore",
+            )
 
-def get_safe_returns(df):
-    """Safely calculates returns and handles empty/partial data."""
-    if df is None or df.empty:
-        return pd.DataFrame()
-    # Drop columns that are all NaN or all 0
-    df = df.loc[:, (df != 0).any(axis=0)].dropna(axis=1, how="all")
-    returns = df.pct_change(fill_method=None).dropna(how="all")
-    return returns
 
 # Page configuration
 st.set_page_config(page_title="BIST Analysis App", layout="wide")
 
+
+@st.cache_resource(show_spinner=False)
+def api_sunucusu():
+    """JSON API over the result store on BIST_API_PORT, started once per server process."""
+    port = os.environ.get("BIST_API_PORT")
+    if not port:
+        return None
+    host = os.environ.get("BIST_API_HOST", "127.0.0.1")
+    try:
+        return serve(sonuc_deposu(), host, int(port))
+    except (OSError, ValueError) as e:
+        st.warning(f"API sunucusu {host}:{port} üzerinde başlatılamadı: {e}")
+        return None
+
+
+@st.cache_resource(show_spinner=False)
+def isinma_gorevi():
+    """Start the background cache warm-up once per server process (BIST_WARMUP=1 or 'open')."""
+    mod = os.environ.get("BIST_WARMUP", "0")
+    if mod == "0":
+        return None
+    return start_warmup(at_open=(mod == "open"))
+
+
+isinma_gorevi()
+api_sunucusu()
+
 # Sidebar navigation
 st.sidebar.title("Navigation")
 page = st.sidebar.radio(
@@ -100,127 +472,120 @@ page = st.sidebar.radio(
     ["BIST Data Analysis", "MSCI Para Akışı Analizi", "BIST30 Para Akışı", "Sektörel Analiz", "BIST30 Hacim Analizi", "BIST30 Correlation", "Bist30-Full", "Kontrat-Tum"]
 )
 
+# Opt-in compact memory layout: float32 returns and int16/float32 correlation pairs for this session
+# (BIST_COMPACT=1 sets the default and also keeps the shared download caches as float32)
+kompakt_mod = st.sidebar.toggle(
+    "Kompakt Bellek Düzeni",
+    value=KOMPAKT_ONBELLEK,
+    help="Getiri tablolarını ve korelasyon çiftlerini float32 olarak tutar.",
+)
+
+# Opt-in profiler: sampled call profile and tracemalloc diff per fetch/compute/render/export stage
+profil_modu = st.sidebar.toggle(
+    "🔬 Profil Modu",
+    value=os.environ.get("BIST_PROFILE", "0") == "1",
+    help="Her aşamanın süresini, örneklenmiş çağrı profilini ve bellek kullanımını kaydeder.",
+    key="profil_modu",
+)
+if profil_modu:
+    st.session_state.setdefault('profil', StageProfiler())
+set_lookup(oturum_profili)
+
 # Page 1: BIST Data Analysis (from app.py)
 if page == "BIST Data Analysis":
     st.title("BIST Data Analysis")
 
-    # First dropdown: Period selection
-    period_options = ["5d", "7d", "3d", "1mo", "1y"]
-    selected_period = st.selectbox(
-        "Dönem Seçiniz:",
-        options=period_options,
-        index=0
-    )
-    # Add a selectbox to choose between Close (Kapanis) and Volume (Hacim)
-    column_options = {"Kapanis": "Close", "Hacim": "Volume"}
-    selected_column_label = st.selectbox(
-        "Veri Türü Seçiniz:",  # Select Data Type
-        options=list(column_options.keys()),
-        index=0
-    )
-    selected_column = column_options[selected_column_label]
-
-    # Determine interval based on period (not shown to user)
-    if selected_period in ["5d", "7d", "3d"]:
-        selected_interval = "1h"
-    else:  # 1mo or 1y
-        selected_interval = "1d"
+    @st.fragment
+    def veri_analizi_paneli():
+        # First dropdown: Period selection
+        period_options = ["5d", "7d", "3d", "1mo", "1y"]
+        selected_period = st.selectbox(
+            "Dönem Seçiniz:",
+            options=period_options,
+            index=0
+        )
+        # Add a selectbox to choose between Close (Kapanis) and Volume (Hacim)
+        column_options = {"Kapanis": "Close", "Hacim": "Volume"}
+        selected_column_label = st.selectbox(
+            "Veri Türü Seçiniz:",  # Select Data Type
+            options=list(column_options.keys()),
+            index=0
+        )
+        selected_column = column_options[selected_column_label]
+
+        # Determine interval based on period (not shown to user)
+        if selected_period in ["5d", "7d", "3d"]:
+            selected_interval = "1h"
+        else:  # 1mo or 1y
+            selected_interval = "1d"
+
+        bt1 = st.button("Analizi Çalıştır", key="run_analysis")
+
+        if bt1:
+            tickers = BIST_DATA
+            with st.spinner("Veriler indiriliyor..."):
+                close_df = fiyat_verisi(
+                    tickers,
+                    period=selected_period,
+                    interval=selected_interval,
+                    selected_column=selected_column,
+                )
+                volume_df = hacim_verisi(
+                    tickers,
+                    period=selected_period,
+                    interval=selected_interval,
+                    selected_column=selected_column,
+                )
 
-    bt1 = st.button("Analizi Çalıştır", key="run_analysis")
+            if close_df.empty:
+                st.warning("Veri çekilemedi. Lütfen daha sonra tekrar deneyin.")
+                return
 
-    if bt1:
-        tickers = ["FROTO.IS", "BIMAS.IS", "ASELS.IS", "AKBNK.IS","TUPRS.IS","THYAO.IS","TCELL.IS","YKBNK.IS","ISCTR.IS","SAHOL.IS","KCHOL.IS"]
-        with st.spinner("Veriler indiriliyor..."):
-            close_df = download_selected_column(
-                tickers,
-                period=selected_period,
-                interval=selected_interval,
-                selected_column=selected_column,
-                auto_adjust=True,
-                batch_size=20,
-                pause_s=1.0,
-                tries=2,
-            )
+            returns, _ = temiz_getiriler(close_df, selected_interval, selected_column, volume=volume_df)
 
-        if close_df.empty:
-            st.warning("Veri çekilemedi. Lütfen daha sonra tekrar deneyin.")
-            st.stop()
+            corr = returns.corr()
+            excel_buffer = io.BytesIO()
+            corr.to_excel(excel_buffer, index=True)
 
-        close_df = close_df.loc[~(close_df == 0).all(axis=1)]
-        returns = get_safe_returns(close_df)
+            st.session_state.bda_sonuc = {
+                'corr': corr,
+                'title': f"Correlation Matrix {selected_column_label}-{selected_period}",
+                'label': selected_column_label,
+                'excel': excel_buffer.getvalue(),
+            }
 
-        corr_matrix = returns.corr()
-        corr = returns.corr()
+        # Results survive widget interactions; the heatmap is rendered once per matrix
+        sonuc = st.session_state.get('bda_sonuc')
+        if sonuc is not None:
+            st.image(korelasyon_isi_haritasi(sonuc['corr'], sonuc['title']))
 
-        # Display correlation matrix as Streamlit figure
-        fig, ax = plt.subplots(figsize=(9, 6))
-        sns.heatmap(
-            corr,
-            annot=True,
-            fmt=".2f",
-            cmap="coolwarm",
-            vmin=-1,
-            vmax=1,
-            linewidths=0.5,
-            ax=ax
-        )
-        ax.set_title(f"Correlation Matrix {selected_column_label}-{selected_period}")
-        plt.tight_layout()
-        st.pyplot(fig)
+            st.download_button(
+                label="Korelasyon Matrisi Excel İndir",
+                data=sonuc['excel'],
+                file_name=f"{sonuc['label']}_correlation.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                on_click="ignore",
+            )
 
-        excel_buffer = io.BytesIO()
-        corr.to_excel(excel_buffer, index=True)
-        excel_buffer.seek(0)
-
-        st.download_button(
-            label="Korelasyon Matrisi Excel İndir",
-            data=excel_buffer,
-            file_name=f"{selected_column_label}_correlation.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+    veri_analizi_paneli()
 
     # Page 2: MSCI Para Akışı Analizi (from demo.py)
 elif page == "MSCI Para Akışı Analizi":
     st.title("📊 MSCI Para Akış Sinyal Terminali")
 
     # Hisse listesi - DÜZENLEME YOK
-    hisseler = ['ASELS.IS', 'BIMAS.IS', 'AKBNK.IS', 'TUPRS.IS', 'KCHOL.IS', 'THYAO.IS', 'TCELL.IS','ISCTR.IS','YKBNK.IS','FROTO.IS']
+    hisseler = MSCI
 
     # Kullanıcıdan seçim ALMA, hep tüm hisseler analiz edilir
     secili_hisseler = hisseler
 
-    @st.cache_data(show_spinner="Veriler çekiliyor...")
-    def hisse_verisi_cek(hisse, max_deneme=3, bekleme_suresi=2):
-        """
-        Bir hisse için veri çekme fonksiyonu - retry mekanizması ile
-        """
-        for deneme in range(max_deneme):
-            try:
-                if deneme > 0:
-                    time.sleep(bekleme_suresi * deneme)
-                ticker = yf.Ticker(hisse)
-                hisse_df = ticker.history(period="1mo", auto_adjust=True, timeout=20)
-
-                if hisse_df.empty:
-                    if deneme < max_deneme - 1:
-                        continue
-                    else:
-                        return None
-                return hisse_df
-            except Exception:
-                if deneme < max_deneme - 1:
-                    continue
-                else:
-                    return None
-        return None
-
     def analiz_yap(hisse_listesi):
         analiz_listesi = []
         rapor_progress = st.progress(0, text="Analiz başlatılıyor...")
         toplam = len(hisse_listesi)
         for idx, hisse in enumerate(hisse_listesi, 1):
             rapor_progress.progress(idx / toplam, text=f"{hisse} işleniyor ({idx}/{toplam})...")
-            hisse_df = hisse_verisi_cek(hisse)
+            hisse_df = hisse_gecmisi(hisse)
             if hisse_df is None:
                 continue
             try:
@@ -295,66 +660,16 @@ elif page == "BIST30 Para Akışı":
     st.title("📊 BIST30 Para Akış Sinyal Terminali")
 
     # BIST30 hisse listesi
-    hisseler = [
-        'PETKM.IS',
-        'SASA.IS',
-        'GUBRF.IS',
-        'TCELL.IS',
-        'TTKOM.IS',
-        'ASTOR.IS',
-        'TAVHL.IS',
-        'PGSUS.IS',
-        'THYAO.IS',
-        'BIMAS.IS',
-        'MGROS.IS',
-        'AKBNK.IS',
-        'SAHOL.IS',
-        'DSTKF.IS',
-        'EKGYO.IS',
-        'YKBNK.IS',
-        'GARAN.IS',
-        'ISCTR.IS',
-        'EREGL.IS',
-        'TRALT.IS',
-        'KRDMD.IS',
-        'TUPRS.IS',
-        'KCHOL.IS',
-        'ENKAI.IS',
-        'ASELS.IS',
-        'SISE.IS',
-        'TOASO.IS',
-        'FROTO.IS',
-        'AEFES.IS',
-        'ULKER.IS'
-    ]
+    hisseler = BIST30
 
     # Kullanıcıdan seçim ALMA, hep tüm hisseler analiz edilir
     secili_hisseler = hisseler
 
-    @st.cache_data(show_spinner="Veriler çekiliyor...")
-    def hisse_verisi_cek(hisse, max_deneme=3, bekleme_suresi=2):
-        """
-        Bir hisse için veri çekme fonksiyonu - retry mekanizması ile
-        """
-        for deneme in range(max_deneme):
-            try:
-                if deneme > 0:
-                    time.sleep(bekleme_suresi * deneme)
-                ticker = yf.Ticker(hisse)
-                hisse_df = ticker.history(period="1mo", auto_adjust=True, timeout=20)
-
-                if hisse_df.empty:
-                    if deneme < max_deneme - 1:
-                        continue
-                    else:
-                        return None
-                return hisse_df
-            except Exception:
-                if deneme < max_deneme - 1:
-                    continue
-                else:
-                    return None
-        return None
+    canli_panel(
+        hisseler,
+        lambda snapshot: st.dataframe(snapshot['signals'], use_container_width=True),
+        key="b30_para",
+    )
 
     def analiz_yap(hisse_listesi):
         analiz_listesi = []
@@ -362,7 +677,7 @@ elif page == "BIST30 Para Akışı":
         toplam = len(hisse_listesi)
         for idx, hisse in enumerate(hisse_listesi, 1):
             rapor_progress.progress(idx / toplam, text=f"{hisse} işleniyor ({idx}/{toplam})...")
-            hisse_df = hisse_verisi_cek(hisse)
+            hisse_df = hisse_gecmisi(hisse)
             if hisse_df is None:
                 continue
             try:
@@ -432,6 +747,48 @@ elif page == "BIST30 Para Akışı":
             '''
         )
 
+    # Sinyalin geçmişte ne kadar isabetli olduğu: kuralı tüm günlerde tek seferde değerlendirir
+    st.subheader("Sinyal Backtesti")
+    col1, col2 = st.columns(2)
+    with col1:
+        bt_donem = st.selectbox("Geçmiş Dönem:", ["2y", "5y", "10y", "max"], index=1, key="b30_bt_donem")
+    with col2:
+        bt_ufuklar = st.multiselect("İleri Getiri Ufku (gün):", [1, 5, 10, 20, 60], default=[1, 5, 20], key="b30_bt_ufuk")
+
+    if st.button("Backtest Çalıştır", key="b30_bt") and bt_ufuklar:
+        with st.spinner("Geçmiş veriler indiriliyor..."):
+            bt_close, bt_volume = uzun_gecmis(tuple(hisseler), bt_donem)
+        hisse_bt, sektor_bt = backtest_para_akisi(
+            bt_close, bt_volume, horizons=sorted(bt_ufuklar), sektor_haritasi=BIST30_SEKTOR,
+        )
+        if hisse_bt.empty:
+            st.warning("Backtest için yeterli geçmiş veri bulunamadı.")
+        else:
+            st.caption(f"{len(bt_close)} işlem günü, {bt_close.shape[1]} hisse")
+            st.markdown("**Sektör Bazında**")
+            st.dataframe(sektor_bt, use_container_width=True, hide_index=True)
+            st.markdown("**Hisse Bazında**")
+            st.dataframe(hisse_bt, use_container_width=True, hide_index=True)
+
+    if st.button("Parametre Taraması", key="b30_tarama"):
+        with st.spinner("Parametre ızgarası değerlendiriliyor..."):
+            bt_close, bt_volume = uzun_gecmis(tuple(hisseler), bt_donem)
+            kup = parametre_taramasi(
+                bt_close,
+                bt_volume,
+                return_windows=(3, 5, 10, 20),
+                volume_windows=(10, 20, 40, 60),
+                thresholds=(1.0, 1.2, 1.5, 2.0, 2.5),
+                horizon=min(bt_ufuklar or [5]),
+            )
+        if kup.empty:
+            st.warning("Tarama için yeterli geçmiş veri bulunamadı.")
+        else:
+            st.caption("Her sinyal için en yüksek fazla getiriyi veren parametreler (en az 30 sinyal)")
+            kup = kup[kup['Sinyal Sayısı'] >= 30].reset_index()
+            en_iyi = kup.sort_values('Fazla Getiri %', ascending=False).groupby('Sinyal').head(10)
+            st.dataframe(en_iyi, use_container_width=True, hide_index=True)
+
 # Page 4: Sektörel Analiz
 elif page == "Sektörel Analiz":
     st.title("📊 MSCI Turkey Sektörel Analiz")
@@ -440,87 +797,37 @@ elif page == "Sektörel Analiz":
         """
         Bu sayfa seçili hisseler üzerinden **sektörel para giriş hızını** analiz eder.
 
-        - Son 1 ay verisi kullanılır.
+        - Son 6 ay verisi kullanılır.
         - 5 günlük fiyat getirisi ve 20 günlük ortalama hacim baz alınır.
-        - Sektör skoru = Haftalık Getiri % x Hacim Gücü
+        - Sektör skoru = Haftalık Getiri % x Hacim Gücü; sektörler eşit ya da işlem hacmi ağırlıklı ortalanır.
+        - Ek olarak 1, 20 ve 60 günlük getiri ile hacim gücü (pencerenin ortalama hacmi / önceki 20 günün ortalaması) tek geçişte hesaplanır.
         """
     )
 
     # 1. Sektörel Gruplandırma
-    sektor_haritasi = {
-    'PETKM.IS': 'İşlenebilen endüstriler',
-    'SASA.IS': 'İşlenebilen endüstriler',
-    'GUBRF.IS': 'İşlenebilen endüstriler',
-
-    'TCELL.IS': 'İletişim',
-    'TTKOM.IS': 'İletişim',
-
-    'ASTOR.IS': 'Üretici imalatı',
-
-    'TAVHL.IS': 'Taşımacılık',
-    'PGSUS.IS': 'Taşımacılık',
-    'THYAO.IS': 'Taşımacılık',
-
-    'BIMAS.IS': 'Perakende satış',
-    'MGROS.IS': 'Perakende satış',
-
-    'AKBNK.IS': 'Finans',
-    'SAHOL.IS': 'Finans',
-    'DSTKF.IS': 'Finans',
-    'EKGYO.IS': 'Finans',
-    'YKBNK.IS': 'Finans',
-    'GARAN.IS': 'Finans',
-    'ISCTR.IS': 'Finans',
-
-    'EREGL.IS': 'Enerji-dışı mineraller',
-    'TRALT.IS': 'Enerji-dışı mineraller',
-    'KRDMD.IS': 'Enerji-dışı mineraller',
-
-    'TUPRS.IS': 'Enerji mineralleri',
-    'KCHOL.IS': 'Enerji mineralleri',
-
-    'ENKAI.IS': 'Endüstriyel hizmetler',
-
-    'ASELS.IS': 'Elektronik teknoloji',
-
-    'SISE.IS': 'Dayanıklı tüketim malları',
-    'TOASO.IS': 'Dayanıklı tüketim malları',
-    'FROTO.IS': 'Dayanıklı tüketim malları',
-
-    'AEFES.IS': 'Dayanıklı olmayan tüketici ürünleri',
-    'ULKER.IS': 'Dayanıklı olmayan tüketici ürünleri'
-    }
+    sektor_haritasi = BIST30_SEKTOR
 
     hisseler = list(sektor_haritasi.keys())
+    agirlik_secimi = st.selectbox("Sektör Ağırlıklandırma:", ["Eşit", "İşlem Hacmi"], key="sektor_agirlik")
 
     if st.button("Sektörel Analizi Çalıştır"):
         with st.spinner("Sektörel trendler hesaplanıyor..."):
             try:
                 # Veri çekimi
-                data = yf.download(hisseler, period="1mo", auto_adjust=True, threads=False, progress=False, timeout=20)
+                data = gunluk_veri(tuple(hisseler), period=SEKTOR_PERIYODU)
 
                 if data.empty:
                     st.warning("Veri çekilemedi. Lütfen daha sonra tekrar deneyin.")
                 else:
-                    # 2. Getiri ve Hacim Hesaplama
-                    returns = data['Close'].pct_change(5, fill_method=None).iloc[-1] * 100
-                    volumes = data['Volume'].iloc[-1] / data['Volume'].rolling(20).mean().iloc[-1]
-
-                    # 3. Verileri Birleştirme
-                    df = pd.DataFrame({
-                        'Hisse': returns.index,
-                        'Sektör': [sektor_haritasi[h] for h in returns.index],
-                        'Haftalık Getiri %': returns.values,
-                        'Hacim Gücü': volumes.values
-                    })
+                    # 2. Tüm pencerelerde getiri, hacim gücü ve sektör ortalamaları
+                    sektor_ozet_df, df_sorted = sektor_momentumu(
+                        data['Close'],
+                        data['Volume'],
+                        sektor_haritasi,
+                        weighting="volume" if agirlik_secimi == "İşlem Hacmi" else "equal",
+                    )
 
-                    # 4. Sektörel Ortalama Hesaplama (Ağırlıklı Güç)
-                    df['Sektör Skoru'] = df['Haftalık Getiri %'] * df['Hacim Gücü']
-                    sektor_ozet = df.groupby('Sektör')['Sektör Skoru'].mean().sort_values(ascending=False)
-                    
                     # Store data in session state for Excel download
-                    sektor_ozet_df = sektor_ozet.reset_index().rename(columns={'Sektör Skoru': 'Ortalama Sektör Skoru'})
-                    df_sorted = df.sort_values('Sektör Skoru', ascending=False)
                     st.session_state.sektor_ozet_df = sektor_ozet_df
                     st.session_state.sektor_detay_df = df_sorted
 
@@ -544,15 +851,17 @@ elif page == "Sektörel Analiz":
                             key="download_ozet"
                         )
 
-                    # 5. Görselleştirme (Barplot)
-                    fig, ax = plt.subplots(figsize=(10, 6))
-                    sns.barplot(
-                        x=sektor_ozet.values,
-                        y=sektor_ozet.index,
-                        ax=ax
+                    # 3. Görselleştirme (haftalık ve pencere başına sektör skoru)
+                    skorlar = sektor_ozet_df.rename(columns={'Ortalama Sektör Skoru': 'Haftalık'}).melt(
+                        id_vars='Sektör',
+                        value_vars=['Haftalık'] + [c for c in sektor_ozet_df.columns if c.startswith('Skor ')],
+                        var_name='Pencere',
+                        value_name='Skor',
                     )
+                    fig, ax = plt.subplots(figsize=(10, 6))
+                    sns.barplot(data=skorlar, x='Skor', y='Sektör', hue='Pencere', ax=ax)
                     ax.set_title('MSCI Turkey Sektörel Para Giriş Hızı')
-                    ax.set_xlabel('Güç Skoru (Fiyat x Hacim)')
+                    ax.set_xlabel('Güç Skoru (Getiri x Hacim Gücü)')
                     ax.grid(axis='x', linestyle='--', alpha=0.7)
                     st.pyplot(fig)
 
@@ -591,20 +900,41 @@ elif page == "BIST30 Hacim Analizi":
     )
 
     # BIST30 hisse listesi
-    hisseler = [
-        'PETKM.IS', 'SASA.IS', 'GUBRF.IS', 'TCELL.IS', 'TTKOM.IS',
-        'ASTOR.IS', 'TAVHL.IS', 'PGSUS.IS', 'THYAO.IS', 'BIMAS.IS',
-        'MGROS.IS', 'AKBNK.IS', 'SAHOL.IS', 'DSTKF.IS', 'EKGYO.IS',
-        'YKBNK.IS', 'GARAN.IS', 'ISCTR.IS', 'EREGL.IS', 'TRALT.IS',
-        'KRDMD.IS', 'TUPRS.IS', 'KCHOL.IS', 'ENKAI.IS', 'ASELS.IS',
-        'SISE.IS', 'TOASO.IS', 'FROTO.IS', 'AEFES.IS', 'ULKER.IS'
-    ]
+    hisseler = BIST30
+
+    def canli_hacim(snapshot):
+        if 'hacim_saatlik' in snapshot:
+            # Saatlik barlarda hacim, önceki günlerin aynı saatiyle karşılaştırılır
+            st.subheader("Saat Bazlı Hacim Gücü")
+            st.dataframe(snapshot['hacim_saatlik'], use_container_width=True, hide_index=True)
+        else:
+            st.dataframe(snapshot['hacim'], use_container_width=True)
+        with st.expander("Canlı Korelasyon Matrisi", expanded=False):
+            esit, ewma = st.tabs(["Eşit Ağırlıklı", "EWMA"])
+            esit.dataframe(snapshot['correlation'].round(4), use_container_width=True)
+            ewma.dataframe(snapshot['correlation_ewm'].round(4), use_container_width=True)
+        rejim = snapshot['regime']
+        if rejim['long_bars'] < REJIM_MIN_BAZ:
+            with st.expander("Korelasyon Rejimi · ısınıyor", expanded=False):
+                st.info(
+                    f"Baz pencerede {rejim['long_bars']} bar var; karşılaştırma en az {REJIM_MIN_BAZ} bar "
+                    "birikince gösterilir."
+                )
+            return
+        with st.expander(f"Korelasyon Rejimi · {rejim['breaking']} kırılan çift", expanded=rejim['breaking'] > 0):
+            st.caption(f"Baz: güncel pencereden önceki {rejim['long_bars']} bar · Güncel: son {rejim['short_bars']} bar")
+            col1, col2 = st.columns(2)
+            col1.metric("Ortalama Değişim (RMS)", f"{rejim['distance']:.3f}")
+            col2.metric("Matris Mesafesi (CMD)", f"{rejim['cmd']:.3f}")
+            st.dataframe(rejim['pairs'], use_container_width=True, hide_index=True)
+
+    canli_panel(hisseler, canli_hacim, key="b30_hacim", intervals=("1h", "1d"))
 
     if st.button("Hacim Analizini Çalıştır"):
         with st.spinner("Hacim analizi hesaplanıyor..."):
             try:
                 # Veri çekimi
-                data = yf.download(hisseler, period="1mo", auto_adjust=True, threads=False, progress=False, timeout=20)
+                data = gunluk_veri(tuple(hisseler))
 
                 if data.empty:
                     st.warning("Veri çekilemedi. Lütfen daha sonra tekrar deneyin.")
@@ -656,42 +986,11 @@ elif page == "BIST30 Correlation":
     st.title("BIST30 Correlation Analysis")
 
     # Sektör haritasından hisse listesini al
-    tickers = [
-        'PETKM.IS',
-        'SASA.IS',
-        'GUBRF.IS',
-        'TCELL.IS',
-        'TTKOM.IS',
-        'ASTOR.IS',
-        'TAVHL.IS',
-        'PGSUS.IS',
-        'THYAO.IS',
-        'BIMAS.IS',
-        'MGROS.IS',
-        'AKBNK.IS',
-        'SAHOL.IS',
-        'DSTKF.IS',
-        'EKGYO.IS',
-        'YKBNK.IS',
-        'GARAN.IS',
-        'ISCTR.IS',
-        'EREGL.IS',
-        'TRALT.IS',
-        'KRDMD.IS',
-        'TUPRS.IS',
-        'KCHOL.IS',
-        'ENKAI.IS',
-        'ASELS.IS',
-        'SISE.IS',
-        'TOASO.IS',
-        'FROTO.IS',
-        'AEFES.IS',
-        'ULKER.IS'
-    ]
-
+    tickers = BIST30
 
     period_options = ["5d", "7d", "3d", "1mo", "1y"]
     selected_period = st.selectbox("Dönem Seçiniz:", options=period_options, key="b30_p")
+    b30_yarilanma = korelasyon_yontemi("b30")
 
     selected_column_label = st.selectbox("Veri Türü:", ["Kapanis", "Hacim"], key="b30_c")
     selected_column = "Close" if selected_column_label == "Kapanis" else "Volume"
@@ -699,47 +998,68 @@ elif page == "BIST30 Correlation":
     selected_interval = "1h" if selected_period in ["5d", "7d", "3d"] else "1d"
 
     if st.button("BIST30 Korelasyonu Hesapla"):
-        with st.spinner("BIST30 verileri indiriliyor..."):
-            data = download_selected_column(
+        with st.spinner("BIST30 verileri indiriliyor..."), stage("fetch: prices"):
+            data = fiyat_verisi(
+                tickers,
+                period=selected_period,
+                interval=selected_interval,
+                selected_column=selected_column,
+            )
+            volume_df = hacim_verisi(
                 tickers,
                 period=selected_period,
                 interval=selected_interval,
                 selected_column=selected_column,
-                auto_adjust=True,
-                batch_size=20,
-                pause_s=1.0,
-                tries=2,
             )
 
-        returns = get_safe_returns(data)
+        returns, st.session_state.b30_kalite = temiz_getiriler(data, selected_interval, selected_column, volume=volume_df)
+        if kompakt_mod:
+            returns = compact_frame(returns)
+        st.session_state.b30_returns = returns
+        st.session_state.b30_maruziyet = (
+            piyasa_maruziyeti(returns, BIST30_SEKTOR, selected_period, selected_interval)
+            if selected_column == "Close" else pd.DataFrame()
+        )
 
         if not returns.empty:
-            corr = returns.corr()
-            pairs = []
-            cols = corr.columns
-            for i in range(len(cols)):
-                for j in range(i + 1, len(cols)):
-                    pairs.append(
-                        {
-                            "Stock 1": cols[i],
-                            "Stock 2": cols[j],
-                            "Correlation": round(corr.iloc[i, j], 4),
-                        }
-                    )
+            with stage("compute: correlation"):
+                corr, sayilar = korelasyon_ve_sayilar(returns, b30_yarilanma)
+                st.session_state.b30_pairs = CompactPairs.from_corr(corr, sayilar, compact=kompakt_mod).sort()
+        else:
+            st.session_state.pop('b30_pairs', None)
+            st.warning("BIST30 için seçilen dönem/türde yeterli veri bulunamadı; bazı hisseler indirilememiş olabilir.")
 
-            pairs_df = pd.DataFrame(pairs).sort_values(by="Correlation", ascending=False)
-            st.dataframe(pairs_df, use_container_width=True, height=500)
+    if not st.session_state.get('b30_kalite', pd.DataFrame()).empty:
+        with st.expander("🧹 Veri Kalitesi", expanded=False):
+            st.dataframe(st.session_state.b30_kalite, use_container_width=True, hide_index=True)
 
-            excel_buffer = io.BytesIO()
-            pairs_df.to_excel(excel_buffer, index=False, engine="openpyxl")
-            excel_buffer.seek(0)
-            st.download_button(
-                "Çiftleri Excel Olarak İndir",
-                excel_buffer.getvalue(),
-                "bist30_pairs.xlsx",
+    if not st.session_state.get('b30_maruziyet', pd.DataFrame()).empty:
+        with st.expander("📉 Piyasa Maruziyeti (XU100)", expanded=False):
+            st.caption(MARUZIYET_ACIKLAMA)
+            st.dataframe(st.session_state.b30_maruziyet, use_container_width=True, hide_index=True)
+
+    if 'b30_pairs' in st.session_state:
+        cift_tarayici(st.session_state.b30_pairs, "b30_ciftler", BIST30_SEKTOR, "bist30_pairs.xlsx")
+
+    # Benzer hisse araması: tam matris kurulmadan en yüksek korelasyonlu k hisse
+    if 'b30_returns' in st.session_state and not st.session_state.b30_returns.empty:
+        st.subheader("En Yüksek Korelasyonlu Hisseler")
+        peer_returns = st.session_state.b30_returns
+        col1, col2 = st.columns(2)
+        with col1:
+            peer_ticker = st.selectbox(
+                "Hisse Seçiniz:",
+                options=["Tümü"] + list(peer_returns.columns),
+                key="b30_peer_ticker",
             )
+        with col2:
+            peer_k = st.number_input("Eş Sayısı (k):", min_value=1, max_value=20, value=5, key="b30_peer_k")
+
+        if peer_ticker == "Tümü":
+            peers_df = top_k_partners(peer_returns, k=int(peer_k))
         else:
-            st.warning("BIST30 için seçilen dönem/türde yeterli veri bulunamadı; bazı hisseler indirilememiş olabilir.")
+            peers_df = top_k_peers(peer_returns, peer_ticker, k=int(peer_k))
+        st.dataframe(peers_df, use_container_width=True, hide_index=True)
 
 # Page 7: Bist30-Full
 elif page == "Bist30-Full":
@@ -758,49 +1078,9 @@ elif page == "Bist30-Full":
         """
     )
     
-    # BIST30 ticker list
-    tickers = [
-        'PETKM.IS', 'SASA.IS', 'GUBRF.IS', 'TCELL.IS', 'TTKOM.IS',
-        'ASTOR.IS', 'TAVHL.IS', 'PGSUS.IS', 'THYAO.IS', 'BIMAS.IS',
-        'MGROS.IS', 'AKBNK.IS', 'SAHOL.IS', 'DSTKF.IS', 'EKGYO.IS',
-        'YKBNK.IS', 'GARAN.IS', 'ISCTR.IS', 'EREGL.IS', 'TRALT.IS',
-        'KRDMD.IS', 'TUPRS.IS', 'KCHOL.IS', 'ENKAI.IS', 'ASELS.IS',
-        'SISE.IS', 'TOASO.IS', 'FROTO.IS', 'AEFES.IS', 'ULKER.IS'
-    ]
-    
-    # Sector mapping
-    sektor_haritasi = {
-        'PETKM.IS': 'İşlenebilen endüstriler',
-        'SASA.IS': 'İşlenebilen endüstriler',
-        'GUBRF.IS': 'İşlenebilen endüstriler',
-        'TCELL.IS': 'İletişim',
-        'TTKOM.IS': 'İletişim',
-        'ASTOR.IS': 'Üretici imalatı',
-        'TAVHL.IS': 'Taşımacılık',
-        'PGSUS.IS': 'Taşımacılık',
-        'THYAO.IS': 'Taşımacılık',
-        'BIMAS.IS': 'Perakende satış',
-        'MGROS.IS': 'Perakende satış',
-        'AKBNK.IS': 'Finans',
-        'SAHOL.IS': 'Finans',
-        'DSTKF.IS': 'Finans',
-        'EKGYO.IS': 'Finans',
-        'YKBNK.IS': 'Finans',
-        'GARAN.IS': 'Finans',
-        'ISCTR.IS': 'Finans',
-        'EREGL.IS': 'Enerji-dışı mineraller',
-        'TRALT.IS': 'Enerji-dışı mineraller',
-        'KRDMD.IS': 'Enerji-dışı mineraller',
-        'TUPRS.IS': 'Enerji mineralleri',
-        'KCHOL.IS': 'Enerji mineralleri',
-        'ENKAI.IS': 'Endüstriyel hizmetler',
-        'ASELS.IS': 'Elektronik teknoloji',
-        'SISE.IS': 'Dayanıklı tüketim malları',
-        'TOASO.IS': 'Dayanıklı tüketim malları',
-        'FROTO.IS': 'Dayanıklı tüketim malları',
-        'AEFES.IS': 'Dayanıklı olmayan tüketici ürünleri',
-        'ULKER.IS': 'Dayanıklı olmayan tüketici ürünleri'
-    }
+    # BIST30 ticker list and sector mapping
+    tickers = BIST30
+    sektor_haritasi = BIST30_SEKTOR
     
     # Period and column selection for correlation
     period_options = ["5d", "7d", "3d", "1mo", "1y"]
@@ -809,6 +1089,7 @@ elif page == "Bist30-Full":
         options=period_options,
         index=0  # Default to 5d
     )
+    yarilanma = korelasyon_yontemi("full")
     
     column_options = {"Kapanis": "Close", "Hacim": "Volume"}
     selected_column_label = st.selectbox(
@@ -824,160 +1105,40 @@ elif page == "Bist30-Full":
     else:
         selected_interval = "1d"
     
+    taze = taze_veri_secimi("full_taze")
+
     # Main analysis button
     if st.button("Tüm Analizleri Çalıştır", key="run_full_analysis", type="primary"):
         progress_bar = st.progress(0, text="Analizler başlatılıyor...")
         status_text = st.empty()
         
+        def ilerleme(oran, metin=None):
+            if metin:
+                status_text.text(metin)
+            progress_bar.progress(oran)
+        
         try:
-            # 1. Correlation Analysis
-            status_text.text("1/4: Korelasyon analizi yapılıyor...")
-            progress_bar.progress(0.1)
-            
-            close_df = download_selected_column(
-                tickers,
-                period=selected_period,
-                interval=selected_interval,
-                selected_column=selected_column,
-                auto_adjust=True,
-                batch_size=20,
-                pause_s=1.0,
-                tries=2,
-            )
-            close_df = close_df.loc[~(close_df == 0).all(axis=1)]
-            returns = close_df.pct_change().dropna()
-            corr_matrix = returns.corr()
-            
-            # Create correlation pairs
-            correlation_pairs = []
-            for i in range(len(corr_matrix.columns)):
-                for j in range(i + 1, len(corr_matrix.columns)):
-                    stock1 = corr_matrix.columns[i]
-                    stock2 = corr_matrix.columns[j]
-                    pair = tuple(sorted([stock1, stock2]))
-                    correlation_value = corr_matrix.iloc[i, j]
-                    correlation_pairs.append((pair[0], pair[1], correlation_value))
-            
-            pairs_df = pd.DataFrame(correlation_pairs, columns=['Stock 1', 'Stock 2', 'Correlation'])
-            pairs_df['Correlation'] = pairs_df['Correlation'].round(4)
-            
-            st.session_state.correlation_matrix = corr_matrix
-            st.session_state.correlation_pairs = pairs_df
-            progress_bar.progress(0.25)
-            
-            # 2. Para Akisi Analizi
-            status_text.text("2/4: Para akışı analizi yapılıyor...")
-            progress_bar.progress(0.35)
-            
-            @st.cache_data(show_spinner=False)
-            def hisse_verisi_cek(hisse, max_deneme=3, bekleme_suresi=2):
-                for deneme in range(max_deneme):
-                    try:
-                        if deneme > 0:
-                            time.sleep(bekleme_suresi * deneme)
-                        ticker = yf.Ticker(hisse)
-                        hisse_df = ticker.history(period="1mo", auto_adjust=True, timeout=20)
-                        if hisse_df.empty:
-                            if deneme < max_deneme - 1:
-                                continue
-                            else:
-                                return None
-                        return hisse_df
-                    except Exception:
-                        if deneme < max_deneme - 1:
-                            continue
-                        else:
-                            return None
-                return None
-            
-            analiz_listesi = []
-            for idx, hisse in enumerate(tickers):
-                hisse_df = hisse_verisi_cek(hisse)
-                if hisse_df is None:
-                    continue
-                try:
-                    close_prices = hisse_df['Close']
-                    volumes = hisse_df['Volume']
-                    if len(close_prices) < 6 or len(volumes) < 20:
-                        continue
-                    fiyat_5g = close_prices.pct_change(5).iloc[-1] * 100
-                    hacim_ort_20 = volumes.rolling(window=20).mean().iloc[-1]
-                    son_hacim = volumes.iloc[-1]
-                    hacim_gucu = son_hacim / hacim_ort_20 if hacim_ort_20 else 0.0
-                    
-                    if fiyat_5g > 0 and hacim_gucu > 1.2:
-                        durum, puan = "GÜÇLÜ GİRİŞ", 3
-                    elif fiyat_5g < 0 and hacim_gucu > 1.2:
-                        durum, puan = "GÜÇLÜ ÇIKIŞ", -3
-                    else:
-                        durum, puan = "NORMAL / ROTASYON", 0
-                    
-                    analiz_listesi.append({
-                        'Tarih': datetime.now().strftime('%Y-%m-%d'),
-                        'Hisse': hisse,
-                        'Fiyat Değişim (5G %)': round(fiyat_5g, 2),
-                        'Hacim Gücü (x)': round(hacim_gucu, 2),
-                        'Para Akış Sinyali': durum,
-                        'Skor': puan
-                    })
-                    time.sleep(0.1)
-                except Exception:
-                    continue
-            
-            para_akisi_df = pd.DataFrame(analiz_listesi).sort_values(by='Skor', ascending=False)
-            st.session_state.para_akisi_df = para_akisi_df
-            progress_bar.progress(0.5)
-            
-            # 3. Sektorel Analiz
-            status_text.text("3/4: Sektörel analiz yapılıyor...")
-            progress_bar.progress(0.6)
-            
-            data = yf.download(tickers, period="1mo", auto_adjust=True, threads=False, progress=False, timeout=20)
-            if not data.empty:
-                returns = data['Close'].pct_change(5).iloc[-1] * 100
-                volumes = data['Volume'].iloc[-1] / data['Volume'].rolling(20).mean().iloc[-1]
-                
-                df_sektorel = pd.DataFrame({
-                    'Hisse': returns.index,
-                    'Sektör': [sektor_haritasi.get(h, 'Bilinmeyen') for h in returns.index],
-                    'Haftalık Getiri %': returns.values,
-                    'Hacim Gücü': volumes.values
-                })
-                
-                df_sektorel['Sektör Skoru'] = df_sektorel['Haftalık Getiri %'] * df_sektorel['Hacim Gücü']
-                sektor_ozet = df_sektorel.groupby('Sektör')['Sektör Skoru'].mean().sort_values(ascending=False)
-                sektor_ozet_df = sektor_ozet.reset_index().rename(columns={'Sektör Skoru': 'Ortalama Sektör Skoru'})
-                sektor_detay_df = df_sektorel.sort_values('Sektör Skoru', ascending=False)
-                
-                st.session_state.sektor_ozet_df = sektor_ozet_df
-                st.session_state.sektor_detay_df = sektor_detay_df
-            else:
-                st.session_state.sektor_ozet_df = pd.DataFrame()
-                st.session_state.sektor_detay_df = pd.DataFrame()
-            
-            progress_bar.progress(0.75)
-            
-            # 4. Hacim Analizi
-            status_text.text("4/4: Hacim analizi yapılıyor...")
-            progress_bar.progress(0.85)
+            # Warm-up or another session may already have computed this run
+            anahtar = sonuc_anahtari("bist30", selected_period, selected_column_label, yarilanma)
+            sonuc = None if taze else sonuc_deposu().get(anahtar, max_age=VERI_TTL)
+            onbellekten = sonuc is not None
+            if sonuc is None:
+                if taze:
+                    veri_onbellegini_temizle()
+                sonuc = tam_analiz(
+                    tickers,
+                    sektor_haritasi,
+                    selected_period,
+                    selected_column_label,
+                    kompakt=kompakt_mod,
+                    yarilanma=yarilanma,
+                    progress=ilerleme,
+                )
+                sonuc_deposu().put(anahtar, sonuc)
             
-            if not data.empty:
-                returns_hacim = data['Close'].pct_change(5).iloc[-1] * 100
-                volumes_hacim = data['Volume'].iloc[-1] / data['Volume'].rolling(20).mean().iloc[-1]
-                current_prices = data['Close'].iloc[-1]
-                
-                hacim_df = pd.DataFrame({
-                    'Hisse': returns_hacim.index,
-                    'Güncel Fiyat': current_prices.values,
-                    'Haftalık Getiri %': returns_hacim.values,
-                    'Hacim Gücü': volumes_hacim.values
-                })
-                hacim_df['Güncel Fiyat'] = hacim_df['Güncel Fiyat'].round(2)
-                hacim_df_sorted = hacim_df.sort_values('Hacim Gücü', ascending=False).reset_index(drop=True)
-                
-                st.session_state.hacim_analiz_df = hacim_df_sorted
-            else:
-                st.session_state.hacim_analiz_df = pd.DataFrame()
+            for name, value in sonuc.items():
+                st.session_state[name] = value
+            st.session_state['sonuc_anahtari'] = anahtar
             
             progress_bar.progress(1.0)
             status_text.text("✅ Tüm analizler tamamlandı!")
@@ -986,13 +1147,11 @@ elif page == "Bist30-Full":
             status_text.empty()
             
             st.success("✅ Tüm analizler başarıyla tamamlandı!")
-            
-            # Store metadata
-            st.session_state.analysis_metadata = {
-                'analysis_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'period': selected_period,
-                'column_type': selected_column_label
-            }
+            if onbellekten:
+                st.info(
+                    f"Bu sonuçlar {sonuc_yasi(sonuc)} saniye önce hesaplandı ve yeniden kullanıldı; "
+                    "güncel veri için 'Taze veri indir' seçeneğini işaretleyin."
+                )
             
         except Exception as e:
             st.error(f"Analiz sırasında bir hata oluştu: {e}")
@@ -1000,109 +1159,10 @@ elif page == "Bist30-Full":
             status_text.empty()
     
     # Display results if available
-    if 'correlation_matrix' in st.session_state:
-        with st.expander("📊 Korelasyon Analizi", expanded=False):
-            st.subheader("Korelasyon Matrisi")
-            st.dataframe(st.session_state.correlation_matrix, use_container_width=True)
-            st.subheader("Korelasyon Çiftleri")
-            st.dataframe(st.session_state.correlation_pairs, use_container_width=True, height=300)
-    
-    if 'para_akisi_df' in st.session_state and not st.session_state.para_akisi_df.empty:
-        with st.expander("💰 Para Akışı Analizi", expanded=False):
-            st.dataframe(st.session_state.para_akisi_df, use_container_width=True)
-    
-    if 'sektor_ozet_df' in st.session_state and not st.session_state.sektor_ozet_df.empty:
-        with st.expander("🏭 Sektörel Analiz", expanded=False):
-            st.subheader("Sektörel Özet")
-            st.dataframe(st.session_state.sektor_ozet_df, use_container_width=True)
-            st.subheader("Hisse Detayları")
-            st.dataframe(st.session_state.sektor_detay_df, use_container_width=True)
-    
-    if 'hacim_analiz_df' in st.session_state and not st.session_state.hacim_analiz_df.empty:
-        with st.expander("📈 Hacim Analizi", expanded=False):
-            st.dataframe(st.session_state.hacim_analiz_df, use_container_width=True)
-    
+    sonuc_paneli("", BIST30_SEKTOR)
+
     # Export buttons
-    if 'correlation_matrix' in st.session_state:
-        st.subheader("📥 Veri Dışa Aktarım")
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # Excel Export
-            if st.button("📥 Excel Dosyası Oluştur", key="export_excel"):
-                try:
-                    excel_buffer = io.BytesIO()
-                    with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-                        # Sheet 1: Correlation Matrix
-                        st.session_state.correlation_matrix.to_excel(writer, sheet_name='Correlation Matrix', index=True)
-                        
-                        # Sheet 2: Correlation Pairs
-                        st.session_state.correlation_pairs.to_excel(writer, sheet_name='Correlation Pairs', index=False)
-                        
-                        # Sheet 3: Para Akisi
-                        if 'para_akisi_df' in st.session_state and not st.session_state.para_akisi_df.empty:
-                            st.session_state.para_akisi_df.to_excel(writer, sheet_name='Para Akisi', index=False)
-                        
-                        # Sheet 4: Sektorel Ozet
-                        if 'sektor_ozet_df' in st.session_state and not st.session_state.sektor_ozet_df.empty:
-                            st.session_state.sektor_ozet_df.to_excel(writer, sheet_name='Sektorel Ozet', index=False)
-                        
-                        # Sheet 5: Sektorel Detay
-                        if 'sektor_detay_df' in st.session_state and not st.session_state.sektor_detay_df.empty:
-                            st.session_state.sektor_detay_df.to_excel(writer, sheet_name='Sektorel Detay', index=False)
-                        
-                        # Sheet 6: Hacim Analizi
-                        if 'hacim_analiz_df' in st.session_state and not st.session_state.hacim_analiz_df.empty:
-                            st.session_state.hacim_analiz_df.to_excel(writer, sheet_name='Hacim Analizi', index=False)
-                    
-                    excel_buffer.seek(0)
-                    st.session_state.excel_buffer = excel_buffer.getvalue()
-                    st.success("✅ Excel dosyası hazır! İndir butonuna tıklayın.")
-                except Exception as e:
-                    st.error(f"Excel dosyası oluşturulurken hata: {e}")
-            
-            if 'excel_buffer' in st.session_state:
-                st.download_button(
-                    label="📥 Excel Dosyasını İndir",
-                    data=st.session_state.excel_buffer,
-                    file_name=f"BIST30_Full_Analysis_{datetime.now().strftime('%Y-%m-%d')}.xlsx",
-                    mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                    key="download_excel_full"
-                )
-        
-        with col2:
-            # JSON Export
-            if st.button("📄 JSON Dosyası Oluştur", key="export_json"):
-                try:
-                    json_data = {
-                        "metadata": st.session_state.get('analysis_metadata', {}),
-                        "correlation": {
-                            "matrix": st.session_state.correlation_matrix.to_dict() if 'correlation_matrix' in st.session_state else {},
-                            "pairs": st.session_state.correlation_pairs.to_dict('records') if 'correlation_pairs' in st.session_state else []
-                        },
-                        "para_akisi": st.session_state.para_akisi_df.to_dict('records') if 'para_akisi_df' in st.session_state and not st.session_state.para_akisi_df.empty else [],
-                        "sektorel": {
-                            "ozet": st.session_state.sektor_ozet_df.to_dict('records') if 'sektor_ozet_df' in st.session_state and not st.session_state.sektor_ozet_df.empty else [],
-                            "detay": st.session_state.sektor_detay_df.to_dict('records') if 'sektor_detay_df' in st.session_state and not st.session_state.sektor_detay_df.empty else []
-                        },
-                        "hacim_analizi": st.session_state.hacim_analiz_df.to_dict('records') if 'hacim_analiz_df' in st.session_state and not st.session_state.hacim_analiz_df.empty else []
-                    }
-                    
-                    json_str = json.dumps(json_data, indent=2, ensure_ascii=False, default=str)
-                    json_bytes = json_str.encode('utf-8')
-                    st.session_state.json_bytes = json_bytes
-                    st.success("✅ JSON dosyası hazır! İndir butonuna tıklayın.")
-                except Exception as e:
-                    st.error(f"JSON dosyası oluşturulurken hata: {e}")
-            
-            if 'json_bytes' in st.session_state:
-                st.download_button(
-                    label="📄 JSON Dosyasını İndir",
-                    data=st.session_state.json_bytes,
-                    file_name=f"BIST30_Full_Analysis_{datetime.now().strftime('%Y-%m-%d')}.json",
-                    mime='application/json',
-                    key="download_json_full"
-                )
+    disa_aktarim_paneli("", "full", "BIST30_Full_Analysis")
 
 # Page 8: Kontrat-Tum
 elif page == "Kontrat-Tum":
@@ -1121,94 +1181,9 @@ elif page == "Kontrat-Tum":
         """
     )
     
-    # Kontrat ticker list (without .IS suffix, will add when fetching)
-    tickers_base = [
-        'AEFES', 'AKBNK', 'AKSEN', 'ALARK', 'ARCLK', 'ASELS', 'ASTOR', 
-        'BIMAS', 'BRSAN', 'CIMSA', 'DOAS', 'DOHOL', 'EKGYO', 'ENJSA', 
-        'ENKAI', 'EREGL', 'FROTO', 'GARAN', 'GUBRF', 'HALKB', 'HEKTS', 
-        'ISCTR', 'KCHOL', 'KONTR', 'KRDMD', 'MGROS', 'ODAS', 'OYAKC', 
-        'PETKM', 'PGSUS', 'SAHOL', 'SASA', 'SISE', 'SOKM', 'TAVHL', 
-        'TCELL', 'THYAO', 'TKFEN', 'TOASO', 'TRALT', 'TRMET', 'TSKB', 
-        'TTKOM', 'TUPRS', 'ULKER', 'VAKBN', 'VESTL', 'YKBNK'
-    ]
-    
-    # Add .IS suffix for yfinance
-    tickers = [t + '.IS' for t in tickers_base]
-    
-    # Sector mapping
-    sektor_haritasi = {
-        # İşlenebilen endüstriler (Process Industries / Chemicals & Materials)
-        'PETKM.IS': 'İşlenebilen endüstriler',
-        'SASA.IS': 'İşlenebilen endüstriler',
-        'GUBRF.IS': 'İşlenebilen endüstriler',
-        'OYAKC.IS': 'İşlenebilen endüstriler',
-        'CIMSA.IS': 'İşlenebilen endüstriler',
-
-        # İletişim (Communications)
-        'TCELL.IS': 'İletişim',
-        'TTKOM.IS': 'İletişim',
-
-        # Üretici imalatı (Producer Manufacturing / Capital Goods)
-        'ASTOR.IS': 'Üretici imalatı',
-        'KONTR.IS': 'Üretici imalatı',
-        'TKFEN.IS': 'Üretici imalatı',
-        'BRSAN.IS': 'Üretici imalatı',
-
-        # Taşımacılık (Transportation)
-        'TAVHL.IS': 'Taşımacılık',
-        'PGSUS.IS': 'Taşımacılık',
-        'THYAO.IS': 'Taşımacılık',
-
-        # Perakende satış (Retail Trade)
-        'BIMAS.IS': 'Perakende satış',
-        'MGROS.IS': 'Perakende satış',
-        'SOKM.IS': 'Perakende satış',
-        'DOAS.IS': 'Perakende satış',
-
-        # Finans (Finance / Banking / Holding)
-        'AKBNK.IS': 'Finans',
-        'SAHOL.IS': 'Finans',
-        'EKGYO.IS': 'Finans',
-        'YKBNK.IS': 'Finans',
-        'GARAN.IS': 'Finans',
-        'ISCTR.IS': 'Finans',
-        'HALKB.IS': 'Finans',
-        'VAKBN.IS': 'Finans',
-        'TSKB.IS': 'Finans',
-        'ALARK.IS': 'Finans',
-        'DOHOL.IS': 'Finans',
-
-        # Enerji-dışı mineraller (Non-Energy Minerals / Metals)
-        'EREGL.IS': 'Enerji-dışı mineraller',
-        'TRALT.IS': 'Enerji-dışı mineraller',
-        'KRDMD.IS': 'Enerji-dışı mineraller',
-        'TRMET.IS': 'Enerji-dışı mineraller',
-
-        # Enerji mineralleri (Energy Minerals / Oil & Gas)
-        'TUPRS.IS': 'Enerji mineralleri',
-        'KCHOL.IS': 'Enerji mineralleri',
-
-        # Endüstriyel hizmetler (Industrial Services)
-        'ENKAI.IS': 'Endüstriyel hizmetler',
-        'AKSEN.IS': 'Endüstriyel hizmetler',
-        'ENJSA.IS': 'Endüstriyel hizmetler',
-        'ODAS.IS': 'Endüstriyel hizmetler',
-
-        # Elektronik teknoloji (Electronic Technology / Defense)
-        'ASELS.IS': 'Elektronik teknoloji',
-
-        # Dayanıklı tüketim malları (Consumer Durables)
-        'SISE.IS': 'Dayanıklı tüketim malları',
-        'TOASO.IS': 'Dayanıklı tüketim malları',
-        'FROTO.IS': 'Dayanıklı tüketim malları',
-        'ARCLK.IS': 'Dayanıklı tüketim malları',
-        'VESTL.IS': 'Dayanıklı tüketim malları',
-
-        # Dayanıklı olmayan tüketici ürünleri (Consumer Non-Durables)
-        'AEFES.IS': 'Dayanıklı olmayan tüketici ürünleri',
-        'ULKER.IS': 'Dayanıklı olmayan tüketici ürünleri',
-        'HEKTS.IS': 'Dayanıklı olmayan tüketici ürünleri'
-    }
+    # Kontrat ticker list and sector mapping
+    tickers = KONTRAT
+    sektor_haritasi = KONTRAT_SEKTOR
     
     # Period and column selection for correlation
     period_options = ["5d", "7d", "3d", "1mo", "1y"]
@@ -1217,6 +1192,7 @@ elif page == "Kontrat-Tum":
         options=period_options,
         index=0  # Default to 5d
     )
+    yarilanma = korelasyon_yontemi("kontrat")
     
     column_options = {"Kapanis": "Close", "Hacim": "Volume"}
     selected_column_label = st.selectbox(
@@ -1232,160 +1208,40 @@ elif page == "Kontrat-Tum":
     else:
         selected_interval = "1d"
     
+    taze = taze_veri_secimi("kontrat_taze")
+
     # Main analysis button
     if st.button("Tüm Analizleri Çalıştır", key="run_full_analysis_kontrat", type="primary"):
         progress_bar = st.progress(0, text="Analizler başlatılıyor...")
         status_text = st.empty()
         
+        def ilerleme(oran, metin=None):
+            if metin:
+                status_text.text(metin)
+            progress_bar.progress(oran)
+        
         try:
-            # 1. Correlation Analysis
-            status_text.text("1/4: Korelasyon analizi yapılıyor...")
-            progress_bar.progress(0.1)
-            
-            close_df = download_selected_column(
-                tickers,
-                period=selected_period,
-                interval=selected_interval,
-                selected_column=selected_column,
-                auto_adjust=True,
-                batch_size=20,
-                pause_s=1.0,
-                tries=2,
-            )
-            close_df = close_df.loc[~(close_df == 0).all(axis=1)]
-            returns = close_df.pct_change().dropna()
-            corr_matrix = returns.corr()
-            
-            # Create correlation pairs
-            correlation_pairs = []
-            for i in range(len(corr_matrix.columns)):
-                for j in range(i + 1, len(corr_matrix.columns)):
-                    stock1 = corr_matrix.columns[i]
-                    stock2 = corr_matrix.columns[j]
-                    pair = tuple(sorted([stock1, stock2]))
-                    correlation_value = corr_matrix.iloc[i, j]
-                    correlation_pairs.append((pair[0], pair[1], correlation_value))
-            
-            pairs_df = pd.DataFrame(correlation_pairs, columns=['Stock 1', 'Stock 2', 'Correlation'])
-            pairs_df['Correlation'] = pairs_df['Correlation'].round(4)
-            
-            st.session_state.kontrat_correlation_matrix = corr_matrix
-            st.session_state.kontrat_correlation_pairs = pairs_df
-            progress_bar.progress(0.25)
-            
-            # 2. Para Akisi Analizi
-            status_text.text("2/4: Para akışı analizi yapılıyor...")
-            progress_bar.progress(0.35)
-            
-            @st.cache_data(show_spinner=False)
-            def hisse_verisi_cek_kontrat(hisse, max_deneme=3, bekleme_suresi=2):
-                for deneme in range(max_deneme):
-                    try:
-                        if deneme > 0:
-                            time.sleep(bekleme_suresi * deneme)
-                        ticker = yf.Ticker(hisse)
-                        hisse_df = ticker.history(period="1mo", auto_adjust=True, timeout=20)
-                        if hisse_df.empty:
-                            if deneme < max_deneme - 1:
-                                continue
-                            else:
-                                return None
-                        return hisse_df
-                    except Exception:
-                        if deneme < max_deneme - 1:
-                            continue
-                        else:
-                            return None
-                return None
-            
-            analiz_listesi = []
-            for idx, hisse in enumerate(tickers):
-                hisse_df = hisse_verisi_cek_kontrat(hisse)
-                if hisse_df is None:
-                    continue
-                try:
-                    close_prices = hisse_df['Close']
-                    volumes = hisse_df['Volume']
-                    if len(close_prices) < 6 or len(volumes) < 20:
-                        continue
-                    fiyat_5g = close_prices.pct_change(5).iloc[-1] * 100
-                    hacim_ort_20 = volumes.rolling(window=20).mean().iloc[-1]
-                    son_hacim = volumes.iloc[-1]
-                    hacim_gucu = son_hacim / hacim_ort_20 if hacim_ort_20 else 0.0
-                    
-                    if fiyat_5g > 0 and hacim_gucu > 1.2:
-                        durum, puan = "GÜÇLÜ GİRİŞ", 3
-                    elif fiyat_5g < 0 and hacim_gucu > 1.2:
-                        durum, puan = "GÜÇLÜ ÇIKIŞ", -3
-                    else:
-                        durum, puan = "NORMAL / ROTASYON", 0
-                    
-                    analiz_listesi.append({
-                        'Tarih': datetime.now().strftime('%Y-%m-%d'),
-                        'Hisse': hisse,
-                        'Fiyat Değişim (5G %)': round(fiyat_5g, 2),
-                        'Hacim Gücü (x)': round(hacim_gucu, 2),
-                        'Para Akış Sinyali': durum,
-                        'Skor': puan
-                    })
-                    time.sleep(0.1)
-                except Exception:
-                    continue
-            
-            para_akisi_df = pd.DataFrame(analiz_listesi).sort_values(by='Skor', ascending=False)
-            st.session_state.kontrat_para_akisi_df = para_akisi_df
-            progress_bar.progress(0.5)
-            
-            # 3. Sektorel Analiz
-            status_text.text("3/4: Sektörel analiz yapılıyor...")
-            progress_bar.progress(0.6)
-            
-            data = yf.download(tickers, period="1mo", auto_adjust=True, threads=False, progress=False, timeout=20)
-            if not data.empty:
-                returns = data['Close'].pct_change(5).iloc[-1] * 100
-                volumes = data['Volume'].iloc[-1] / data['Volume'].rolling(20).mean().iloc[-1]
-                
-                df_sektorel = pd.DataFrame({
-                    'Hisse': returns.index,
-                    'Sektör': [sektor_haritasi.get(h, 'Bilinmeyen') for h in returns.index],
-                    'Haftalık Getiri %': returns.values,
-                    'Hacim Gücü': volumes.values
-                })
-                
-                df_sektorel['Sektör Skoru'] = df_sektorel['Haftalık Getiri %'] * df_sektorel['Hacim Gücü']
-                sektor_ozet = df_sektorel.groupby('Sektör')['Sektör Skoru'].mean().sort_values(ascending=False)
-                sektor_ozet_df = sektor_ozet.reset_index().rename(columns={'Sektör Skoru': 'Ortalama Sektör Skoru'})
-                sektor_detay_df = df_sektorel.sort_values('Sektör Skoru', ascending=False)
-                
-                st.session_state.kontrat_sektor_ozet_df = sektor_ozet_df
-                st.session_state.kontrat_sektor_detay_df = sektor_detay_df
-            else:
-                st.session_state.kontrat_sektor_ozet_df = pd.DataFrame()
-                st.session_state.kontrat_sektor_detay_df = pd.DataFrame()
-            
-            progress_bar.progress(0.75)
-            
-            # 4. Hacim Analizi
-            status_text.text("4/4: Hacim analizi yapılıyor...")
-            progress_bar.progress(0.85)
+            # Warm-up or another session may already have computed this run
+            anahtar = sonuc_anahtari("kontrat", selected_period, selected_column_label, yarilanma)
+            sonuc = None if taze else sonuc_deposu().get(anahtar, max_age=VERI_TTL)
+            onbellekten = sonuc is not None
+            if sonuc is None:
+                if taze:
+                    veri_onbellegini_temizle()
+                sonuc = tam_analiz(
+                    tickers,
+                    sektor_haritasi,
+                    selected_period,
+                    selected_column_label,
+                    kompakt=kompakt_mod,
+                    yarilanma=yarilanma,
+                    progress=ilerleme,
+                )
+                sonuc_deposu().put(anahtar, sonuc)
             
-            if not data.empty:
-                returns_hacim = data['Close'].pct_change(5).iloc[-1] * 100
-                volumes_hacim = data['Volume'].iloc[-1] / data['Volume'].rolling(20).mean().iloc[-1]
-                current_prices = data['Close'].iloc[-1]
-                
-                hacim_df = pd.DataFrame({
-                    'Hisse': returns_hacim.index,
-                    'Güncel Fiyat': current_prices.values,
-                    'Haftalık Getiri %': returns_hacim.values,
-                    'Hacim Gücü': volumes_hacim.values
-                })
-                hacim_df['Güncel Fiyat'] = hacim_df['Güncel Fiyat'].round(2)
-                hacim_df_sorted = hacim_df.sort_values('Hacim Gücü', ascending=False).reset_index(drop=True)
-                
-                st.session_state.kontrat_hacim_analiz_df = hacim_df_sorted
-            else:
-                st.session_state.kontrat_hacim_analiz_df = pd.DataFrame()
+            for name, value in sonuc.items():
+                st.session_state['kontrat_' + name] = value
+            st.session_state['kontrat_' + 'sonuc_anahtari'] = anahtar
             
             progress_bar.progress(1.0)
             status_text.text("✅ Tüm analizler tamamlandı!")
@@ -1394,13 +1250,11 @@ elif page == "Kontrat-Tum":
             status_text.empty()
             
             st.success("✅ Tüm analizler başarıyla tamamlandı!")
-            
-            # Store metadata
-            st.session_state.kontrat_analysis_metadata = {
-                'analysis_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'period': selected_period,
-                'column_type': selected_column_label
-            }
+            if onbellekten:
+                st.info(
+                    f"Bu sonuçlar {sonuc_yasi(sonuc)} saniye önce hesaplandı ve yeniden kullanıldı; "
+                    "güncel veri için 'Taze veri indir' seçeneğini işaretleyin."
+                )
             
         except Exception as e:
             st.error(f"Analiz sırasında bir hata oluştu: {e}")
@@ -1408,106 +1262,39 @@ elif page == "Kontrat-Tum":
             status_text.empty()
     
     # Display results if available
-    if 'kontrat_correlation_matrix' in st.session_state:
-        with st.expander("📊 Korelasyon Analizi", expanded=False):
-            st.subheader("Korelasyon Matrisi")
-            st.dataframe(st.session_state.kontrat_correlation_matrix, use_container_width=True)
-            st.subheader("Korelasyon Çiftleri")
-            st.dataframe(st.session_state.kontrat_correlation_pairs, use_container_width=True, height=300)
-    
-    if 'kontrat_para_akisi_df' in st.session_state and not st.session_state.kontrat_para_akisi_df.empty:
-        with st.expander("💰 Para Akışı Analizi", expanded=False):
-            st.dataframe(st.session_state.kontrat_para_akisi_df, use_container_width=True)
-    
-    if 'kontrat_sektor_ozet_df' in st.session_state and not st.session_state.kontrat_sektor_ozet_df.empty:
-        with st.expander("🏭 Sektörel Analiz", expanded=False):
-            st.subheader("Sektörel Özet")
-            st.dataframe(st.session_state.kontrat_sektor_ozet_df, use_container_width=True)
-            st.subheader("Hisse Detayları")
-            st.dataframe(st.session_state.kontrat_sektor_detay_df, use_container_width=True)
-    
-    if 'kontrat_hacim_analiz_df' in st.session_state and not st.session_state.kontrat_hacim_analiz_df.empty:
-        with st.expander("📈 Hacim Analizi", expanded=False):
-            st.dataframe(st.session_state.kontrat_hacim_analiz_df, use_container_width=True)
-    
+    sonuc_paneli("kontrat_", KONTRAT_SEKTOR)
+
     # Export buttons
-    if 'kontrat_correlation_matrix' in st.session_state:
-        st.subheader("📥 Veri Dışa Aktarım")
+    disa_aktarim_paneli("kontrat_", "kontrat", "Kontrat_Tum_Analysis")
+
+
+def profil_raporu(profil):
+    """Per-stage timing, hot functions, package shares and memory growth of this session."""
+    with st.expander(f"🔬 Profil Raporu · {len(profil.records)} aşama", expanded=False):
+        if not profil.records:
+            st.info("Henüz profillenmiş bir aşama yok; bir analiz çalıştırın.")
+            return
+        asamalar, fonksiyonlar, paketler, bellek = profil.frames()
+        st.subheader("Aşamalar")
+        st.dataframe(asamalar, use_container_width=True, hide_index=True)
+        st.subheader("Paket Payları")
+        st.dataframe(paketler, use_container_width=True, hide_index=True)
+        st.subheader("Sıcak Fonksiyonlar")
+        st.dataframe(fonksiyonlar, use_container_width=True, hide_index=True)
+        st.subheader("Bellek Artışı (tracemalloc, tüm süreç)")
+        st.caption("Bellek ölçümleri süreç genelidir; aynı anda çalışan diğer oturumların ayırmalarını da içerir.")
+        st.dataframe(bellek, use_container_width=True, hide_index=True)
         col1, col2 = st.columns(2)
-        
-        with col1:
-            # Excel Export
-            if st.button("📥 Excel Dosyası Oluştur", key="export_excel_kontrat"):
-                try:
-                    excel_buffer = io.BytesIO()
-                    with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-                        # Sheet 1: Correlation Matrix
-                        st.session_state.kontrat_correlation_matrix.to_excel(writer, sheet_name='Correlation Matrix', index=True)
-                        
-                        # Sheet 2: Correlation Pairs
-                        st.session_state.kontrat_correlation_pairs.to_excel(writer, sheet_name='Correlation Pairs', index=False)
-                        
-                        # Sheet 3: Para Akisi
-                        if 'kontrat_para_akisi_df' in st.session_state and not st.session_state.kontrat_para_akisi_df.empty:
-                            st.session_state.kontrat_para_akisi_df.to_excel(writer, sheet_name='Para Akisi', index=False)
-                        
-                        # Sheet 4: Sektorel Ozet
-                        if 'kontrat_sektor_ozet_df' in st.session_state and not st.session_state.kontrat_sektor_ozet_df.empty:
-                            st.session_state.kontrat_sektor_ozet_df.to_excel(writer, sheet_name='Sektorel Ozet', index=False)
-                        
-                        # Sheet 5: Sektorel Detay
-                        if 'kontrat_sektor_detay_df' in st.session_state and not st.session_state.kontrat_sektor_detay_df.empty:
-                            st.session_state.kontrat_sektor_detay_df.to_excel(writer, sheet_name='Sektorel Detay', index=False)
-                        
-                        # Sheet 6: Hacim Analizi
-                        if 'kontrat_hacim_analiz_df' in st.session_state and not st.session_state.kontrat_hacim_analiz_df.empty:
-                            st.session_state.kontrat_hacim_analiz_df.to_excel(writer, sheet_name='Hacim Analizi', index=False)
-                    
-                    excel_buffer.seek(0)
-                    st.session_state.kontrat_excel_buffer = excel_buffer.getvalue()
-                    st.success("✅ Excel dosyası hazır! İndir butonuna tıklayın.")
-                except Exception as e:
-                    st.error(f"Excel dosyası oluşturulurken hata: {e}")
-            
-            if 'kontrat_excel_buffer' in st.session_state:
-                st.download_button(
-                    label="📥 Excel Dosyasını İndir",
-                    data=st.session_state.kontrat_excel_buffer,
-                    file_name=f"Kontrat_Tum_Analysis_{datetime.now().strftime('%Y-%m-%d')}.xlsx",
-                    mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                    key="download_excel_kontrat"
-                )
-        
-        with col2:
-            # JSON Export
-            if st.button("📄 JSON Dosyası Oluştur", key="export_json_kontrat"):
-                try:
-                    json_data = {
-                        "metadata": st.session_state.get('kontrat_analysis_metadata', {}),
-                        "correlation": {
-                            "matrix": st.session_state.kontrat_correlation_matrix.to_dict() if 'kontrat_correlation_matrix' in st.session_state else {},
-                            "pairs": st.session_state.kontrat_correlation_pairs.to_dict('records') if 'kontrat_correlation_pairs' in st.session_state else []
-                        },
-                        "para_akisi": st.session_state.kontrat_para_akisi_df.to_dict('records') if 'kontrat_para_akisi_df' in st.session_state and not st.session_state.kontrat_para_akisi_df.empty else [],
-                        "sektorel": {
-                            "ozet": st.session_state.kontrat_sektor_ozet_df.to_dict('records') if 'kontrat_sektor_ozet_df' in st.session_state and not st.session_state.kontrat_sektor_ozet_df.empty else [],
-                            "detay": st.session_state.kontrat_sektor_detay_df.to_dict('records') if 'kontrat_sektor_detay_df' in st.session_state and not st.session_state.kontrat_sektor_detay_df.empty else []
-                        },
-                        "hacim_analizi": st.session_state.kontrat_hacim_analiz_df.to_dict('records') if 'kontrat_hacim_analiz_df' in st.session_state and not st.session_state.kontrat_hacim_analiz_df.empty else []
-                    }
-                    
-                    json_str = json.dumps(json_data, indent=2, ensure_ascii=False, default=str)
-                    json_bytes = json_str.encode('utf-8')
-                    st.session_state.kontrat_json_bytes = json_bytes
-                    st.success("✅ JSON dosyası hazır! İndir butonuna tıklayın.")
-                except Exception as e:
-                    st.error(f"JSON dosyası oluşturulurken hata: {e}")
-            
-            if 'kontrat_json_bytes' in st.session_state:
-                st.download_button(
-                    label="📄 JSON Dosyasını İndir",
-                    data=st.session_state.kontrat_json_bytes,
-                    file_name=f"Kontrat_Tum_Analysis_{datetime.now().strftime('%Y-%m-%d')}.json",
-                    mime='application/json',
-                    key="download_json_kontrat"
-                )
+        col1.download_button(
+            "Profil Raporunu İndir",
+            profil.to_text(),
+            f"profil_{datetime.now().strftime('%Y-%m-%d_%H%M%S')}.txt",
+            on_click="ignore",
+        )
+        if col2.button("Profili Sıfırla", key="profil_sifirla"):
+            profil.clear()
+            st.rerun()
+
+
+if profil_modu:
+    profil_raporu(st.session_state.profil)
@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+
+from signals import para_akisi_skorlari
+
+SINYALLER = (("GÜÇLÜ GİRİŞ", 3), ("GÜÇLÜ ÇIKIŞ", -3))
+
+
+def forward_returns(close, horizons):
+    """(horizon, time, ticker) array of simple returns ``h`` bars ahead; NaN past the end."""
+    values = close.to_numpy(dtype=np.float64, na_value=np.nan)
+    out = np.full((len(horizons),) + values.shape, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for k, h in enumerate(horizons):
+            out[k, :-h] = values[h:] / values[:-h] - 1
+    return out
+
+
+def _ozet(df):
+    """Hit rate and mean returns (%) from the summed counts of a backtest table."""
+    adet = df['Sinyal Sayısı'].where(df['Sinyal Sayısı'] > 0)
+    df['İsabet Oranı %'] = (100 * df.pop('_isabet') / adet).round(2)
+    df['Ort. İleri Getiri %'] = (100 * df.pop('_getiri') / adet).round(3)
+    df['Baz Getiri %'] = (100 * df.pop('_baz_getiri') / df.pop('_baz_adet').where(lambda s: s > 0)).round(3)
+    df['Fazla Getiri %'] = (df['Ort. İleri Getiri %'] - df['Baz Getiri %']).round(3)
+    return df
+
+
+def backtest_para_akisi(close, volume, *, horizons=(1, 5, 20), sektor_haritasi=None,
+                        return_window=5, volume_window=20, threshold=1.2):
+    """
+    Evaluate the para akışı rule at every bar of a wide Close/Volume history.
+
+    Scores and forward returns for all horizons are computed as whole arrays
+    and reduced over time with masks, so cost is a few passes over
+    (horizon x time x ticker) no matter how many years are loaded. A
+    "GÜÇLÜ GİRİŞ" hit is a positive forward return and a "GÜÇLÜ ÇIKIŞ" hit a
+    negative one; the baseline is the mean forward return over all bars.
+
+    Returns (per-ticker table, per-sector table).
+    """
+    if close is None or close.empty or volume is None or volume.empty:
+        return pd.DataFrame(), pd.DataFrame()
+    horizons = tuple(int(h) for h in horizons)
+    skor = para_akisi_skorlari(
+        close, volume, return_window=return_window, volume_window=volume_window, threshold=threshold,
+    ).to_numpy()
+    fwd = forward_returns(close, horizons)
+    gecerli = ~np.isnan(fwd)
+    fwd0 = np.where(gecerli, fwd, 0.0)
+    baz_adet = gecerli.sum(axis=1)
+    baz_getiri = fwd0.sum(axis=1)
+
+    parcalar = []
+    for sinyal, yon in SINYALLER:
+        maske = (skor == yon)[None] & gecerli
+        isabet = maske & (np.sign(fwd0) == np.sign(yon))
+        for k, h in enumerate(horizons):
+            parcalar.append(pd.DataFrame({
+                'Sinyal': sinyal,
+                'Ufuk (G)': h,
+                'Hisse': close.columns,
+                'Sinyal Sayısı': maske[k].sum(axis=0),
+                '_isabet': isabet[k].sum(axis=0),
+                '_getiri': np.where(maske[k], fwd0[k], 0.0).sum(axis=0),
+                '_baz_adet': baz_adet[k],
+                '_baz_getiri': baz_getiri[k],
+            }))
+    ham = pd.concat(parcalar, ignore_index=True)
+
+    sektor_haritasi = sektor_haritasi or {}
+    ham.insert(3, 'Sektör', ham['Hisse'].map(lambda h: sektor_haritasi.get(h, 'Bilinmeyen')))
+    sektor = ham.drop(columns='Hisse').groupby(['Sinyal', 'Ufuk (G)', 'Sektör'], as_index=False).sum()
+
+    hisse = _ozet(ham).sort_values(['Sinyal', 'Ufuk (G)', 'Fazla Getiri %'], ascending=[True, True, False])
+    sektor = _ozet(sektor).sort_values(['Sinyal', 'Ufuk (G)', 'Fazla Getiri %'], ascending=[True, True, False])
+    return hisse.reset_index(drop=True), sektor.reset_index(drop=True)
+
+
+def rolling_means(values, windows):
+    """
+    Trailing means for several window lengths from one cumulative sum.
+
+    ``values`` is a (time, ticker) array; returns (window, time, ticker),
+    NaN until a window is full or when it contains a NaN (like
+    ``DataFrame.rolling(w).mean()``).
+    """
+    windows = np.asarray(windows, dtype=np.intp)
+    present = ~np.isnan(values)
+    pad = np.zeros((1, values.shape[1]))
+    csum = np.concatenate([pad, np.cumsum(np.where(present, values, 0.0), axis=0)])
+    ccount = np.concatenate([pad, np.cumsum(present, axis=0)])
+    t = np.arange(1, len(values) + 1)
+    start = np.maximum(t[None, :] - windows[:, None], 0)
+    toplam = csum[t][None] - csum[start]
+    adet = ccount[t][None] - ccount[start]
+    full = (adet == windows[:, None, None]) & (t[None, :, None] >= windows[:, None, None])
+    return np.where(full, toplam / windows[:, None, None], np.nan)
+
+
+def parametre_taramasi(close, volume, *, return_windows=(3, 5, 10), volume_windows=(10, 20, 40),
+                       thresholds=(1.0, 1.2, 1.5, 2.0), horizon=5):
+    """
+    Para akışı signal statistics for a whole grid of rule parameters.
+
+    Volume means for every window come from one cumulative sum. Volume
+    strength is binned against the sorted thresholds, so for each return
+    window a single ``bincount`` over (volume window x time x ticker) gives
+    the counts, hits and forward-return sums of every threshold at once (a
+    reverse cumulative sum over the bins). Cost grows with the number of
+    windows, not with the number of thresholds.
+
+    Returns a frame indexed by (return window, volume window, threshold,
+    signal): the results cube in long form, ready for ``unstack``.
+    """
+    if close is None or close.empty or volume is None or volume.empty:
+        return pd.DataFrame()
+    thresholds = np.sort(np.asarray(thresholds, dtype=np.float64))
+    volume = volume.reindex(index=close.index, columns=close.columns)
+    c = close.to_numpy(dtype=np.float64, na_value=np.nan)
+    v = volume.to_numpy(dtype=np.float64, na_value=np.nan)
+    R, V, K = len(return_windows), len(volume_windows), len(thresholds)
+
+    fwd = forward_returns(close, (horizon,))[0]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ort = rolling_means(v, volume_windows)
+        gucu = v[None] / np.where(ort != 0, ort, np.nan)
+    # bin b means strength exceeds the b lowest thresholds; NaN strength never does
+    kutu = np.where(np.isnan(gucu), 0, np.searchsorted(thresholds, gucu, side="left"))
+    kutu += (np.arange(V) * 2 * (K + 1))[:, None, None]
+
+    isabet_ham = np.sign(np.nan_to_num(fwd))
+    baz = np.nanmean(fwd)
+    adet = np.zeros((R, V, 2, K + 1))
+    isabet = np.zeros_like(adet)
+    getiri = np.zeros_like(adet)
+    for r, w in enumerate(return_windows):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fiyat = np.full_like(c, np.nan)
+            fiyat[w:] = c[w:] / c[:-w] - 1
+        yon = np.sign(fiyat)
+        gecerli = (yon != 0) & ~np.isnan(yon) & ~np.isnan(fwd)
+        # direction slot 0 = GÜÇLÜ GİRİŞ (up), 1 = GÜÇLÜ ÇIKIŞ (down)
+        anahtar = kutu + np.where(yon < 0, K + 1, 0)[None]
+        sec = np.broadcast_to(gecerli, kutu.shape)
+        anahtar = anahtar[sec]
+        boyut = V * 2 * (K + 1)
+        adet[r] = np.bincount(anahtar, minlength=boyut).reshape(V, 2, K + 1)
+        hit = np.broadcast_to(isabet_ham == yon, kutu.shape)[sec]
+        isabet[r] = np.bincount(anahtar, weights=hit, minlength=boyut).reshape(V, 2, K + 1)
+        getiri[r] = np.bincount(anahtar, weights=np.broadcast_to(fwd, kutu.shape)[sec], minlength=boyut).reshape(V, 2, K + 1)
+
+    # threshold k passes every bin above k: reverse cumulative sum over bins
+    def esik_ustu(x):
+        return np.cumsum(x[..., ::-1], axis=-1)[..., ::-1][..., 1:]
+
+    adet, isabet, getiri = (esik_ustu(x).transpose(0, 1, 3, 2) for x in (adet, isabet, getiri))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        oran = np.where(adet > 0, isabet / adet, np.nan)
+        ortalama = np.where(adet > 0, getiri / adet, np.nan)
+
+    index = pd.MultiIndex.from_product(
+        [list(return_windows), list(volume_windows), thresholds.tolist(), [s for s, _ in SINYALLER]],
+        names=['Getiri Penceresi', 'Hacim Penceresi', 'Eşik', 'Sinyal'],
+    )
+    return pd.DataFrame({
+        'Sinyal Sayısı': adet.ravel().astype(np.int64),
+        'İsabet Oranı %': (100 * oran.ravel()).round(2),
+        'Ort. İleri Getiri %': (100 * ortalama.ravel()).round(3),
+        'Fazla Getiri %': (100 * (ortalama.ravel() - baz)).round(3),
+    }, index=index)
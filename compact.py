@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+
+from correlation import correlation_significance
+
+
+def compact_frame(df):
+    """
+    float32 values and categorical labels for a wide or long frame.
+
+    Wide price/volume/returns frames (all numeric) are cast in one go; in long
+    tables numeric columns become float32 and text columns (tickers, sectors,
+    signal labels) become categoricals.
+    """
+    if df is None or df.empty:
+        return df
+    numeric = df.select_dtypes("number").columns
+    if len(numeric) == df.shape[1]:
+        return df.astype(np.float32)
+
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        if pd.api.types.is_float_dtype(s):
+            out[col] = s.astype(np.float32)
+        elif pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s):
+            out[col] = s.astype("category")
+        else:
+            out[col] = s
+    return pd.DataFrame(out, index=df.index)
+
+
+def _index_dtype(n):
+    return np.int16 if n <= np.iinfo(np.int16).max else np.int32
+
+
+class CompactPairs:
+    """
+    Correlation pairs stored as (i, j, rho) arrays over a shared ticker index.
+
+    Tickers are integer-coded and labels are shared, so sorting, filtering
+    and paging never touch strings. Built with ``compact=True`` the codes are
+    int16 (up to 32k names) and rho is float32, so a pair costs 8 bytes
+    instead of two Python strings and a float; otherwise values keep full
+    float64 precision. When built
+    with overlap counts, each pair also carries n, a t-test p-value and a
+    Fisher-z confidence interval. Labels are decoded only in ``to_frame()``
+    for display or export.
+    """
+
+    STATS = ("n", "p", "ci_low", "ci_high")
+
+    def __init__(self, tickers, i, j, rho, n=None, p=None, ci_low=None, ci_high=None):
+        self.tickers = pd.Index(tickers)
+        self.i = i
+        self.j = j
+        self.rho = rho
+        self.n = n
+        self.p = p
+        self.ci_low = ci_low
+        self.ci_high = ci_high
+
+    @classmethod
+    def from_corr(cls, corr, counts=None, alpha=0.05, *, compact=False):
+        """
+        Upper triangle of a correlation matrix, without a Python loop.
+
+        ``counts`` (overlap observations per pair, aligned with ``corr``)
+        enables the significance columns at level ``alpha``. ``compact``
+        selects the int16/float32 layout.
+        """
+        dtype = np.float32 if compact else np.float64
+        values = corr.to_numpy(dtype=dtype, na_value=np.nan)
+        i, j = np.triu_indices(len(corr.columns), k=1)
+        codes = _index_dtype(len(corr.columns)) if compact else np.int32
+        pairs = cls(corr.columns, i.astype(codes), j.astype(codes), values[i, j])
+        if counts is not None:
+            n = np.asarray(counts)[i, j]
+            p, ci_low, ci_high = correlation_significance(pairs.rho, n, alpha)
+            pairs.n = n.astype(np.int32)
+            pairs.p = p.astype(dtype)
+            pairs.ci_low = ci_low.astype(dtype)
+            pairs.ci_high = ci_high.astype(dtype)
+        return pairs
+
+    def __len__(self):
+        return len(self.rho)
+
+    @property
+    def has_stats(self):
+        return self.n is not None
+
+    @property
+    def nbytes(self):
+        arrays = [self.i, self.j, self.rho] + [getattr(self, name) for name in self.STATS]
+        return sum(a.nbytes for a in arrays if a is not None)
+
+    def _take(self, idx):
+        stats = {name: getattr(self, name)[idx] for name in self.STATS if getattr(self, name) is not None}
+        return CompactPairs(self.tickers, self.i[idx], self.j[idx], self.rho[idx], **stats)
+
+    def sort(self, ascending=False):
+        """Pairs ordered by correlation; NaN pairs go last."""
+        key = np.where(np.isnan(self.rho), np.inf, self.rho if ascending else -self.rho)
+        return self._take(np.argsort(key, kind="stable"))
+
+    def filter(self, *, min_corr=None, max_corr=None, min_abs=None, ticker=None, tickers=None, max_p=None):
+        """
+        Boolean-mask filter on correlation range, |rho|, p-value, one ticker
+        and/or a ticker group (e.g. a sector: pairs with either side in it).
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if tickers is not None:
+            codes = self.tickers.get_indexer(list(tickers))
+            codes = codes[codes >= 0]
+            mask &= np.isin(self.i, codes) | np.isin(self.j, codes)
+        if max_p is not None and self.has_stats:
+            mask &= self.p < max_p
+        if min_corr is not None:
+            mask &= self.rho >= min_corr
+        if max_corr is not None:
+            mask &= self.rho <= max_corr
+        if min_abs is not None:
+            mask &= np.abs(self.rho) >= min_abs
+        if ticker is not None:
+            code = self.tickers.get_loc(ticker)
+            mask &= (self.i == code) | (self.j == code)
+        return self._take(mask)
+
+    def top(self, k, ascending=False):
+        """The k highest (or lowest) pairs using a partial sort."""
+        k = min(k, len(self))
+        if k == 0:
+            return self._take(slice(0, 0))
+        key = np.where(np.isnan(self.rho), np.inf, self.rho if ascending else -self.rho)
+        part = np.argpartition(key, k - 1)[:k]
+        return self._take(part[np.argsort(key[part], kind="stable")])
+
+    def page(self, number, size=50):
+        """Rows of 1-based page ``number``; only these get decoded for display."""
+        start = max(number - 1, 0) * size
+        return self._take(slice(start, start + size))
+
+    def to_frame(self, decimals=4):
+        """Decode to the 'Stock 1' / 'Stock 2' / 'Correlation' display table (plus stats if present)."""
+        labels = np.asarray(self.tickers)
+        df = pd.DataFrame({
+            'Stock 1': labels[self.i],
+            'Stock 2': labels[self.j],
+            'Correlation': self.rho.astype(np.float64).round(decimals),
+        })
+        if self.has_stats:
+            df['N'] = self.n
+            df['p-value'] = self.p.astype(np.float64)
+            df['CI Low'] = self.ci_low.astype(np.float64).round(decimals)
+            df['CI High'] = self.ci_high.astype(np.float64).round(decimals)
+        return df
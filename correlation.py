@@ -0,0 +1,582 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from scipy import fft, special
+
+
+def standardize_returns(returns):
+    """
+    Z-score each ticker's returns once so correlations become dot products.
+
+    Returns (tickers, Z) where Z is a (n_tickers, n_obs) float64 array whose
+    rows have zero mean and unit norm. Missing observations are treated as a
+    zero deviation from the mean, which matches ``DataFrame.corr()`` exactly
+    when the panel has no gaps.
+    """
+    if returns is None or returns.empty:
+        return pd.Index([]), np.empty((0, 0))
+
+    values = returns.to_numpy(dtype=np.float64, na_value=np.nan).T
+    mean = np.nanmean(values, axis=1, keepdims=True)
+    z = np.nan_to_num(values - mean, nan=0.0)
+    norms = np.linalg.norm(z, axis=1, keepdims=True)
+    norms[norms == 0] = np.nan
+    z = np.nan_to_num(z / norms, nan=0.0)
+    return returns.columns, z
+
+
+
+def pairwise_corr(values, rows=slice(None)):
+    """
+    Pairwise-complete Pearson correlation of ``rows`` against all columns.
+
+    ``values`` is a (n_obs, n_tickers) array with NaN for missing returns.
+    Gives the same result as ``DataFrame.corr()`` but uses six matrix
+    products instead of per-pair masking, and also returns the overlap
+    count of every pair. Returns (corr, counts), both (len(rows), n_tickers).
+    """
+    present = ~np.isnan(values)
+    x = np.where(present, values, 0.0)
+    m = present.astype(np.float64)
+    xr, mr = x[:, rows], m[:, rows]
+
+    n = mr.T @ m
+    sx = xr.T @ m  # sum of x_i over the overlap with j
+    sy = mr.T @ x  # sum of x_j over the overlap with i
+    sxx = (xr * xr).T @ m
+    syy = mr.T @ (x * x)
+    sxy = xr.T @ x
+
+    cov = n * sxy - sx * sy
+    denom = np.sqrt(np.clip((n * sxx - sx**2) * (n * syy - sy**2), 0.0, None))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = np.where((n > 1) & (denom > 0), cov / denom, np.nan)
+    return np.clip(corr, -1.0, 1.0), n
+
+
+def overlap_counts(returns):
+    """Number of rows where both tickers have a return, for every pair (one matrix product)."""
+    present = returns.notna().to_numpy(dtype=np.float64)
+    return present.T @ present
+
+
+def correlation_significance(rho, n, alpha=0.05):
+    """
+    Two-sided t-test p-values and Fisher-z confidence intervals, elementwise.
+
+    ``rho`` and ``n`` can be whole matrices or pair vectors of the same
+    shape; everything is computed with ufuncs, never per pair. Returns
+    (p_value, ci_low, ci_high); entries with too few observations are NaN.
+    """
+    rho = np.asarray(rho, dtype=np.float64)
+    n = np.asarray(n, dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dof = n - 2
+        t = rho * np.sqrt(dof / (1.0 - rho**2))
+        p_value = np.where(dof > 0, 2.0 * special.stdtr(np.maximum(dof, 1), -np.abs(t)), np.nan)
+
+        z = np.arctanh(np.clip(rho, -1 + 1e-12, 1 - 1e-12))
+        half = special.ndtri(1 - alpha / 2) / np.sqrt(n - 3)
+        ci_low = np.where(n > 3, np.tanh(z - half), np.nan)
+        ci_high = np.where(n > 3, np.tanh(z + half), np.nan)
+    return p_value, ci_low, ci_high
+
+
+def _top_k(scores, k):
+    """Indices of the k largest scores per row, sorted descending."""
+    k = min(k, scores.shape[1])
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1)
+    return np.take_along_axis(part, order, axis=1)
+
+
+def _peers_frame(tickers, rows, idx, vals):
+    """Long-format peers table from row ids, peer ids and correlations."""
+    k = idx.shape[1]
+    return pd.DataFrame(
+        {
+            "Stock": np.repeat(np.asarray(tickers)[rows], k),
+            "Rank": np.tile(np.arange(1, k + 1), len(rows)),
+            "Peer": np.asarray(tickers)[idx.ravel()],
+            "Correlation": vals.ravel().round(4),
+        }
+    )
+
+
+def top_k_peers(returns, ticker, k=10, *, absolute=False):
+    """
+    The k names most correlated with ``ticker``.
+
+    Standardizes the panel once and computes a single matrix-vector product,
+    so the full correlation matrix is never built.
+    """
+    tickers, z = standardize_returns(returns)
+    if ticker not in tickers:
+        raise KeyError(f"{ticker} not in returns")
+    row = tickers.get_loc(ticker)
+    scores = (z @ z[row])[None, :]
+    ranking = np.abs(scores) if absolute else scores.copy()
+    ranking[0, row] = -np.inf
+    idx = _top_k(ranking, min(k, len(tickers) - 1))
+    return _peers_frame(tickers, [row], idx, np.take_along_axis(scores, idx, axis=1))
+
+
+def top_k_partners(
+    returns,
+    k=5,
+    *,
+    block_size=512,
+    absolute=False,
+    approximate=False,
+    n_components=64,
+    oversample=4,
+    seed=0,
+):
+    """
+    Each ticker's top-k correlation partners without the full matrix.
+
+    Rows and columns are scanned in blocks of ``block_size``; every row keeps
+    a running top-k (values and indices) that is merged with each new block,
+    so peak memory is O(block_size^2 + n * k).
+
+    With ``approximate=True`` the returns are first projected onto
+    ``n_components`` random directions. Candidates are picked in the
+    projected space and re-ranked exactly, which pays off when the number of
+    observations is much larger than ``n_components``.
+    """
+    tickers, z = standardize_returns(returns)
+    n = len(tickers)
+    if n < 2:
+        return _peers_frame(tickers, [], np.empty((0, 0), dtype=int), np.empty((0, 0)))
+    k = min(k, n - 1)
+
+    search = z
+    keep = k
+    if approximate and z.shape[1] > n_components:
+        rng = np.random.default_rng(seed)
+        proj = rng.standard_normal((z.shape[1], n_components)) / np.sqrt(n_components)
+        search = z @ proj
+        keep = min(k * oversample, n - 1)
+
+    out_idx = np.empty((n, k), dtype=np.int64)
+    out_val = np.empty((n, k))
+    for r0 in range(0, n, block_size):
+        rows = search[r0 : r0 + block_size]
+        top_val = np.full((len(rows), 0), -np.inf)
+        top_idx = np.empty((len(rows), 0), dtype=np.int64)
+        for c0 in range(0, n, block_size):
+            scores = rows @ search[c0 : c0 + block_size].T
+            if absolute:
+                scores = np.abs(scores)
+            # Exclude self-correlation on the diagonal block
+            lo, hi = max(r0, c0), min(r0 + len(rows), c0 + scores.shape[1])
+            if lo < hi:
+                diag = np.arange(lo, hi)
+                scores[diag - r0, diag - c0] = -np.inf
+            cand_val = np.concatenate([top_val, scores], axis=1)
+            cand_idx = np.concatenate(
+                [top_idx, np.broadcast_to(np.arange(c0, c0 + scores.shape[1]), scores.shape)],
+                axis=1,
+            )
+            sel = _top_k(cand_val, keep)
+            top_val = np.take_along_axis(cand_val, sel, axis=1)
+            top_idx = np.take_along_axis(cand_idx, sel, axis=1)
+
+        # Exact correlations for the kept candidates, then final re-rank
+        exact = np.einsum("it,ijt->ij", z[r0 : r0 + len(rows)], z[top_idx])
+        ranking = np.abs(exact) if absolute else exact
+        sel = _top_k(ranking, k)
+        out_idx[r0 : r0 + len(rows)] = np.take_along_axis(top_idx, sel, axis=1)
+        out_val[r0 : r0 + len(rows)] = np.take_along_axis(exact, sel, axis=1)
+
+    return _peers_frame(tickers, np.arange(n), out_idx, out_val)
+
+
+def lead_lag_cube(returns, max_lag=5, *, max_block_bytes=64 << 20):
+    """
+    Cross-correlation of every pair at lags -max_lag..max_lag via FFT.
+
+    Returns are standardized once and transformed once; each block of rows
+    then takes the cross-spectrum against all tickers and one inverse FFT
+    gives every lag at the same time. The transform is zero-padded to at
+    least T + max_lag so the circular result has no wrap-around at the
+    reported lags, and each lag is rescaled by T / (T - |lag|) for the
+    shorter overlap.
+
+    Returns (tickers, lags, cube) where ``cube[i, j, k]`` is the correlation
+    of ticker i at t with ticker j at t + lags[k]: a peak at a positive lag
+    means i leads j.
+    """
+    tickers, z = standardize_returns(returns)
+    n, T = z.shape
+    max_lag = max(min(int(max_lag), T - 1), 0)
+    lags = np.arange(-max_lag, max_lag + 1)
+    if n == 0:
+        return tickers, lags, np.empty((0, 0, len(lags)))
+
+    nfft = fft.next_fast_len(T + max_lag, real=True)
+    spectrum = fft.rfft(z, n=nfft, axis=1, workers=-1)
+    conj = spectrum.conj()
+    scale = T / (T - np.abs(lags))
+    cube = np.empty((n, n, len(lags)))
+    block = max(1, max_block_bytes // (n * nfft * 16))
+    for r0 in range(0, n, block):
+        r1 = min(r0 + block, n)
+        cross = fft.irfft(conj[r0:r1, None, :] * spectrum[None, :, :], n=nfft, axis=-1, workers=-1)
+        cube[r0:r1] = cross[..., lags % nfft] * scale
+    return tickers, lags, np.clip(cube, -1.0, 1.0)
+
+
+def lead_lag_pairs(returns, max_lag=5):
+    """
+    Peak lag and strength of the cross-correlation for every pair.
+
+    'Lag' > 0 means 'Stock 1' moves first by that many bars ('Leader' names
+    the leading ticker, empty when the peak is at lag 0).
+    """
+    tickers, lags, cube = lead_lag_cube(returns, max_lag)
+    i, j = np.triu_indices(len(tickers), k=1)
+    curves = cube[i, j]
+    if curves.size == 0:
+        return pd.DataFrame(columns=['Stock 1', 'Stock 2', 'Lag', 'Peak Correlation', 'Lag 0 Correlation', 'Leader'])
+    peak = np.argmax(np.abs(curves), axis=1)
+    lag = lags[peak]
+    labels = np.asarray(tickers)
+    df = pd.DataFrame({
+        'Stock 1': labels[i],
+        'Stock 2': labels[j],
+        'Lag': lag,
+        'Peak Correlation': curves[np.arange(len(i)), peak].round(4),
+        'Lag 0 Correlation': curves[:, np.searchsorted(lags, 0)].round(4),
+        'Leader': np.where(lag > 0, labels[i], np.where(lag < 0, labels[j], '')),
+    })
+    order = np.argsort(-np.abs(df['Peak Correlation'].to_numpy()), kind="stable")
+    return df.iloc[order].reset_index(drop=True)
+
+
+def _filled_corr(corr):
+    """Correlation values with undefined pairs set to 0 and a unit diagonal."""
+    values = np.nan_to_num(np.asarray(corr, dtype=np.float64), nan=0.0)
+    np.fill_diagonal(values, 1.0)
+    return values
+
+
+def _randomized_eigh(a, k, *, oversample=20, n_iter=5, seed=0):
+    """Top-k eigenpairs of a symmetric PSD matrix by randomized subspace iteration."""
+    rng = np.random.default_rng(seed)
+    q, _ = np.linalg.qr(a @ rng.standard_normal((a.shape[0], k + oversample)))
+    for _ in range(n_iter):
+        q, _ = np.linalg.qr(a @ q)
+    w, v = np.linalg.eigh(q.T @ a @ q)
+    order = np.argsort(w)[::-1][:k]
+    return w[order], q @ v[:, order]
+
+
+def correlation_eigen(corr, k=5, *, exact_below=500, oversample=20, n_iter=5, seed=0):
+    """
+    Leading eigenvalues and eigenvectors of a correlation matrix.
+
+    Below ``exact_below`` names the full symmetric solver runs; above it a
+    randomized subspace iteration finds only the top ``k`` pairs in
+    O(N² k) time; factor modes come out exact, while components inside the
+    noise bulk (nearly equal eigenvalues) are approximate, which is also
+    where they stop meaning anything. Each eigenvector's sign is chosen so its loadings sum to a
+    positive number, so the first one reads as the market mode.
+
+    Returns (eigenvalues, loadings of shape (N, k), explained variance ratios).
+    """
+    values = _filled_corr(corr)
+    n = values.shape[0]
+    k = min(k, n)
+    if k == 0:
+        return np.empty(0), np.empty((n, 0)), np.empty(0)
+    if n < exact_below:
+        w, v = np.linalg.eigh(values)
+        w, v = w[::-1][:k], v[:, ::-1][:, :k]
+    else:
+        w, v = _randomized_eigh(values, k, oversample=oversample, n_iter=n_iter, seed=seed)
+    v = v * np.where(v.sum(axis=0) < 0, -1.0, 1.0)
+    return w, v, w / np.trace(values)
+
+
+def remove_modes(corr, eigenvalues, loadings, modes=1):
+    """
+    Correlation left after removing the first ``modes`` eigen-modes.
+
+    ``C - sum(l_m v_m v_m')`` rescaled back to a unit diagonal: the
+    co-movement that the market mode does not explain.
+    """
+    values = _filled_corr(corr)
+    v = loadings[:, :modes]
+    residual = values - (v * eigenvalues[:modes]) @ v.T
+    scale = np.sqrt(np.clip(np.diag(residual), 1e-12, None))
+    residual = residual / scale[:, None] / scale[None, :]
+    np.fill_diagonal(residual, 1.0)
+    return pd.DataFrame(np.clip(residual, -1.0, 1.0), index=corr.index, columns=corr.columns)
+
+
+def eigen_analysis(corr, k=5, top=10, modes=1, **solver):
+    """
+    Explained-variance table, top loadings per component and the
+    market-mode-removed residual correlation matrix.
+
+    Returns (explained, loadings, residual). ``loadings`` holds the ``top``
+    names by absolute loading for each component.
+    """
+    w, v, ratio = correlation_eigen(corr, k, **solver)
+    names = [f"PC{m + 1}" for m in range(len(w))]
+    explained = pd.DataFrame({
+        'Component': names,
+        'Eigenvalue': w.round(3),
+        'Explained %': (100 * ratio).round(2),
+        'Cumulative %': (100 * np.cumsum(ratio)).round(2),
+    })
+    labels = np.asarray(corr.columns)
+    rows = []
+    for m, name in enumerate(names):
+        for idx in np.argsort(-np.abs(v[:, m]), kind="stable")[:top]:
+            rows.append({'Component': name, 'Stock': labels[idx], 'Loading': round(float(v[idx, m]), 4)})
+    loadings = pd.DataFrame(rows, columns=['Component', 'Stock', 'Loading'])
+    residual = remove_modes(corr, w, v, modes) if len(w) else corr.copy()
+    return explained, loadings, residual
+
+
+class RunningCorrelation:
+    """
+    Pairwise-complete correlation maintained from running sums.
+
+    Each ``add``/``remove`` of a returns row costs O(n^2), so a live feed can
+    append new bars (and drop old ones, or replace a still-forming bar)
+    without re-scanning history. ``corr()`` matches ``DataFrame.corr()`` on
+    the rows currently held.
+    """
+
+    def __init__(self, tickers):
+        self.tickers = pd.Index(tickers)
+        n = len(self.tickers)
+        self._count = np.zeros((n, n))
+        self._sum = np.zeros((n, n))  # sum of x_i over rows where i and j are present
+        self._sumsq = np.zeros((n, n))
+        self._cross = np.zeros((n, n))
+
+    @classmethod
+    def from_returns(cls, returns):
+        running = cls(returns.columns)
+        for row in returns.to_numpy(dtype=np.float64, na_value=np.nan):
+            running.add(row)
+        return running
+
+    def _update(self, row, sign):
+        x = np.asarray(row, dtype=np.float64)
+        present = ~np.isnan(x)
+        x = np.where(present, x, 0.0)
+        m = present.astype(np.float64)
+        both = np.outer(m, m)
+        self._count += sign * both
+        self._sum += sign * np.outer(x, m)
+        self._sumsq += sign * np.outer(x * x, m)
+        self._cross += sign * np.outer(x, x)
+
+    def add(self, row):
+        """Add one returns row (array-like aligned with ``tickers``)."""
+        self._update(row, 1.0)
+
+    def remove(self, row):
+        """Remove a row previously passed to ``add``."""
+        self._update(row, -1.0)
+
+    def corr(self):
+        n = self._count
+        cov = n * self._cross - self._sum * self._sum.T
+        var_i = n * self._sumsq - self._sum**2
+        denom = np.sqrt(np.clip(var_i * var_i.T, 0.0, None))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = np.where((n > 1) & (denom > 0), cov / denom, np.nan)
+        np.fill_diagonal(corr, np.where(np.diag(n) > 1, 1.0, np.nan))
+        return pd.DataFrame(np.clip(corr, -1.0, 1.0), index=self.tickers, columns=self.tickers)
+
+
+class EwmaCorrelation:
+    """
+    Exponentially weighted, pairwise-complete correlation with a half-life in bars.
+
+    The state is a handful of (n x n) weighted sums. ``add`` ages them by
+    one bar and folds in the new row, O(n^2) per bar with no history kept;
+    ``replace_last`` swaps a still-forming bar. A missing value still ages
+    the older observations, as in ``ewm(halflife=..., ignore_na=False)``.
+    """
+
+    def __init__(self, tickers, halflife=20, min_periods=10):
+        self.tickers = pd.Index(tickers)
+        self.halflife = halflife
+        self.min_periods = min_periods
+        self.decay = 0.5 ** (1.0 / halflife)
+        n = len(self.tickers)
+        self._weight = np.zeros((n, n))
+        self._weight_sq = np.zeros((n, n))  # for the effective sample size
+        self._count = np.zeros((n, n))
+        self._sum = np.zeros((n, n))  # weighted sum of x_i over rows where i and j are present
+        self._sumsq = np.zeros((n, n))
+        self._cross = np.zeros((n, n))
+        self._last = None
+
+    @classmethod
+    def from_returns(cls, returns, halflife=20, min_periods=10):
+        """State after every row of ``returns``, built with weighted matrix products."""
+        ewm = cls(returns.columns, halflife, min_periods)
+        values = returns.to_numpy(dtype=np.float64, na_value=np.nan)
+        if len(values) == 0:
+            return ewm
+        present = ~np.isnan(values)
+        x = np.where(present, values, 0.0)
+        m = present.astype(np.float64)
+        w = ewm.decay ** np.arange(len(values) - 1, -1, -1, dtype=np.float64)[:, None]
+        ewm._weight = (m * w).T @ m
+        ewm._weight_sq = (m * w * w).T @ m
+        ewm._count = m.T @ m
+        ewm._sum = (x * w).T @ m
+        ewm._sumsq = (x * x * w).T @ m
+        ewm._cross = (x * w).T @ x
+        ewm._last = values[-1]
+        return ewm
+
+    def _fold(self, row, sign):
+        x = np.asarray(row, dtype=np.float64)
+        present = ~np.isnan(x)
+        x = np.where(present, x, 0.0)
+        m = present.astype(np.float64)
+        both = np.outer(m, m)
+        self._weight += sign * both
+        self._weight_sq += sign * both
+        self._count += sign * both
+        self._sum += sign * np.outer(x, m)
+        self._sumsq += sign * np.outer(x * x, m)
+        self._cross += sign * np.outer(x, x)
+
+    def add(self, row):
+        """Age the state by one bar and add a returns row aligned with ``tickers``."""
+        for state in (self._weight, self._sum, self._sumsq, self._cross):
+            state *= self.decay
+        self._weight_sq *= self.decay * self.decay
+        self._fold(row, 1.0)
+        self._last = np.asarray(row, dtype=np.float64)
+
+    def replace_last(self, row):
+        """Swap the most recent row (a still-forming bar) without ageing the state."""
+        if self._last is None:
+            return self.add(row)
+        self._fold(self._last, -1.0)
+        self._fold(row, 1.0)
+        self._last = np.asarray(row, dtype=np.float64)
+
+    def effective_counts(self):
+        """Kish effective sample size per pair, (sum w)^2 / sum w^2."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self._weight_sq > 0, self._weight**2 / self._weight_sq, 0.0)
+
+    def corr(self):
+        w = self._weight
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = self._sum / w
+            cov = self._cross / w - mean * mean.T
+            var = self._sumsq / w - mean**2
+            denom = np.sqrt(np.clip(var * var.T, 0.0, None))
+            corr = np.where((self._count >= self.min_periods) & (denom > 0), cov / denom, np.nan)
+        np.fill_diagonal(corr, np.where(np.diag(self._count) >= self.min_periods, 1.0, np.nan))
+        return pd.DataFrame(np.clip(corr, -1.0, 1.0), index=self.tickers, columns=self.tickers)
+
+
+class CorrelationRegimeMonitor:
+    """
+    Baseline vs current correlation over disjoint, rolling windows.
+
+    One buffer holds the last ``long_window`` rows: the newest
+    ``short_window`` of them feed the current ``RunningCorrelation`` and the
+    earlier ones the baseline, so the two samples share no bars and the
+    Fisher-z comparison in ``report()`` treats them as independent. Each
+    ``add`` moves the row leaving the current window into the baseline and
+    evicts the oldest one, O(n^2) however long the baseline is.
+    """
+
+    def __init__(self, tickers, long_window=250, short_window=20):
+        self.tickers = pd.Index(tickers)
+        self.long_window = long_window
+        self.short_window = short_window
+        self.long = RunningCorrelation(self.tickers)
+        self.short = RunningCorrelation(self.tickers)
+        self._rows = deque()
+
+    @classmethod
+    def from_returns(cls, returns, long_window=250, short_window=20):
+        monitor = cls(returns.columns, long_window, short_window)
+        for row in returns.tail(long_window).to_numpy(dtype=np.float64, na_value=np.nan):
+            monitor.add(row)
+        return monitor
+
+    def add(self, row):
+        """Append one returns row to the current window."""
+        row = np.asarray(row, dtype=np.float64)
+        self._rows.append(row)
+        self.short.add(row)
+        if len(self._rows) > self.short_window:
+            moved = self._rows[-self.short_window - 1]
+            self.short.remove(moved)
+            self.long.add(moved)
+        if len(self._rows) > self.long_window:
+            oldest = self._rows.popleft()
+            if len(self._rows) >= self.short_window:
+                self.long.remove(oldest)
+
+    def replace_last(self, row):
+        """Swap the newest row (a still-forming bar) without moving the windows."""
+        if not self._rows:
+            return self.add(row)
+        row = np.asarray(row, dtype=np.float64)
+        old = self._rows.pop()
+        self._rows.append(row)
+        self.short.remove(old)
+        self.short.add(row)
+
+    def report(self, top=10, z_threshold=3.0):
+        """
+        How far the current correlation structure is from the baseline.
+
+        'distance' is the RMS change over all pairs and 'cmd' the correlation
+        matrix distance 1 - tr(AB) / (|A| |B|). Per-pair scores compare the
+        Fisher-z of both (disjoint) windows; 'pairs' lists the ``top`` pairs by |z|.
+        """
+        base = self.long.corr().to_numpy()
+        current = self.short.corr().to_numpy()
+        i, j = np.triu_indices(len(self.tickers), k=1)
+        b, c = base[i, j], current[i, j]
+        n_long, n_short = self.long._count[i, j], self.short._count[i, j]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            se = np.sqrt(1.0 / (n_short - 3) + 1.0 / (n_long - 3))
+            z = (np.arctanh(np.clip(c, -0.999999, 0.999999)) - np.arctanh(np.clip(b, -0.999999, 0.999999))) / se
+        z = np.where((n_short > 3) & (n_long > 3), z, np.nan)
+
+        diff = np.nan_to_num(c - b)
+        a, s = np.nan_to_num(base), np.nan_to_num(current)
+        norm = np.linalg.norm(a) * np.linalg.norm(s)
+        score = np.nan_to_num(np.abs(z), nan=-1.0)
+        k = min(top, len(score))
+        order = np.argpartition(-score, k - 1)[:k] if k else np.array([], dtype=np.intp)
+        order = order[np.argsort(-score[order], kind="stable")]
+        labels = np.asarray(self.tickers)
+        pairs = pd.DataFrame({
+            'Stock 1': labels[i[order]],
+            'Stock 2': labels[j[order]],
+            'Baseline Correlation': b[order].round(4),
+            'Current Correlation': c[order].round(4),
+            'Change': (c - b)[order].round(4),
+            'Z-Score': z[order].round(2),
+        })
+        return {
+            "distance": float(np.sqrt(np.mean(diff**2))) if len(diff) else np.nan,
+            "cmd": float(1.0 - np.sum(a * s) / norm) if norm > 0 else np.nan,
+            "breaking": int(np.sum(np.abs(np.nan_to_num(z)) > z_threshold)),
+            "long_bars": max(len(self._rows) - self.short_window, 0),
+            "short_bars": min(len(self._rows), self.short_window),
+            "pairs": pairs,
+        }
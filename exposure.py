@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+
+def _trailing_sums(values, window):
+    """Sums over the trailing ``window`` rows, from one cumulative sum."""
+    total = np.cumsum(values, axis=0)
+    total[window:] -= total[:-window].copy()
+    return total
+
+
+def rolling_exposure(returns, factor, window=60, min_periods=None):
+    """
+    Rolling OLS beta, correlation, alpha and residual of every ticker on a factor.
+
+    ``factor`` is a Series (one index for every ticker, e.g. XU100) or a
+    frame with the returns' columns (e.g. each ticker's sector index).
+    Moments come from trailing sums of x, y, x², y² and xy over the bars
+    where both sides are present, each one cumulative sum over the wide
+    frame, so the cost is O(T x N) whatever the window. Values are centred
+    on their full-sample means first to keep the sums well conditioned.
+
+    The residual on bar t is ``r_t - beta_{t-1} * f_t``: the beta from the
+    window ending the bar before, so nothing looks ahead.
+
+    Returns a dict of (time x ticker) DataFrames: beta, corr, alpha,
+    residual and n (bars in the window).
+    """
+    min_periods = min_periods or max(window // 2, 3)
+    y = returns.to_numpy(dtype=np.float64, na_value=np.nan)
+    if isinstance(factor, pd.Series):
+        x = factor.reindex(returns.index).to_numpy(dtype=np.float64, na_value=np.nan)[:, None]
+    else:
+        x = factor.reindex(index=returns.index, columns=returns.columns).to_numpy(dtype=np.float64, na_value=np.nan)
+    x = np.broadcast_to(x, y.shape)
+
+    both = ~np.isnan(x) & ~np.isnan(y)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mx = np.nanmean(np.where(both, x, np.nan), axis=0)
+        my = np.nanmean(np.where(both, y, np.nan), axis=0)
+    xc = np.where(both, x - mx, 0.0)
+    yc = np.where(both, y - my, 0.0)
+
+    n = _trailing_sums(both.astype(np.float64), window)
+    sx, sy = _trailing_sums(xc, window), _trailing_sums(yc, window)
+    sxx, syy, sxy = (_trailing_sums(a * b, window) for a, b in ((xc, xc), (yc, yc), (xc, yc)))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ok = n >= min_periods
+        cov = sxy / n - sx * sy / (n * n)
+        var_x = sxx / n - (sx / n) ** 2
+        var_y = syy / n - (sy / n) ** 2
+        beta = np.where(ok & (var_x > 0), cov / var_x, np.nan)
+        corr = np.where(ok & (var_x > 0) & (var_y > 0), cov / np.sqrt(var_x * var_y), np.nan)
+        alpha = (sy / n + my) - beta * (sx / n + mx)
+
+    beta_prev = np.vstack([np.full((1, y.shape[1]), np.nan), beta[:-1]])
+    residual = y - beta_prev * x
+
+    arrays = {"beta": beta, "corr": np.clip(corr, -1.0, 1.0), "alpha": alpha, "residual": residual, "n": n}
+    return {name: pd.DataFrame(a, index=returns.index, columns=returns.columns) for name, a in arrays.items()}
+
+
+def maruziyet_tablosu(returns, market, *, sector_returns=None, window=60, horizon=5):
+    """
+    Latest market (and sector) exposure per ticker.
+
+    Splits each ticker's return over the last ``horizon`` bars into the
+    part explained by the index (rolling beta x index return) and the
+    stock-specific residual, next to the current beta and correlation.
+    """
+    piyasa = rolling_exposure(returns, market, window)
+    artik = piyasa["residual"].iloc[-horizon:]
+    getiri = returns.iloc[-horizon:].where(artik.notna()).sum(min_count=1)
+    ozgun = artik.sum(min_count=1)
+
+    df = pd.DataFrame({
+        'Hisse': returns.columns,
+        'Beta': piyasa["beta"].iloc[-1].round(2).to_numpy(),
+        'Endeks Korelasyonu': piyasa["corr"].iloc[-1].round(2).to_numpy(),
+    })
+    if sector_returns is not None:
+        sektor = rolling_exposure(returns, sector_returns, window)
+        df['Sektör Betası'] = sektor["beta"].iloc[-1].round(2).to_numpy()
+        df['Sektör Korelasyonu'] = sektor["corr"].iloc[-1].round(2).to_numpy()
+    df[f'Getiri (Son {horizon} Bar %)'] = (100 * getiri).round(2).to_numpy()
+    df['Piyasa Katkısı %'] = (100 * (getiri - ozgun)).round(2).to_numpy()
+    df['Özgün Getiri %'] = (100 * ozgun).round(2).to_numpy()
+    df['Bar'] = piyasa["n"].iloc[-1].astype(int).to_numpy()
+    return df.sort_values('Özgün Getiri %', ascending=False, na_position="last").reset_index(drop=True)
@@ -0,0 +1,368 @@
+import argparse
+import json
+import os
+import threading
+import zlib
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-writer lock is not enforced
+    fcntl = None
+
+SCALE = 32767  # correlation -> int16 code, one step is ~3e-5
+MISSING = np.int16(-32768)
+TABLES = ("para_akisi_df", "sektor_ozet_df", "sektor_detay_df")
+
+
+def _n_pairs(n):
+    return n * (n - 1) // 2
+
+
+def _pair_index(i, j):
+    """Position of pair (i < j) in the column-major upper triangle."""
+    return j * (j - 1) // 2 + i
+
+
+def _triangle(corr, tickers):
+    """
+    int16 codes of the upper triangle over ``tickers``, column by column.
+
+    Column-major order (pairs of ticker j follow those of tickers < j) keeps
+    earlier snapshots a prefix of later ones when new tickers appear.
+    """
+    values = corr.reindex(index=tickers, columns=tickers).to_numpy(dtype=np.float64, na_value=np.nan)
+    j, i = np.tril_indices(len(tickers), k=-1)
+    rho = values[i, j]
+    codes = np.rint(np.clip(np.nan_to_num(rho), -1.0, 1.0) * SCALE).astype(np.int16)
+    codes[np.isnan(rho)] = MISSING
+    return codes
+
+
+def _pack(codes):
+    """zlib over the low bytes then the high bytes: small deltas leave the high plane nearly constant."""
+    return zlib.compress(codes.astype("<i2").view(np.uint8).reshape(-1, 2).T.tobytes(), 6)
+
+
+def _unpack(blob):
+    planes = np.frombuffer(zlib.decompress(blob), dtype=np.uint8).reshape(2, -1)
+    return np.ascontiguousarray(planes.T).view("<i2").ravel().astype(np.int16)
+
+
+def _dirname(key):
+    """Directory of a key; '_' inside a part is escaped so the parts stay unambiguous."""
+    return "_".join(quote(str(part), safe="").replace("_", "%5F") for part in key)
+
+
+def _grown(codes, size):
+    return codes if len(codes) >= size else np.concatenate([codes, np.zeros(size - len(codes), np.int16)])
+
+
+class SnapshotLog:
+    """
+    Append-only history of one result key's analysis runs.
+
+    A log is a directory holding:
+
+    - ``snapshots.jsonl``: one line per run (result key, time, run id,
+      ticker count, tickers first seen in it, keyframe flag, blob offsets,
+      metadata)
+    - ``snapshots.bin``: the compressed blobs, appended in the same order
+
+    The correlation matrix is kept as its upper triangle in int16 fixed
+    point. Every ``keyframe_every``-th snapshot stores the codes, the rest
+    store the (wrapping, hence lossless) difference to the previous run,
+    which for overlapping windows is mostly a few steps and compresses to
+    a fraction of a byte per pair. Signal and sector tables ride along as
+    compressed JSON. Blobs are written before their manifest line, so a
+    crash can only lose the last, unpublished run. A run is not appended
+    again when its run id or its last data bar equals the newest entry's
+    (a cached result stored twice, or a rerun on unchanged data).
+    """
+
+    def __init__(self, path, keyframe_every=30, key=None):
+        self.path = path
+        self.key = list(key) if key is not None else None
+        self.keyframe_every = keyframe_every
+        self.records = []
+        self.tickers = []
+        self._manifest_pos = 0
+        self._last = None  # (position, full codes) of the newest decoded snapshot
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self.refresh()
+
+    @property
+    def _manifest(self):
+        return os.path.join(self.path, "snapshots.jsonl")
+
+    @property
+    def _blobs(self):
+        return os.path.join(self.path, "snapshots.bin")
+
+    def refresh(self):
+        """Pick up runs appended by other processes."""
+        try:
+            with open(self._manifest, "rb") as f:
+                f.seek(self._manifest_pos)
+                data = f.read()
+        except FileNotFoundError:
+            return self
+        complete = data[: data.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            record = json.loads(line)
+            self.records.append(record)
+            self.tickers.extend(record["added"])
+        self._manifest_pos += len(complete)
+        return self
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def times(self):
+        return pd.DatetimeIndex([r["time"] for r in self.records])
+
+    @property
+    def nbytes(self):
+        return sum(os.path.getsize(p) for p in (self._manifest, self._blobs) if os.path.exists(p))
+
+    # -- writing -----------------------------------------------------------
+
+    def _writer_lock(self):
+        handle = open(os.path.join(self.path, "writer.lock"), "w")
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        return handle
+
+    def _unchanged(self, results):
+        if not self.records:
+            return False
+        newest = self.records[-1]
+        if results.get('run_id') is not None and results.get('run_id') == newest["run_id"]:
+            return True
+        last_bar = (results.get('analysis_metadata') or {}).get('last_bar')
+        return last_bar is not None and last_bar == newest["metadata"].get('last_bar')
+
+    def append(self, results, when=None):
+        """Record one analysis results dict; returns its position, or None when nothing was added."""
+        corr = results.get('correlation_matrix')
+        if corr is None or corr.empty:
+            return None
+        with self._lock, self._writer_lock():
+            self.refresh()
+            if self._unchanged(results):
+                return None
+            known = set(self.tickers)
+            added = [str(t) for t in corr.columns if t not in known]
+            codes = _triangle(corr, self.tickers + added)
+
+            position = len(self.records)
+            keyframe = position % self.keyframe_every == 0
+            if keyframe:
+                matrix_blob = _pack(codes)
+            else:
+                delta = codes.copy()
+                previous = self._codes_full(position - 1)
+                delta[: len(previous)] -= previous
+                matrix_blob = _pack(delta)
+            tables = {
+                name: results[name].to_dict('records')
+                for name in TABLES
+                if results.get(name) is not None and not results[name].empty
+            }
+            tables_blob = zlib.compress(json.dumps(tables, ensure_ascii=False, default=str).encode("utf-8"), 6)
+
+            with open(self._blobs, "ab") as f:
+                offset = f.tell()
+                f.write(matrix_blob + tables_blob)
+                f.flush()
+                os.fsync(f.fileno())
+            record = {
+                "key": self.key,
+                "time": (when or pd.Timestamp.now()).isoformat(),
+                "run_id": results.get('run_id'),
+                "n": len(self.tickers) + len(added),
+                "added": added,
+                "keyframe": keyframe,
+                "offset": offset,
+                "matrix_size": len(matrix_blob),
+                "tables_size": len(tables_blob),
+                "metadata": results.get('analysis_metadata') or {},
+            }
+            line = (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+            with open(self._manifest, "ab") as f:
+                f.write(line)
+            self.records.append(record)
+            self.tickers.extend(added)
+            self._manifest_pos += len(line)
+            self._last = (position, codes)
+            return position
+
+    # -- reading -----------------------------------------------------------
+
+    def _read(self, f, record, tables=False):
+        f.seek(record["offset"] + (record["matrix_size"] if tables else 0))
+        return f.read(record["tables_size"] if tables else record["matrix_size"])
+
+    def _is_keyframe(self, position):
+        # as recorded when written, so reopening with another keyframe_every still decodes
+        return self.records[position].get("keyframe", position % self.keyframe_every == 0)
+
+    def _keyframe(self, position):
+        """The keyframe a run's codes are replayed from."""
+        while not self._is_keyframe(position):
+            position -= 1
+        return position
+
+    def _codes_full(self, position):
+        """Every pair's codes at ``position``, replayed from its keyframe."""
+        if self._last is not None and self._last[0] == position:
+            return self._last[1]
+        start = self._keyframe(position)
+        with open(self._blobs, "rb") as f:
+            codes = np.zeros(0, np.int16)
+            for q in range(start, position + 1):
+                blob = _unpack(self._read(f, self.records[q]))
+                codes = blob if q == start else _grown(codes, len(blob)) + blob
+        if position == len(self.records) - 1:
+            self._last = (position, codes)
+        return codes
+
+    def _codes(self, positions, cols):
+        """(len(positions), len(cols)) codes, decoding only the requested pairs."""
+        out = np.full((len(positions), len(cols)), MISSING, dtype=np.int16)
+        if not len(positions):
+            return out
+        values = np.zeros(len(cols), np.int16)
+        wanted = {p: row for row, p in enumerate(positions)}
+        q = self._keyframe(positions[0])
+        with open(self._blobs, "rb") as f:
+            while q <= positions[-1]:
+                blob = _unpack(self._read(f, self.records[q]))
+                inside = cols < len(blob)
+                if self._is_keyframe(q):
+                    values[:] = 0
+                values[inside] += blob[cols[inside]]
+                row = wanted.get(q)
+                if row is not None:
+                    present = cols < _n_pairs(self.records[q]["n"])
+                    out[row] = np.where(present, values, MISSING)
+                    # Jump straight to the next wanted run's keyframe when it is ahead
+                    if row + 1 < len(positions):
+                        start = self._keyframe(positions[row + 1])
+                        if start > q:
+                            q = start
+                            continue
+                q += 1
+        return out
+
+    def _positions(self, last=None, start=None, end=None):
+        times = self.times
+        lo = 0 if start is None else int(times.searchsorted(pd.Timestamp(start)))
+        hi = len(times) if end is None else int(times.searchsorted(pd.Timestamp(end), side="right"))
+        positions = np.arange(lo, hi)
+        return positions[-last:] if last else positions
+
+    def matrix(self, position=-1):
+        """Correlation matrix of one run (default: the latest) over its tickers."""
+        position = range(len(self.records))[position]
+        n = self.records[position]["n"]
+        codes = self._codes_full(position)[: _n_pairs(n)]
+        values = np.full((n, n), np.nan)
+        j, i = np.tril_indices(n, k=-1)
+        rho = np.where(codes == MISSING, np.nan, codes / SCALE)
+        values[i, j] = rho
+        values[j, i] = rho
+        np.fill_diagonal(values, 1.0)
+        tickers = self.tickers[:n]
+        return pd.DataFrame(values, index=tickers, columns=tickers)
+
+    def pair_history(self, pairs, *, last=None, start=None, end=None):
+        """
+        Correlation of each (a, b) pair over the selected runs: a (time x "a / b") frame.
+
+        ``last`` keeps the most recent runs, ``start``/``end`` bound their times.
+        Only the runs from the first selected one's keyframe on are read.
+        """
+        codes = {t: k for k, t in enumerate(self.tickers)}
+        cols, names = [], []
+        for a, b in pairs:
+            i, j = sorted((codes.get(a, -1), codes.get(b, -1)))
+            cols.append(_pair_index(i, j) if i >= 0 and i != j else np.iinfo(np.int64).max)
+            names.append(f"{a} / {b}")
+        positions = self._positions(last, start, end)
+        values = self._codes(positions, np.asarray(cols, dtype=np.int64))
+        rho = np.where(values == MISSING, np.nan, values / SCALE)
+        return pd.DataFrame(rho, index=self.times[positions], columns=names)
+
+    def table(self, name, *, last=None, start=None, end=None):
+        """One stored table (e.g. 'para_akisi_df') across runs, with a 'Snapshot' time column."""
+        frames = []
+        with open(self._blobs, "rb") as f:
+            for p in self._positions(last, start, end):
+                record = self.records[p]
+                rows = json.loads(zlib.decompress(self._read(f, record, tables=True))).get(name)
+                if rows:
+                    frames.append(pd.DataFrame(rows).assign(Snapshot=pd.Timestamp(record["time"])))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+class SnapshotStore:
+    """One ``SnapshotLog`` per (universe, period, column label) key under ``directory``."""
+
+    def __init__(self, directory, keyframe_every=30):
+        self.directory = directory
+        self.keyframe_every = keyframe_every
+        self._logs = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def log(self, key):
+        with self._lock:
+            log = self._logs.get(key)
+            if log is None:
+                log = SnapshotLog(os.path.join(self.directory, _dirname(key)), self.keyframe_every, key)
+                self._logs[key] = log
+        return log.refresh()
+
+    def append(self, key, results, when=None):
+        return self.log(key).append(results, when)
+
+    def keys(self):
+        """Keys with at least one run, as recorded in each log's manifest."""
+        keys = set()
+        for name in os.listdir(self.directory):
+            try:
+                with open(os.path.join(self.directory, name, "snapshots.jsonl"), encoding="utf-8") as f:
+                    first = f.readline()
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            key = json.loads(first).get("key") if first.endswith("\n") else None
+            if key:
+                keys.add(tuple(key))
+        return sorted(keys)
+
+
+def main(argv=None):
+    """Print the correlation history of a pair (or a summary of the log)."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("directory", help="history directory written by the app (BIST_HISTORY_DIR)")
+    parser.add_argument("key", nargs=3, metavar=("UNIVERSE", "PERIOD", "COLUMN"))
+    parser.add_argument("--pair", nargs=2, metavar=("A", "B"))
+    parser.add_argument("--last", type=int, default=60)
+    args = parser.parse_args(argv)
+
+    log = SnapshotStore(args.directory).log(tuple(args.key))
+    if args.pair:
+        print(log.pair_history([tuple(args.pair)], last=args.last).to_string())
+    else:
+        first, newest = (log.times[0], log.times[-1]) if len(log) else ("-", "-")
+        print(f"{len(log)} snapshots, {len(log.tickers)} tickers, {log.nbytes / 1024:.1f} KB, {first} .. {newest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+
+from quality import ISTANBUL, SEANS
+
+# A forming bar is never scored on less than this share of its slot (noise at the bar open)
+MIN_FRACTION = 0.1
+
+
+def time_slots(index, slot_minutes=60):
+    """Time-of-day slot number of every timestamp (Istanbul local time)."""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert(ISTANBUL)
+    return np.asarray((index.hour * 60 + index.minute) // slot_minutes, dtype=np.intp)
+
+
+def elapsed_fraction(ts, interval, now=None):
+    """
+    Share of the bar starting at ``ts`` that has traded by ``now``.
+
+    The bar ends after ``interval`` or at the session close, whichever is
+    first; 1.0 once it has ended, never below ``MIN_FRACTION``. Naive
+    timestamps are Istanbul local time.
+    """
+    ts = pd.Timestamp(ts)
+    now = pd.Timestamp.now(tz=ISTANBUL) if now is None else pd.Timestamp(now)
+    if ts.tz is None:
+        if now.tz is not None:
+            now = now.tz_convert(ISTANBUL).tz_localize(None)
+    elif now.tz is None:
+        now = now.tz_localize(ISTANBUL)
+    local = ts.tz_convert(ISTANBUL) if ts.tz is not None else ts
+    close = local.normalize() + pd.Timedelta(f"{SEANS[1]}:00")
+    end = min(local + pd.Timedelta(interval), max(close, local))
+    span = (end - local).total_seconds()
+    if span <= 0:
+        return 1.0
+    return float(np.clip((now - ts).total_seconds() / span, MIN_FRACTION, 1.0))
+
+
+class IntradayVolumeProfile:
+    """
+    Per-ticker, per-time-of-day volume baselines, updated bar by bar.
+
+    Keeps running count, sum and sum of squares of volume for every (slot,
+    ticker) cell, so the opening and closing hours are compared with their
+    own history instead of a plain N-bar mean. Adding or removing a bar
+    touches one slot row: O(n_tickers). Missing volumes are skipped per
+    ticker.
+    """
+
+    def __init__(self, tickers, slot_minutes=60, min_obs=3):
+        self.tickers = pd.Index(tickers)
+        self.slot_minutes = slot_minutes
+        self.min_obs = min_obs
+        shape = (24 * 60 // slot_minutes, len(self.tickers))
+        self._count = np.zeros(shape)
+        self._sum = np.zeros(shape)
+        self._sumsq = np.zeros(shape)
+
+    @classmethod
+    def from_frame(cls, volume, slot_minutes=60, min_obs=3):
+        """Baselines from a wide intraday volume history in one scatter-add."""
+        profile = cls(volume.columns, slot_minutes, min_obs)
+        values = volume.to_numpy(dtype=np.float64, na_value=np.nan)
+        present = ~np.isnan(values)
+        filled = np.where(present, values, 0.0)
+        slots = time_slots(volume.index, slot_minutes)
+        np.add.at(profile._count, slots, present)
+        np.add.at(profile._sum, slots, filled)
+        np.add.at(profile._sumsq, slots, filled * filled)
+        return profile
+
+    def _update(self, ts, row, sign):
+        values = np.asarray(row, dtype=np.float64)
+        present = ~np.isnan(values)
+        filled = np.where(present, values, 0.0)
+        slot = time_slots([ts], self.slot_minutes)[0]
+        self._count[slot] += sign * present
+        self._sum[slot] += sign * filled
+        self._sumsq[slot] += sign * filled * filled
+
+    def add(self, ts, row):
+        self._update(ts, row, 1.0)
+
+    def remove(self, ts, row):
+        self._update(ts, row, -1.0)
+
+    def baseline(self, ts):
+        """(mean, std) volume of ``ts``'s slot per ticker; NaN below ``min_obs`` bars."""
+        slot = time_slots([ts], self.slot_minutes)[0]
+        n = self._count[slot]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(n >= self.min_obs, self._sum[slot] / n, np.nan)
+            var = np.where(n >= self.min_obs, self._sumsq[slot] / n - mean * mean, np.nan)
+        return mean, np.sqrt(np.maximum(var, 0.0))
+
+    def score(self, ts, row, fraction=1.0):
+        """
+        Volume strength (x) and z-score of a bar against its slot baseline.
+
+        ``fraction`` < 1 scores a still-forming bar against the same share of
+        the baseline instead of a full bar.
+        """
+        values = np.asarray(row, dtype=np.float64)
+        mean, std = self.baseline(ts)
+        mean, std = mean * fraction, std * fraction
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ratio = values / np.where(mean > 0, mean, np.nan)
+            z = (values - mean) / np.where(std > 0, std, np.nan)
+        return ratio, z
+
+    def surge_table(self, ts, row, threshold=2.0, fraction=1.0):
+        """Hacim surge table for one bar (``fraction`` of it elapsed), strongest first."""
+        values = np.asarray(row, dtype=np.float64)
+        mean, _ = self.baseline(ts)
+        ratio, z = self.score(ts, values, fraction)
+        df = pd.DataFrame({
+            'Hisse': self.tickers,
+            'Saat': pd.Timestamp(ts).strftime('%H:%M'),
+            'Tamamlanan %': round(fraction * 100),
+            'Hacim': values,
+            'Saat Ortalaması': np.round(mean, 0),
+            'Saatlik Hacim Gücü (x)': np.round(ratio, 2),
+            'Z-Skor': np.round(z, 2),
+            'Ani Hacim': ratio > threshold,
+        })
+        return df.sort_values('Saatlik Hacim Gücü (x)', ascending=False, na_position="last").reset_index(drop=True)
@@ -0,0 +1,252 @@
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from correlation import CorrelationRegimeMonitor, EwmaCorrelation, RunningCorrelation
+from intraday import IntradayVolumeProfile, elapsed_fraction
+from market_data import download_columns
+from quality import ISTANBUL, is_intraday
+from signals import hacim_tablosu, para_akisi_sinyalleri
+
+# History that fills the default 250-bar regime buffer on each interval
+REGIME_HISTORY = {"1d": "1y", "1h": "3mo"}
+
+
+class LiveMonitor:
+    """
+    Background poller that keeps a universe's Close/Volume panels current.
+
+    History is downloaded once when the poller starts. After that every tick
+    fetches only the current session (the last five after a pause) and
+    applies every bar from the last one applied on: the still-forming bar is
+    replaced and newer ones are appended. It then refreshes the signal tables and updates the
+    correlation through ``RunningCorrelation`` (and an ``EwmaCorrelation``
+    with a ``halflife`` in bars) instead of re-scanning history.
+    On intraday intervals completed bars also feed an
+    ``IntradayVolumeProfile``, so the latest bar's volume is scored against
+    the same hour of previous sessions (pro-rated while the bar is still
+    forming), and every new return also updates a long/short
+    ``CorrelationRegimeMonitor``.
+    Polling pauses while nobody has read a snapshot for ``idle_timeout_s``.
+    """
+
+    def __init__(
+        self,
+        tickers,
+        *,
+        interval="1d",
+        history_period="1mo",
+        cadence_s=60,
+        window=None,
+        idle_timeout_s=600,
+        return_window=5,
+        volume_window=20,
+        threshold=1.2,
+        regime_windows=(250, 20),
+        regime_period=None,
+        halflife=20,
+    ):
+        self.tickers = list(tickers)
+        self.interval = interval
+        self.history_period = history_period
+        self.cadence_s = cadence_s
+        self.window = window
+        self.idle_timeout_s = idle_timeout_s
+        self.signal_kwargs = {"return_window": return_window, "volume_window": volume_window}
+        self.threshold = threshold
+        self.regime_windows = regime_windows
+        self.regime_period = regime_period or REGIME_HISTORY.get(interval, history_period)
+        self.halflife = halflife
+
+        self.close = pd.DataFrame()
+        self.volume = pd.DataFrame()
+        self.returns = pd.DataFrame()
+        self.last_error = None
+        self.version = 0
+
+        self._corr = None
+        self._ewm = None
+        self._profile = None
+        self._regime = None
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_read = time.monotonic()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="live-monitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def intraday(self):
+        return is_intraday(self.interval)
+
+    def snapshot(self):
+        """Latest published state (dict) or None until the first load finishes."""
+        self._last_read = time.monotonic()
+        return self._snapshot
+
+    def _download(self, period):
+        return download_columns(
+            self.tickers,
+            period=period,
+            interval=self.interval,
+            columns=("Close", "Volume"),
+            tries=2,
+        )
+
+    def _run(self):
+        try:
+            self.seed()
+        except Exception as e:
+            self.last_error = str(e)
+        while not self._stop.wait(self.cadence_s):
+            if time.monotonic() - self._last_read > self.idle_timeout_s:
+                continue
+            try:
+                if self._corr is None:
+                    self.seed()
+                else:
+                    self.poll()
+            except Exception as e:
+                self.last_error = str(e)
+
+    def seed(self):
+        """
+        Download the history window once and build the initial state.
+
+        The regime monitor is seeded from ``regime_period`` (longer than the
+        signal window on the default intervals), so its baseline is not just
+        the few bars left over after the current window.
+        """
+        data = self._download(self.history_period)
+        close, volume = data["Close"], data["Volume"]
+        if close.empty:
+            return
+        regime_close = close
+        if self.regime_period != self.history_period:
+            regime_close = self._download(self.regime_period)["Close"]
+            if regime_close.empty:
+                regime_close = close
+        with self._lock:
+            self.close = close.sort_index()
+            self.volume = volume.reindex(index=self.close.index, columns=self.close.columns)
+            if self.window is None:
+                self.window = len(self.close)
+            self.returns = self.close.pct_change(fill_method=None).iloc[1:]
+            self._corr = RunningCorrelation.from_returns(self.returns)
+            self._ewm = EwmaCorrelation.from_returns(self.returns, self.halflife)
+            regime_returns = (
+                regime_close.sort_index().reindex(columns=self.close.columns).pct_change(fill_method=None).iloc[1:]
+            )
+            self._regime = CorrelationRegimeMonitor.from_returns(regime_returns, *self.regime_windows)
+            if self.intraday:
+                # the last bar may still be forming; it joins the baseline once complete
+                self._profile = IntradayVolumeProfile.from_frame(self.volume.iloc[:-1])
+            self._publish()
+
+    def _poll_period(self):
+        """Shortest download that still reaches back to the last applied bar."""
+        last = pd.Timestamp(self.close.index[-1])
+        if last.tz is not None:
+            last = last.tz_convert(ISTANBUL)
+        return "1d" if last.date() == datetime.now(ISTANBUL).date() else "5d"
+
+    def poll(self):
+        """Fetch the recent bars for the universe and fold the new ones into the state."""
+        data = self._download(self._poll_period())
+        close, volume = data["Close"].sort_index(), data["Volume"]
+        if close.empty:
+            return False
+        if close.index[0] > self.close.index[-1]:
+            # paused for longer than the download reaches back: rebuild from history
+            self.seed()
+            return True
+        with self._lock:
+            applied = False
+            for ts in close.index[close.index >= self.close.index[-1]]:
+                volume_bar = volume.loc[ts] if ts in volume.index else None
+                applied = self._apply_bar(ts, close.loc[ts], volume_bar) or applied
+            if applied:
+                self._publish()
+        return applied
+
+    def _apply_bar(self, ts, close_bar, volume_bar):
+        columns = self.close.columns
+        close_bar = close_bar.reindex(columns)
+        volume_bar = volume_bar.reindex(columns) if volume_bar is not None else pd.Series(np.nan, index=columns)
+        last_ts = self.close.index[-1]
+        if ts < last_ts:
+            return False
+        replaced = False
+
+        if ts == last_ts:
+            # Still-forming bar: swap its contribution instead of appending
+            close_bar = close_bar.fillna(self.close.iloc[-1])
+            volume_bar = volume_bar.fillna(self.volume.iloc[-1])
+            self.close.iloc[-1] = close_bar.values
+            self.volume.iloc[-1] = volume_bar.values
+            if len(self.returns):
+                self._corr.remove(self.returns.iloc[-1].to_numpy(dtype=np.float64, na_value=np.nan))
+                self.returns = self.returns.iloc[:-1]
+                replaced = True
+        else:
+            if self._profile is not None:
+                self._profile.add(last_ts, self.volume.iloc[-1].to_numpy(dtype=np.float64, na_value=np.nan))
+            self.close = pd.concat([self.close, close_bar.to_frame(ts).T])
+            self.volume = pd.concat([self.volume, volume_bar.to_frame(ts).T])
+            if len(self.close) > self.window:
+                if self._profile is not None:
+                    self._profile.remove(
+                        self.volume.index[0], self.volume.iloc[0].to_numpy(dtype=np.float64, na_value=np.nan)
+                    )
+                self.close = self.close.iloc[1:]
+                self.volume = self.volume.iloc[1:]
+                if len(self.returns):
+                    self._corr.remove(self.returns.iloc[0].to_numpy(dtype=np.float64, na_value=np.nan))
+                    self.returns = self.returns.iloc[1:]
+
+        if len(self.close) > 1:
+            new_return = self.close.iloc[-1] / self.close.iloc[-2] - 1
+            values = new_return.to_numpy(dtype=np.float64, na_value=np.nan)
+            self._corr.add(values)
+            if replaced:
+                self._regime.replace_last(values)
+                self._ewm.replace_last(values)
+            else:
+                self._regime.add(values)
+                self._ewm.add(values)
+            self.returns = pd.concat([self.returns, new_return.to_frame(ts).T])
+        return True
+
+    def _publish(self):
+        self.version += 1
+        self._snapshot = {
+            "version": self.version,
+            "updated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "last_bar": self.close.index[-1],
+            "signals": para_akisi_sinyalleri(
+                self.close, self.volume, threshold=self.threshold, **self.signal_kwargs
+            ),
+            "hacim": hacim_tablosu(self.close, self.volume, **self.signal_kwargs),
+            "correlation": self._corr.corr(),
+            "correlation_ewm": self._ewm.corr(),
+            "regime": self._regime.report(),
+        }
+        if self._profile is not None:
+            ts = self.volume.index[-1]
+            self._snapshot["hacim_saatlik"] = self._profile.surge_table(
+                ts,
+                self.volume.iloc[-1].to_numpy(dtype=np.float64, na_value=np.nan),
+                fraction=elapsed_fraction(ts, self.interval),
+            )
@@ -0,0 +1,373 @@
+import argparse
+import contextlib
+import os
+import random
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from panel_store import period_offset
+from quality import ISTANBUL, is_intraday, trading_calendar
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+STUB_END = pd.Timestamp("2026-09-30 18:00", tz=ISTANBUL)
+
+# Page -> key of the button that runs its analysis
+SCENARIOS = {
+    "Bist30-Full": "run_full_analysis",
+    "Kontrat-Tum": "run_full_analysis_kontrat",
+}
+
+
+class StubMarket:
+    """
+    Offline stand-in for the two yfinance entry points the app uses.
+
+    ``download()`` and ``Ticker().history()`` return deterministic synthetic
+    OHLCV on the Borsa Istanbul calendar (each ticker's path is seeded by its
+    symbol, so batching does not change the data) after sleeping
+    ``latency_s`` plus up to ``jitter_s`` per call, like a network round trip
+    that releases the GIL.
+    """
+
+    def __init__(self, latency_s=0.2, jitter_s=0.05):
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _wait(self):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency_s + random.uniform(0, self.jitter_s))
+
+    def _grid(self, period, interval):
+        start = STUB_END - period_offset(period if period != "max" else "10y")
+        if is_intraday(interval):
+            return trading_calendar(pd.DatetimeIndex([start, STUB_END]), interval)
+        return trading_calendar(pd.DatetimeIndex([start, STUB_END]).tz_localize(None), "1d")
+
+    def ohlcv(self, ticker, period="1mo", interval="1d"):
+        """Synthetic OHLCV frame for one ticker."""
+        index = self._grid(period, interval)
+        rng = np.random.default_rng(zlib.crc32(f"{ticker}|{interval}".encode()))
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.012, len(index))))
+        spread = np.abs(rng.normal(0, 0.006, len(index)))
+        return pd.DataFrame({
+            "Open": close * (1 + rng.normal(0, 0.003, len(index))),
+            "High": close * (1 + spread),
+            "Low": close * (1 - spread),
+            "Close": close,
+            "Volume": rng.lognormal(13, 0.5, len(index)).round(),
+        }, index=index)
+
+    def download(self, tickers, period="1mo", interval="1d", **kwargs):
+        self._wait()
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        frames = {t: self.ohlcv(t, period, interval) for t in tickers}
+        return pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+
+    def history(self, ticker, period="1mo", interval="1d", **kwargs):
+        self._wait()
+        df = self.ohlcv(ticker, period, interval)
+        df.index = df.index.tz_localize(ISTANBUL) if df.index.tz is None else df.index
+        return df
+
+    @contextlib.contextmanager
+    def installed(self):
+        """Route ``yf.download`` and ``yf.Ticker`` to this stub for the duration."""
+        market = self
+
+        class Ticker:
+            def __init__(self, ticker, *args, **kwargs):
+                self.ticker = ticker
+
+            def history(self, *args, **kwargs):
+                return market.history(self.ticker, *args, **kwargs)
+
+        saved = yf.download, yf.Ticker
+        yf.download, yf.Ticker = self.download, Ticker
+        try:
+            yield self
+        finally:
+            yf.download, yf.Ticker = saved
+
+
+def _rss_bytes():
+    """Resident set size of this process (Linux /proc; 0 elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class _ResourceSampler:
+    """Peak RSS and process CPU time between ``start()`` and ``stop()``."""
+
+    def __init__(self, interval_s=0.1):
+        self.interval_s = interval_s
+        self._stop = threading.Event()
+
+    def start(self):
+        self.rss_start = self.rss_peak = _rss_bytes()
+        self._cpu0, self._wall0 = time.process_time(), time.perf_counter()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="loadtest-rss", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self.rss_peak = max(self.rss_peak, _rss_bytes())
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.rss_peak = max(self.rss_peak, _rss_bytes())
+        self.wall_s = time.perf_counter() - self._wall0
+        self.cpu_s = time.process_time() - self._cpu0
+        return self
+
+
+@contextlib.contextmanager
+def shared_runtime():
+    """
+    One runtime and one script cache for every AppTest in this process.
+
+    Each AppTest run installs its own mock Runtime singleton, clears it on
+    exit and recompiles the script, which races as soon as two sessions run
+    at once. A real server has exactly one of each, so the simulated
+    sessions share them too.
+    """
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.dataframe_source_manager import DataframeSourceManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    runtime = mock.MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.dataframe_source_mgr = DataframeSourceManager()
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    script_cache = ScriptCache()
+    with mock.patch.object(Runtime, "instance", classmethod(lambda cls: runtime)), \
+            mock.patch.object(Runtime, "exists", classmethod(lambda cls: True)), \
+            mock.patch.object(app_test, "ScriptCache", lambda: script_cache), \
+            mock.patch.object(local_script_runner, "ScriptCache", lambda: script_cache):
+        yield runtime
+
+
+def run_session(page="Bist30-Full", button=None, *, timeout=300, cold=False):
+    """
+    One simulated analyst: open the app, go to ``page``, press its run button.
+
+    ``cold=True`` clears the data caches just before this session's run.
+    Returns (step timings in seconds, error messages, AppTest). Keeping the
+    AppTest alive holds the session state, like a connected browser tab.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    button = button or SCENARIOS[page]
+    timings, errors = {}, []
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    steps = (
+        ("load", lambda: at.run()),
+        ("navigate", lambda: at.sidebar.radio[0].set_value(page).run()),
+        ("run", lambda: at.button(key=button).click().run()),
+    )
+    for name, step in steps:
+        if name == "run" and cold:
+            _clear_caches()
+        t0 = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            errors.append(f"{name}: {e}")
+            break
+        timings[name] = time.perf_counter() - t0
+        errors.extend(f"{name}: {e.value}" for e in at.exception)
+        if errors:
+            break
+    timings["total"] = sum(timings.values())
+    return timings, errors, at
+
+
+def run_level(sessions, rounds=1, **session_kwargs):
+    """
+    ``sessions`` concurrent analysts, each running the scenario ``rounds`` times.
+
+    Returns (per-session timing frame, resource sampler).
+    """
+    rows, kept = [], []
+
+    def analyst(n):
+        for r in range(rounds):
+            timings, errors, at = run_session(**session_kwargs)
+            kept.append(at)
+            rows.append({"session": n, "round": r, **timings, "errors": "; ".join(errors)})
+
+    sampler = _ResourceSampler().start()
+    with ThreadPoolExecutor(max_workers=sessions, thread_name_prefix="analyst") as pool:
+        list(pool.map(analyst, range(sessions)))
+    sampler.stop()
+    kept.clear()
+    return pd.DataFrame(rows), sampler
+
+
+@contextlib.contextmanager
+def isolated_state():
+    """
+    Point every on-disk state the app keeps at a throwaway directory.
+
+    The pacer's learned AIMD settings, persisted results and run history
+    would otherwise record stub latencies and synthetic runs in the real
+    locations. Process-wide singletons built from those settings are reset
+    on entry and exit.
+    """
+    import analysis
+    import market_data
+
+    with tempfile.TemporaryDirectory(prefix="bist-loadtest-") as root:
+        env = {
+            "BIST_PACER_STATE": os.path.join(root, "pacer.json"),
+            "BIST_RESULT_DIR": os.path.join(root, "results"),
+            "BIST_HISTORY_DIR": os.path.join(root, "history"),
+        }
+        with mock.patch.dict(os.environ, env), mock.patch.object(market_data, "_pacer", None):
+            analysis.sonuc_deposu.clear()
+            analysis.gecmis_deposu.clear()
+            try:
+                yield root
+            finally:
+                analysis.sonuc_deposu.clear()
+                analysis.gecmis_deposu.clear()
+
+
+def _clear_caches():
+    import streamlit as st
+
+    st.cache_data.clear()
+
+
+@contextlib.contextmanager
+def no_result_reuse():
+    """
+    Make every measured run compute the pipeline instead of reading the result store.
+
+    Results are still stored, as in production, but ``ResultStore.get``
+    misses, so a priming run or a faster concurrent session cannot turn
+    the others into cache hits.
+    """
+    from results import ResultStore
+
+    with mock.patch.object(ResultStore, "get", lambda self, key, max_age=None: None):
+        yield
+
+
+def summarize(levels):
+    """
+    Capacity table from ``{sessions: (timings, sampler)}`` plus the knee.
+
+    The knee is the concurrency with the highest power (throughput divided by
+    mean session latency): past it, extra sessions mostly add queueing delay.
+    """
+    rows = []
+    for sessions, (timings, sampler) in sorted(levels.items()):
+        ok = timings[timings["errors"] == ""]
+        total = ok["total"] if len(ok) else pd.Series([np.nan])
+        throughput = 60 * len(ok) / sampler.wall_s if sampler.wall_s else np.nan
+        rows.append({
+            "Sessions": sessions,
+            "Completed": len(ok),
+            "Failed": len(timings) - len(ok),
+            "Throughput (/min)": round(throughput, 2),
+            "p50 (s)": round(total.quantile(0.50), 3),
+            "p90 (s)": round(total.quantile(0.90), 3),
+            "p99 (s)": round(total.quantile(0.99), 3),
+            "Max (s)": round(total.max(), 3),
+            "Run p90 (s)": round(ok["run"].quantile(0.90), 3) if "run" in ok and len(ok) else np.nan,
+            "CPU %": round(100 * sampler.cpu_s / sampler.wall_s, 1),
+            "RSS Peak (MB)": round(sampler.rss_peak / 2**20, 1),
+            "RSS Growth (MB)": round((sampler.rss_peak - sampler.rss_start) / 2**20, 1),
+            "_power": throughput / total.mean() if total.notna().any() else np.nan,
+        })
+    table = pd.DataFrame(rows)
+    knee = int(table.loc[table["_power"].idxmax(), "Sessions"]) if table["_power"].notna().any() else None
+    return table.drop(columns="_power"), knee
+
+
+def load_test(levels=(1, 2, 4, 8), *, rounds=1, latency_s=0.2, jitter_s=0.05, cold=False,
+              page="Bist30-Full", button=None, timeout=300, log=print):
+    """
+    Drive increasing numbers of concurrent sessions through ``page``.
+
+    All sessions share this process, as they share one Streamlit server:
+    cache hits, locks and the GIL are contended exactly as in production,
+    and CPU/RSS are the server's. Every timed run executes the full
+    pipeline (``no_result_reuse``). Warm runs prime the data caches with
+    one untimed session first; ``cold=True`` clears them before every
+    session's run instead. Pacer state, results and history go to a
+    temporary directory for the whole run (``isolated_state``). Returns
+    (capacity table, knee, raw timings).
+    """
+    market = StubMarket(latency_s, jitter_s)
+    results, raw = {}, []
+    with isolated_state(), market.installed(), shared_runtime():
+        if not cold:
+            run_session(page, button, timeout=timeout)
+        for sessions in levels:
+            calls = market.calls
+            with no_result_reuse():
+                timings, sampler = run_level(
+                    sessions, rounds, page=page, button=button, timeout=timeout, cold=cold,
+                )
+            results[sessions] = (timings, sampler)
+            raw.append(timings.assign(level=sessions))
+            if log:
+                log(f"{sessions:>4} sessions: {len(timings)} runs in {sampler.wall_s:.1f}s, "
+                    f"{market.calls - calls} data calls, p50 {timings['total'].median():.2f}s")
+    table, knee = summarize(results)
+    return table, knee, pd.concat(raw, ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Concurrent-session load test of app.py against an offline stub data source."
+    )
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="concurrency levels to run, in order")
+    parser.add_argument("--rounds", type=int, default=1, help="scenario runs per session at each level")
+    parser.add_argument("--latency", type=float, default=0.2, help="stub seconds per data call")
+    parser.add_argument("--jitter", type=float, default=0.05, help="extra random seconds per data call")
+    parser.add_argument("--cold", action="store_true", help="clear data caches before every session's run")
+    parser.add_argument("--page", default="Bist30-Full", choices=sorted(SCENARIOS))
+    parser.add_argument("--timeout", type=float, default=300, help="per-script-run timeout in seconds")
+    parser.add_argument("--csv", help="also write per-session timings to this CSV file")
+    args = parser.parse_args(argv)
+
+    table, knee, raw = load_test(
+        args.sessions, rounds=args.rounds, latency_s=args.latency, jitter_s=args.jitter,
+        cold=args.cold, page=args.page, timeout=args.timeout,
+    )
+    print()
+    print(table.to_string(index=False))
+    print(f"\nKnee (max throughput/latency): {knee} concurrent sessions")
+    if args.csv:
+        raw.to_csv(args.csv, index=False)
+    failed = raw[raw["errors"] != ""]
+    if not failed.empty:
+        print(f"\n{len(failed)} failed runs, first: {failed['errors'].iloc[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+try:
+    from curl_cffi import CurlOpt
+    from curl_cffi import requests as http
+except ImportError:  # yfinance falls back to plain requests as well
+    CurlOpt = None
+    import requests as http
+
+# Kept-alive provider connections per process
+HTTP_POOL_SIZE = int(os.environ.get("BIST_HTTP_POOL", "4"))
+
+
+class AdaptivePacer:
+    """
+    AIMD controller for download batch size and the pause between requests.
+
+    Every healthy batch grows the batch by ``increase`` tickers and shortens
+    the pause by ``pause_step`` seconds. A failure, an empty (or mostly
+    empty) response, or per-ticker latency above ``slow_factor`` times its
+    running baseline halves the batch and doubles the pause. Rising latency
+    is usually the first sign of throttling, so the controller backs off
+    before requests start failing. With ``path`` set the learned state is
+    kept in a small JSON file and reloaded by the next process.
+    """
+
+    def __init__(self, path=None, *, batch_size=20, pause_s=1.0, min_batch=5, max_batch=100,
+                 min_pause=0.2, max_pause=30.0, increase=2, pause_step=0.1, decrease=0.5,
+                 slow_factor=2.0, alpha=0.2, max_age_s=6 * 3600):
+        self.path = path
+        self.batch_size = batch_size
+        self.pause_s = pause_s
+        self.min_batch, self.max_batch = min_batch, max_batch
+        self.min_pause, self.max_pause = min_pause, max_pause
+        self.increase = increase
+        self.pause_step = pause_step
+        self.decrease = decrease
+        self.slow_factor = slow_factor
+        self.alpha = alpha
+        self.max_age_s = max_age_s
+        self.baseline_s = None  # smoothed seconds per ticker on healthy batches
+        self.backoffs = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Restore learned settings; the latency baseline is dropped once stale."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+            self.batch_size = int(np.clip(state["batch_size"], self.min_batch, self.max_batch))
+            self.pause_s = float(np.clip(state["pause_s"], self.min_pause, self.max_pause))
+            if time.time() - state.get("updated", 0) <= self.max_age_s:
+                self.baseline_s = state.get("baseline_s")
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            state = {
+                "batch_size": self.batch_size,
+                "pause_s": round(self.pause_s, 3),
+                "baseline_s": self.baseline_s,
+                "updated": time.time(),
+            }
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    def _back_off(self):
+        self.batch_size = max(self.min_batch, int(self.batch_size * self.decrease))
+        self.pause_s = min(self.max_pause, max(self.pause_s, self.min_pause) / self.decrease)
+        self.backoffs += 1
+
+    def record(self, n_tickers, elapsed_s, ok):
+        """Feed one request's outcome: tickers asked for, wall time, usable response."""
+        with self._lock:
+            if not ok:
+                self._back_off()
+                return
+            per_ticker = elapsed_s / max(n_tickers, 1)
+            if self.baseline_s is not None and per_ticker > self.slow_factor * self.baseline_s:
+                self._back_off()
+                # let the baseline follow a lasting shift instead of backing off forever
+                self.baseline_s += self.alpha * (per_ticker - self.baseline_s) / self.slow_factor
+                return
+            self.baseline_s = per_ticker if self.baseline_s is None else (
+                (1 - self.alpha) * self.baseline_s + self.alpha * per_ticker
+            )
+            self.batch_size = min(self.max_batch, self.batch_size + self.increase)
+            self.pause_s = max(self.min_pause, self.pause_s - self.pause_step)
+
+    def settings(self):
+        """Current (batch_size, pause_s)."""
+        with self._lock:
+            return self.batch_size, self.pause_s
+
+
+_pacer = None
+_pacer_lock = threading.Lock()
+
+
+def default_pacer():
+    """
+    Process-wide pacer shared by every download (throttling is per client).
+
+    Its state is kept in BIST_PACER_STATE (default ``~/.cache/bist/pacer.json``;
+    set it to an empty string to disable persistence).
+    """
+    global _pacer
+    with _pacer_lock:
+        if _pacer is None:
+            path = os.environ.get("BIST_PACER_STATE", os.path.join("~", ".cache", "bist", "pacer.json"))
+            _pacer = AdaptivePacer(os.path.expanduser(path) if path else None)
+        return _pacer
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def http_session():
+    """
+    The keep-alive HTTP session every yfinance call in this process uses.
+
+    yfinance holds its session in the process-wide ``YfData`` singleton.
+    ``yf.download`` without a session builds a fresh one and installs it
+    there, dropping the open connections, TLS state and the cookie jar the
+    cached crumb belongs to; ``yf.Ticker`` without one reuses whatever is
+    installed. Passing this session to every call keeps one set alive.
+    With curl_cffi (yfinance's default backend) each thread gets its own
+    pooled connection over a shared cookie jar; with plain requests the
+    adapter pool holds ``HTTP_POOL_SIZE`` connections.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            if CurlOpt is not None:
+                _session = http.Session(
+                    impersonate="chrome",
+                    curl_options={CurlOpt.TCP_KEEPALIVE: 1, CurlOpt.MAXCONNECTS: HTTP_POOL_SIZE},
+                )
+            else:
+                _session = http.Session()
+                adapter = http.adapters.HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+                _session.mount("https://", adapter)
+        return _session
+
+
+def yf_download(tickers, **kwargs):
+    """``yf.download`` over the shared session."""
+    return yf.download(tickers, session=http_session(), **kwargs)
+
+
+def yf_history(ticker, **kwargs):
+    """``yf.Ticker(ticker).history`` over the shared session."""
+    return yf.Ticker(ticker, session=http_session()).history(**kwargs)
+
+
+def _usable(frame, batch):
+    """A response counts only if at least half of the batch came back with data."""
+    if not isinstance(frame, pd.DataFrame) or frame.empty:
+        return False
+    try:
+        close = frame["Close"]
+    except KeyError:
+        return True
+    if isinstance(close, pd.Series):
+        return close.notna().any()
+    return close.notna().any().sum() * 2 >= len(batch)
+
+
+def download_columns(
+    tickers,
+    *,
+    period,
+    interval,
+    columns=("Close", "Volume"),
+    auto_adjust=True,
+    batch_size=None,
+    pause_s=None,
+    tries=3,
+    timeout=20,
+    pacer=None,
+):
+    """
+    Download several OHLCV columns for many tickers in one pass.
+
+    Batch size and the pause between requests come from ``pacer`` (the
+    shared ``default_pacer()`` unless given) and adapt to how the provider
+    responds; passing ``batch_size`` and ``pause_s`` pins them instead.
+
+    Returns a dict mapping each column name to a DataFrame indexed by
+    datetime with tickers as columns (empty DataFrame if nothing came back).
+    """
+    tickers_list = list(tickers) if isinstance(tickers, (list, tuple, set)) else [tickers]
+    frames = {column: [] for column in columns}
+    if batch_size is None or pause_s is None:
+        pacer = pacer or default_pacer()
+    else:
+        pacer = None
+
+    def settings():
+        return pacer.settings() if pacer is not None else (batch_size, pause_s)
+
+    pos = 0
+    while pos < len(tickers_list):
+        size, pause = settings()
+        batch = tickers_list[pos : pos + size]
+        pos += len(batch)
+        last = None
+        for attempt in range(tries):
+            t0 = time.perf_counter()
+            try:
+                last = yf_download(
+                    batch,
+                    period=period,
+                    interval=interval,
+                    group_by="column",
+                    auto_adjust=auto_adjust,
+                    threads=False,
+                    progress=False,
+                    timeout=timeout,
+                )
+            except Exception:
+                last = None
+
+            if pacer is not None:
+                pacer.record(len(batch), time.perf_counter() - t0, _usable(last, batch))
+            if isinstance(last, pd.DataFrame) and not last.empty:
+                break
+            time.sleep((settings()[1] if pacer is not None else pause) * (attempt + 1))
+
+        if pos < len(tickers_list):
+            time.sleep(settings()[1])
+        if last is None or last.empty:
+            continue
+
+        for column in columns:
+            try:
+                selected = last[column]
+            except Exception:
+                continue
+
+            if isinstance(selected, pd.Series):
+                # Single ticker edge case
+                name = batch[0] if batch else column
+                selected = selected.to_frame(name=name)
+
+            frames[column].append(selected)
+
+    if pacer is not None:
+        pacer.save()
+
+    result = {}
+    for column, parts in frames.items():
+        if not parts:
+            result[column] = pd.DataFrame()
+            continue
+        df = pd.concat(parts, axis=1)
+        result[column] = df.loc[:, ~df.columns.duplicated()]
+    return result
+
+
+def download_selected_column(tickers, *, selected_column, **kwargs):
+    """
+    Download a single OHLCV column (Close/Volume) for many tickers.
+
+    Uses adaptive batching + pauses to avoid timeouts/throttling and returns a
+    DataFrame indexed by datetime with tickers as columns.
+    """
+    return download_columns(tickers, columns=(selected_column,), **kwargs)[selected_column]
+
+
+def get_safe_returns(df):
+    """Safely calculates returns and handles empty/partial data."""
+    if df is None or df.empty:
+        return pd.DataFrame()
+    # Drop columns that are all NaN or all 0
+    df = df.loc[:, (df != 0).any(axis=0)].dropna(axis=1, how="all")
+    returns = df.pct_change(fill_method=None).dropna(how="all")
+    return returns
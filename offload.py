@@ -0,0 +1,215 @@
+import io
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from correlation import pairwise_corr
+
+
+class Cancelled(Exception):
+    """Raised in workers (and re-raised to the caller) after ``CancelToken.cancel()``."""
+
+
+def get_executor(max_workers=None):
+    """
+    Process pool for CPU-heavy stages.
+
+    Uses the ``spawn`` start method so workers never inherit the Streamlit
+    server's threads or sockets.
+    """
+    return ProcessPoolExecutor(
+        max_workers=max_workers or os.cpu_count(),
+        mp_context=mp.get_context("spawn"),
+    )
+
+
+class SharedArray:
+    """
+    A numpy array living in a ``SharedMemory`` block.
+
+    Pickles as (name, shape, dtype) only, so passing it to a worker costs a
+    few bytes no matter how big the array is; the worker maps the same pages.
+    """
+
+    def __init__(self, shape, dtype, name=None):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        size = max(int(np.prod(self.shape)) * self.dtype.itemsize, 1)
+        self._owner = name is None
+        self._shm = shared_memory.SharedMemory(name=name, create=self._owner, size=size)
+
+    @classmethod
+    def from_array(cls, array):
+        array = np.ascontiguousarray(array)
+        shared = cls(array.shape, array.dtype)
+        shared.array[...] = array
+        return shared
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def array(self):
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=self._shm.buf)
+
+    def __getstate__(self):
+        return {"name": self.name, "shape": self.shape, "dtype": self.dtype.str}
+
+    def __setstate__(self, state):
+        self.__init__(state["shape"], state["dtype"], name=state["name"])
+
+    def release(self):
+        """Close the mapping; the creating process also frees the block."""
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+class SharedTable:
+    """
+    A DataFrame serialized as an Arrow IPC stream in shared memory.
+
+    Used for mixed-dtype tables (e.g. Excel sheets) where a raw ndarray does
+    not fit; the worker reads the Arrow buffers in place.
+    """
+
+    def __init__(self, df):
+        sink = pa.BufferOutputStream()
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        buffer = sink.getvalue()
+        self._data = SharedArray((buffer.size,), np.uint8)
+        self._data.array[:] = np.frombuffer(buffer, dtype=np.uint8)
+
+    def to_frame(self):
+        """Decode from a copy of the bytes, so the mapping can be closed while the frame lives on."""
+        reader = pa.ipc.open_stream(pa.py_buffer(self._data.array.tobytes()))
+        return reader.read_all().to_pandas()
+
+    def release(self):
+        self._data.release()
+
+
+class CancelToken:
+    """One shared byte that workers check before each chunk and between its sub-blocks."""
+
+    def __init__(self):
+        self._flag = SharedArray((1,), np.uint8)
+        self._flag.array[0] = 0
+
+    def cancel(self):
+        self._flag.array[0] = 1
+
+    @property
+    def cancelled(self):
+        return bool(self._flag.array[0])
+
+    def check(self):
+        if self.cancelled:
+            raise Cancelled()
+
+    def release(self):
+        self._flag.release()
+
+
+def _run_chunks(executor, fn, chunks, *, progress=None, token=None):
+    """
+    Submit one task per chunk and wait, reporting progress as they finish.
+
+    If anything goes wrong, including the caller being interrupted by a
+    Streamlit rerun/stop, pending chunks are cancelled and running workers
+    see the token on their next check.
+    """
+    futures = [executor.submit(fn, *chunk) for chunk in chunks]
+    results = [None] * len(futures)
+    positions = {future: i for i, future in enumerate(futures)}
+    try:
+        for done, future in enumerate(as_completed(futures), 1):
+            results[positions[future]] = future.result()
+            if progress is not None:
+                progress(done / len(futures))
+    except BaseException:
+        if token is not None:
+            token.cancel()
+        for future in futures:
+            future.cancel()
+        raise
+    return results
+
+
+# -- correlation --------------------------------------------------------------
+
+
+# Rows per cancellation check inside a chunk; the per-call setup stays a few percent of the work
+CHECK_ROWS = 16
+
+
+def _corr_rows(values, out, r0, r1, token):
+    # Workers attach every shared block on unpickling; close them all, even on cancel or error
+    try:
+        for s0 in range(r0, r1, CHECK_ROWS):
+            token.check()
+            s1 = min(s0 + CHECK_ROWS, r1)
+            out.array[s0:s1], _ = pairwise_corr(values.array, slice(s0, s1))
+    finally:
+        values.release()
+        out.release()
+        token.release()
+
+
+def parallel_corr(executor, returns, *, block_rows=64, progress=None):
+    """
+    ``returns.corr()`` computed in row blocks on the process pool.
+
+    Returns are copied once into shared memory and every worker writes its
+    rows straight into a shared output matrix, so no DataFrame is pickled.
+    """
+    n = returns.shape[1]
+    values = SharedArray.from_array(returns.to_numpy(dtype=np.float64, na_value=np.nan))
+    out = SharedArray((n, n), np.float64)
+    token = CancelToken()
+    try:
+        chunks = [(values, out, r0, min(r0 + block_rows, n), token) for r0 in range(0, n, block_rows)]
+        _run_chunks(executor, _corr_rows, chunks, progress=progress, token=token)
+        return pd.DataFrame(out.array.copy(), index=returns.columns, columns=returns.columns)
+    finally:
+        values.release()
+        out.release()
+        token.release()
+
+
+# -- Excel --------------------------------------------------------------------
+
+
+def _excel_bytes(sheets):
+    excel_buffer = io.BytesIO()
+    try:
+        with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
+            for sheet_name, (table, index) in sheets.items():
+                table.to_frame().to_excel(writer, sheet_name=sheet_name, index=index)
+    finally:
+        for table, _ in sheets.values():
+            table.release()
+    return excel_buffer.getvalue()
+
+
+def build_excel(executor, sheets):
+    """
+    Multi-sheet workbook built by a worker process.
+
+    ``sheets`` maps sheet name to (DataFrame, write_index). Frames travel as
+    Arrow buffers in shared memory; only the finished bytes come back.
+    """
+    tables = {name: (SharedTable(df), index) for name, (df, index) in sheets.items()}
+    try:
+        return executor.submit(_excel_bytes, tables).result()
+    finally:
+        for table, _ in tables.values():
+            table.release()
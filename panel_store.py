@@ -0,0 +1,325 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from quality import ISTANBUL, SEANS, is_intraday, trading_days
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-writer lock is not enforced
+    fcntl = None
+
+DEFAULT_FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+
+def period_offset(period):
+    """pd.DateOffset for a yfinance period string such as '5d', '1mo' or '1y'."""
+    if period.endswith("mo"):
+        return pd.DateOffset(months=int(period[:-2]))
+    if period.endswith("d"):
+        return pd.DateOffset(days=int(period[:-1]))
+    if period.endswith("y"):
+        return pd.DateOffset(years=int(period[:-1]))
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def period_sessions(period, end):
+    """
+    Trading sessions yfinance returns for ``period`` up to the session ``end``.
+
+    'Nd' periods are N trading days; month and year periods span the
+    calendar range, counted in Borsa Istanbul trading days.
+    """
+    if period.endswith("d"):
+        return int(period[:-1])
+    end = pd.Timestamp(end)
+    return len(trading_days(end - period_offset(period) + pd.Timedelta(days=1), end))
+
+
+def expected_last_session(now=None):
+    """Date of the newest session that should have bars by ``now`` (Istanbul time)."""
+    now = now or pd.Timestamp.now(tz=ISTANBUL)
+    days = trading_days(now - pd.Timedelta(days=14), now)
+    if days[-1].date() == now.date() and now.strftime("%H:%M") < SEANS[0]:
+        days = days[:-1]
+    return days[-1].date()
+
+
+class PanelStore:
+    """
+    Memory-mapped OHLCV panel (ticker x time x field) shared across processes.
+
+    A store is a directory holding:
+
+    - ``index.json``: tickers, fields, dtype, capacity, length and generation
+    - ``values.<gen>.bin``: array of shape (field, capacity, ticker)
+    - ``times.<gen>.bin``: int64 nanosecond timestamps of shape (capacity,)
+
+    Values are laid out field-major so that one field over time is a
+    contiguous (time x ticker) block, and ``frame()`` returns a DataFrame over
+    the mapped memory without copying. Readers open the store read-only and
+    share the OS page cache; a single writer (enforced with a lock file)
+    appends bars and publishes them by atomically rewriting ``index.json``.
+    When capacity runs out the writer copies into a new generation, and
+    readers switch over on their next ``refresh()``.
+    """
+
+    def __init__(self, path, meta, mode):
+        self.path = path
+        self.mode = mode
+        self._lock_file = None
+        self._load(meta)
+
+    # -- opening -----------------------------------------------------------
+
+    @classmethod
+    def create(cls, path, tickers, *, fields=DEFAULT_FIELDS, capacity=4096, dtype="float32"):
+        """Create an empty store and return it opened for writing."""
+        os.makedirs(path, exist_ok=True)
+        meta = {
+            "tickers": list(tickers),
+            "fields": list(fields),
+            "dtype": dtype,
+            "capacity": int(capacity),
+            "length": 0,
+            "generation": 0,
+            "tz": None,
+        }
+        cls._allocate(path, meta)
+        cls._write_meta(path, meta)
+        store = cls(path, meta, "r+")
+        store._acquire_writer()
+        return store
+
+    @classmethod
+    def open(cls, path, mode="r"):
+        """Open an existing store; ``mode='r+'`` takes the single-writer lock."""
+        with open(os.path.join(path, "index.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        store = cls(path, meta, mode)
+        if mode != "r":
+            store._acquire_writer()
+        return store
+
+    @staticmethod
+    def _files(path, generation):
+        return (
+            os.path.join(path, f"values.{generation}.bin"),
+            os.path.join(path, f"times.{generation}.bin"),
+        )
+
+    @classmethod
+    def _allocate(cls, path, meta):
+        values_file, times_file = cls._files(path, meta["generation"])
+        shape = (len(meta["fields"]), meta["capacity"], len(meta["tickers"]))
+        values = np.memmap(values_file, dtype=meta["dtype"], mode="w+", shape=shape)
+        values[:] = np.nan
+        values.flush()
+        times = np.memmap(times_file, dtype=np.int64, mode="w+", shape=(meta["capacity"],))
+        times.flush()
+        return values, times
+
+    @staticmethod
+    def _write_meta(path, meta):
+        tmp = os.path.join(path, f"index.json.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(path, "index.json"))
+
+    def _load(self, meta):
+        self.meta = meta
+        self.tickers = pd.Index(meta["tickers"])
+        self.fields = list(meta["fields"])
+        values_file, times_file = self._files(self.path, meta["generation"])
+        shape = (len(self.fields), meta["capacity"], len(self.tickers))
+        self._values = np.memmap(values_file, dtype=meta["dtype"], mode=self.mode, shape=shape)
+        self._times = np.memmap(times_file, dtype=np.int64, mode=self.mode, shape=(meta["capacity"],))
+
+    def _acquire_writer(self):
+        if fcntl is None:
+            return
+        self._lock_file = open(os.path.join(self.path, "writer.lock"), "w")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            raise RuntimeError(f"Another process is already writing to {self.path}")
+
+    def close(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    # -- reading -----------------------------------------------------------
+
+    def refresh(self):
+        """Pick up bars (and a new generation) published by the writer."""
+        with open(os.path.join(self.path, "index.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["generation"] != self.meta["generation"]:
+            self._load(meta)
+        else:
+            self.meta = meta
+        return self
+
+    def __len__(self):
+        return self.meta["length"]
+
+    @property
+    def times(self):
+        times = pd.to_datetime(self._times[: len(self)], utc=True)
+        tz = self.meta.get("tz")
+        return times.tz_convert(tz) if tz else times.tz_localize(None)
+
+    def frame(self, field, *, start=None, tickers=None):
+        """Wide (time x ticker) DataFrame for one field, backed by the mapping."""
+        n = len(self)
+        times = self.times
+        first = 0 if start is None else int(times.searchsorted(pd.Timestamp(start)))
+        block = self._values[self.fields.index(field), first:n]
+        df = pd.DataFrame(block, index=times[first:], columns=self.tickers, copy=False)
+        if tickers is not None:
+            df = df[[t for t in tickers if t in self.tickers]]
+        return df
+
+    def _sessions(self):
+        times = self.times
+        local = times.tz_convert(ISTANBUL) if times.tz is not None else times
+        return times, local.normalize()
+
+    def frame_for_period(self, field, period, tickers=None):
+        """
+        Same as ``frame`` restricted to the last ``period`` (e.g. '5d', '1y').
+
+        The cut is a number of trading sessions, as yfinance counts them,
+        so a store-backed page gets the same bars as a download would.
+        """
+        if len(self) == 0:
+            return pd.DataFrame()
+        times, sessions = self._sessions()
+        unique = sessions.unique()
+        first = unique[max(len(unique) - period_sessions(period, unique[-1]), 0)]
+        return self.frame(field, start=times[sessions.searchsorted(first)], tickers=tickers)
+
+    def is_current(self, interval, now=None):
+        """
+        Whether the writer has kept up: the newest bar belongs to the latest
+        session that should have bars, and while that session is trading,
+        intraday bars are at most two intervals old.
+        """
+        if len(self) == 0:
+            return False
+        now = now or pd.Timestamp.now(tz=ISTANBUL)
+        times, sessions = self._sessions()
+        if sessions[-1].date() < expected_last_session(now):
+            return False
+        intraday = is_intraday(interval)
+        trading = SEANS[0] <= now.strftime("%H:%M") < SEANS[1] and sessions[-1].date() == now.date()
+        if intraday and trading:
+            last = times[-1] if times.tz is not None else times[-1].tz_localize(ISTANBUL)
+            return now - last <= 2 * pd.Timedelta(interval)
+        return True
+
+    # -- writing -----------------------------------------------------------
+
+    def _grow(self, needed):
+        meta = dict(self.meta)
+        meta["capacity"] = max(needed, 2 * meta["capacity"])
+        meta["generation"] += 1
+        values, times = self._allocate(self.path, meta)
+        n = len(self)
+        values[:, :n] = self._values[:, :n]
+        times[:n] = self._times[:n]
+        values.flush()
+        times.flush()
+        old_files = self._files(self.path, self.meta["generation"])
+        self._write_meta(self.path, meta)
+        self._load(meta)
+        # Readers that still map the old generation keep their pages until they refresh
+        for old in old_files:
+            os.remove(old)
+
+    def append(self, frames):
+        """
+        Append bars from ``{field: wide DataFrame}``.
+
+        Rows older than the last stored bar are ignored; a row with the same
+        timestamp as the last bar overwrites it (still-forming bar). Returns
+        the number of new rows.
+        """
+        if self._lock_file is None and fcntl is not None:
+            raise RuntimeError("Store is not open for writing")
+        index = None
+        for df in frames.values():
+            if df is not None and not df.empty:
+                index = df.index if index is None else index.union(df.index)
+        if index is None:
+            return 0
+
+        index = pd.DatetimeIndex(index)
+        stamps = index.as_unit("ns").asi8
+        n = len(self)
+        last = self._times[n - 1] if n else np.iinfo(np.int64).min
+        keep = stamps >= last
+        stamps = stamps[keep]
+        if len(stamps) == 0:
+            return 0
+        start = n - 1 if n and stamps[0] == last else n
+        end = start + len(stamps)
+        if end > self.meta["capacity"]:
+            self._grow(end)
+
+        self._times[start:end] = stamps
+        for f, field in enumerate(self.fields):
+            df = frames.get(field)
+            if df is None or df.empty:
+                continue
+            aligned = df.reindex(index=index[keep], columns=self.tickers)
+            self._values[f, start:end] = aligned.to_numpy(dtype=self.meta["dtype"], na_value=np.nan)
+        self._values.flush()
+        self._times.flush()
+
+        meta = dict(self.meta, length=end, tz=str(index.tz) if index.tz is not None else None)
+        self._write_meta(self.path, meta)
+        self.meta = meta
+        return end - n
+
+
+def main(argv=None):
+    """Writer process: seed a store from yfinance, then append the latest bars."""
+    from market_data import download_columns
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("path")
+    parser.add_argument("--tickers", nargs="+", required=True)
+    parser.add_argument("--interval", default="1d")
+    parser.add_argument("--period", default="1y")
+    parser.add_argument("--every", type=float, default=0, help="poll seconds; 0 = seed once and exit")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(os.path.join(args.path, "index.json")):
+        store = PanelStore.open(args.path, mode="r+")
+    else:
+        store = PanelStore.create(args.path, args.tickers)
+
+    period = args.period if len(store) == 0 else "1d"
+    while True:
+        frames = download_columns(
+            list(store.tickers), period=period, interval=args.interval, columns=store.fields
+        )
+        added = store.append(frames)
+        print(f"{pd.Timestamp.now():%H:%M:%S} +{added} bars, {len(store)} total")
+        if not args.every:
+            break
+        period = "1d"
+        time.sleep(args.every)
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
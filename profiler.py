@@ -0,0 +1,230 @@
+import contextlib
+import os
+import sys
+import sysconfig
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+import pandas as pd
+
+_STDLIB = os.path.normcase(sysconfig.get_paths()["stdlib"])
+_active = {}  # thread id -> StageProfiler, only while an ``activated`` block runs
+_lookup = None  # fallback: callable returning the current run's profiler or None
+
+# tracemalloc is process-global: open stages of every profiler share it
+_memory_lock = threading.Lock()
+_memory_stages = []  # open stage records using tracemalloc, any thread
+_started_tracemalloc = False
+
+
+@contextlib.contextmanager
+def activated(profiler):
+    """Report ``stage()`` blocks on this thread to ``profiler`` until the block exits."""
+    ident = threading.get_ident()
+    _active[ident] = profiler
+    try:
+        yield profiler
+    finally:
+        _active.pop(ident, None)
+
+
+def set_lookup(lookup):
+    """
+    Find the profiler with ``lookup()`` on threads without an ``activated`` one.
+
+    A Streamlit app passes a function reading the running session's state,
+    so fragment reruns on fresh script threads still report to their own
+    session and never to a profiler left behind by a finished thread.
+    """
+    global _lookup
+    _lookup = lookup
+
+
+def current():
+    """The profiler ``stage()`` reports to on this thread, or None."""
+    profiler = _active.get(threading.get_ident())
+    if profiler is None and _lookup is not None:
+        profiler = _lookup()
+    return profiler
+
+
+def stage(name):
+    """Profile a block as ``name`` if a profiler is active on this thread; free otherwise."""
+    profiler = current()
+    return profiler.stage(name) if profiler is not None else contextlib.nullcontext()
+
+
+def _package(filename):
+    """Top-level package of a source file: 'pandas', 'yfinance', 'stdlib' or the app module."""
+    path = os.path.normcase(filename)
+    parts = path.replace("\\", "/").split("/")
+    for marker in ("site-packages", "dist-packages"):
+        if marker in parts and parts.index(marker) + 1 < len(parts):
+            return parts[parts.index(marker) + 1].split(".")[0]
+    if path.startswith(_STDLIB):
+        return "stdlib"
+    return os.path.splitext(os.path.basename(filename))[0]
+
+
+def _snapshot():
+    return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+
+def _fold_peak():
+    """Credit the traced peak so far to every open stage, then reset it (caller holds the lock)."""
+    peak = tracemalloc.get_traced_memory()[1]
+    for rec in _memory_stages:
+        rec["_peak"] = max(rec["_peak"], peak)
+    tracemalloc.reset_peak()
+
+
+def _memory_open(rec):
+    global _started_tracemalloc
+    with _memory_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracemalloc = True
+        _fold_peak()
+        rec["_current"] = tracemalloc.get_traced_memory()[0]
+        rec["_peak"] = rec["_current"]
+        _memory_stages.append(rec)
+    rec["_snapshot"] = _snapshot()
+
+
+def _memory_close(rec, top):
+    global _started_tracemalloc
+    diff = _snapshot().compare_to(rec.pop("_snapshot"), "lineno")
+    with _memory_lock:
+        current, peak = tracemalloc.get_traced_memory()
+        start = rec.pop("_current")
+        rec["mem_peak"] = max(rec.pop("_peak"), peak) - start
+        rec["mem_net"] = current - start
+        _memory_stages.remove(rec)
+        # Only stop tracing we started, and only when no stage anywhere still needs it
+        if not _memory_stages and _started_tracemalloc:
+            tracemalloc.stop()
+            _started_tracemalloc = False
+    rec["allocations"] = [d for d in diff if d.size_diff > 0][:top]
+
+
+class StageProfiler:
+    """
+    Sampled call profile and tracemalloc memory diff for named stages.
+
+    While a stage is open a daemon thread samples the stage thread's Python
+    stack every ``interval_s`` (no tracing hooks, so overhead stays flat)
+    and attributes it to the innermost open stage; samples taken while the
+    profiler itself opens or closes a stage are dropped. With
+    ``memory=True`` each stage also records the traced peak and the top
+    allocation sites that grew. tracemalloc is process-wide, so these
+    figures include allocations by other sessions running at the same
+    time; tracing stays on while any profiler has a stage open. Finished
+    stages accumulate until ``clear()``.
+    """
+
+    def __init__(self, interval_s=0.005, memory=True, top=15):
+        self.interval_s = interval_s
+        self.memory = memory
+        self.top = top
+        self.records = []
+        self._open = []
+        self._sampler = None
+
+    def clear(self):
+        self.records = []
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        rec = {
+            "name": name,
+            "started": time.strftime("%H:%M:%S"),
+            "samples": 0,
+            "self": Counter(),
+            "cumulative": Counter(),
+            "packages": Counter(),
+        }
+        if self.memory:
+            _memory_open(rec)
+        self._open.append(rec)
+        if self._sampler is None:
+            self._sampler = threading.Thread(
+                target=self._sample, args=(threading.get_ident(),), name="stage-profiler", daemon=True
+            )
+            self._sampler.start()
+        t0 = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            rec["wall_s"] = time.perf_counter() - t0
+            self._open.remove(rec)
+            if self.memory:
+                _memory_close(rec, self.top)
+            if not self._open:
+                self._sampler.join()
+                self._sampler = None
+            self.records.append(rec)
+
+    def _sample(self, thread_id):
+        while self._open:
+            time.sleep(self.interval_s)
+            frame = sys._current_frames().get(thread_id)
+            try:
+                rec = self._open[-1]
+            except IndexError:
+                break
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            # frames in this module only exist while a stage opens or closes: profiler overhead
+            if stack and not any(code.co_filename == __file__ for code in stack):
+                seen = {(code.co_name, code.co_filename) for code in stack}
+                packages = {_package(code.co_filename) for code in stack}
+                rec["self"][(stack[0].co_name, stack[0].co_filename)] += 1
+                rec["cumulative"].update(seen)
+                rec["packages"].update(packages)
+                rec["samples"] += 1
+
+    def frames(self):
+        """(stages, functions, packages, allocations) report tables."""
+        stages, functions, packages, allocations = [], [], [], []
+        for rec in self.records:
+            n = max(rec["samples"], 1)
+            stages.append({
+                'Aşama': rec["name"],
+                'Başlangıç': rec["started"],
+                'Süre (s)': round(rec["wall_s"], 3),
+                'Örnek': rec["samples"],
+                'Süreç Bellek Tepe (MB)': round(rec.get("mem_peak", 0) / 2**20, 2),
+                'Süreç Bellek Net (MB)': round(rec.get("mem_net", 0) / 2**20, 2),
+            })
+            for (func, filename), count in rec["cumulative"].most_common(self.top):
+                functions.append({
+                    'Aşama': rec["name"],
+                    'Fonksiyon': func,
+                    'Paket': _package(filename),
+                    'Öz %': round(100 * rec["self"][(func, filename)] / n, 1),
+                    'Toplam %': round(100 * count / n, 1),
+                    'Dosya': filename,
+                })
+            for package, count in rec["packages"].most_common():
+                packages.append({'Aşama': rec["name"], 'Paket': package, 'Toplam %': round(100 * count / n, 1)})
+            for stat in rec.get("allocations", []):
+                frame = stat.traceback[0]
+                allocations.append({
+                    'Aşama': rec["name"],
+                    'Satır': f"{frame.filename}:{frame.lineno}",
+                    'Boyut Farkı (KB)': round(stat.size_diff / 1024, 1),
+                    'Adet Farkı': stat.count_diff,
+                })
+        return tuple(pd.DataFrame(rows) for rows in (stages, functions, packages, allocations))
+
+    def to_text(self):
+        """Plain-text report of every recorded stage, for download."""
+        titles = ("STAGES", "FUNCTIONS (cumulative samples)", "PACKAGES", "ALLOCATIONS (growth, process-wide)")
+        parts = []
+        for title, df in zip(titles, self.frames()):
+            parts.append(f"== {title} ==\n" + (df.to_string(index=False) if not df.empty else "(none)"))
+        return "\n\n".join(parts) + "\n"
@@ -0,0 +1,188 @@
+import warnings
+from datetime import date
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+ISTANBUL = ZoneInfo("Europe/Istanbul")
+
+# Borsa Istanbul pay piyasası sürekli işlem seansı
+SEANS = ("10:00", "18:00")
+
+# Resmi tatiller (ay, gün) ve dini bayramlar; arife yarım günleri boş barlar olarak düşer
+RESMI_TATILLER = {(1, 1), (4, 23), (5, 1), (5, 19), (7, 15), (8, 30), (10, 29)}
+DINI_BAYRAMLAR = {
+    date(2024, 4, 10), date(2024, 4, 11), date(2024, 4, 12),
+    date(2024, 6, 16), date(2024, 6, 17), date(2024, 6, 18), date(2024, 6, 19),
+    date(2025, 3, 30), date(2025, 3, 31), date(2025, 4, 1),
+    date(2025, 6, 6), date(2025, 6, 7), date(2025, 6, 8), date(2025, 6, 9),
+    date(2026, 3, 20), date(2026, 3, 21), date(2026, 3, 22),
+    date(2026, 5, 27), date(2026, 5, 28), date(2026, 5, 29), date(2026, 5, 30),
+    date(2027, 3, 9), date(2027, 3, 10), date(2027, 3, 11),
+    date(2027, 5, 16), date(2027, 5, 17), date(2027, 5, 18), date(2027, 5, 19),
+}
+# Last day DINI_BAYRAMLAR covers; later religious holidays are unknown until the table is extended
+TATIL_TABLOSU_SONU = date(2027, 12, 31)
+
+
+def is_intraday(interval):
+    """True for minute/hour intervals ('60m', '1h'); '1mo' is monthly."""
+    return interval.endswith(("m", "h")) and not interval.endswith("mo")
+
+
+def _local(index):
+    index = pd.DatetimeIndex(index)
+    return index.tz_convert(ISTANBUL) if index.tz is not None else index
+
+
+def trading_days(start, end):
+    """
+    Borsa Istanbul business days between two dates (weekends and holidays removed).
+
+    Warns when the range runs past TATIL_TABLOSU_SONU: religious holidays
+    after it are not in the table and would show up as trading days.
+    """
+    days = pd.bdate_range(pd.Timestamp(start).date(), pd.Timestamp(end).date())
+    if len(days) and days[-1].date() > TATIL_TABLOSU_SONU:
+        warnings.warn(
+            f"quality.DINI_BAYRAMLAR only covers holidays up to {TATIL_TABLOSU_SONU}; "
+            "extend it, later bayram days are treated as trading days",
+            RuntimeWarning,
+            stacklevel=2,
+        )
+    keep = [
+        (d.month, d.day) not in RESMI_TATILLER and d.date() not in DINI_BAYRAMLAR
+        for d in days
+    ]
+    return days[keep]
+
+
+def trading_calendar(index, interval="1d"):
+    """
+    The Borsa Istanbul bar grid covering ``index``.
+
+    Daily intervals give one bar per trading day; intraday intervals give
+    every session bar from 10:00 up to 18:00 on each trading day, in the
+    index's time zone (Istanbul local time if it has one).
+    """
+    index = _local(index)
+    if len(index) == 0:
+        return index
+    days = trading_days(index.min(), index.max())
+    if is_intraday(interval):
+        step = pd.Timedelta(interval)
+        acilis, kapanis = (pd.Timedelta(f"{t}:00") for t in SEANS)
+        offsets = pd.timedelta_range(acilis, kapanis - step, freq=step)
+        days = pd.DatetimeIndex((days.to_numpy()[:, None] + offsets.to_numpy()[None, :]).ravel())
+    return days.tz_localize(index.tz) if index.tz is not None else days
+
+
+def align_to_calendar(frame, interval="1d"):
+    """
+    Snap timestamps to the bar grid, keep the last print per bar and reindex.
+
+    Bars that are empty for every ticker (half days, halts, unlisted
+    holidays) are dropped rather than reported as gaps.
+    """
+    if frame is None or frame.empty:
+        return pd.DataFrame()
+    frame = frame.copy()
+    index = _local(frame.index)
+    frame.index = index.floor(pd.Timedelta(interval)) if is_intraday(interval) else index.normalize()
+    frame = frame.groupby(level=0).last()
+    aligned = frame.reindex(trading_calendar(frame.index, interval))
+    return aligned.dropna(how="all")
+
+
+def quality_masks(close, volume=None, *, interval="1d", stale_bars=3, spike_z=8.0):
+    """
+    Boolean (time x ticker) masks for an aligned panel, all in one pass.
+
+    - gap: missing bar inside the ticker's own first..last valid range
+    - stale: price unchanged for ``stale_bars`` bars (flagged only; thin
+      names legitimately print the same close)
+    - dead: a stale bar that also traded zero volume, i.e. no real print
+    - spike: a return beyond ``spike_z`` robust (MAD) z-scores that the next
+      bar reverses, i.e. a bad print rather than a real move
+    - overnight: first bar of each session on intraday data
+    """
+    values = close.to_numpy(dtype=np.float64, na_value=np.nan)
+    present = ~np.isnan(values)
+    started = np.cumsum(present, axis=0) > 0
+    not_ended = np.cumsum(present[::-1], axis=0)[::-1] > 0
+    gap = ~present & started & not_ended
+
+    prev = np.vstack([np.full((1, values.shape[1]), np.nan), values[:-1]])
+    same = present & (values == prev)
+    count = np.cumsum(same, axis=0)
+    run = count - np.maximum.accumulate(np.where(same, 0, count), axis=0)
+    stale = run >= stale_bars - 1
+    if volume is not None:
+        vol = volume.reindex(index=close.index, columns=close.columns).to_numpy(dtype=np.float64, na_value=np.nan)
+        dead = stale & (vol == 0)
+    else:
+        dead = np.zeros_like(stale)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = np.log(values / prev)
+        med = np.nanmedian(r, axis=0)
+        mad = 1.4826 * np.nanmedian(np.abs(r - med), axis=0)
+        z = (r - med) / np.where(mad > 0, mad, np.nan)
+    z_next = np.vstack([z[1:], np.full((1, values.shape[1]), np.nan)])
+    spike = (np.abs(z) > spike_z) & (np.abs(z_next) > spike_z) & (np.sign(z) != np.sign(z_next))
+
+    if is_intraday(interval):
+        days = _local(close.index).normalize()
+        overnight = np.r_[False, days[1:] != days[:-1]][:, None] & present
+    else:
+        overnight = np.zeros_like(present)
+    return {"gap": gap, "stale": stale, "dead": dead, "spike": spike, "overnight": overnight}
+
+
+def clean_panel(close, volume=None, *, interval="1d", stale_bars=3, spike_z=8.0,
+                drop_overnight=False, min_coverage=0.5):
+    """
+    Calendar-aligned close panel, its returns and a per-ticker quality report.
+
+    Dead (zero-volume stale) and spike bars are blanked in the panel; for
+    returns they carry the last good price forward, so the bad print gets
+    no return of its own and the next real move is measured from the last
+    good close. Stale bars with volume are only reported. Overnight
+    returns on intraday data are dropped when ``drop_overnight`` is set. Tickers with less than
+    ``min_coverage`` of the calendar bars are left out of the panel.
+
+    Returns (panel, returns, report).
+    """
+    aligned = align_to_calendar(close, interval)
+    if aligned.empty:
+        return aligned, pd.DataFrame(), pd.DataFrame()
+    aligned = aligned.where(aligned != 0)
+    if volume is not None:
+        volume = align_to_calendar(volume, interval).reindex(aligned.index)
+    masks = quality_masks(aligned, volume, interval=interval, stale_bars=stale_bars, spike_z=spike_z)
+
+    bad = masks["dead"] | masks["spike"]
+    panel = aligned.mask(bad)
+    prices = panel.ffill().where(aligned.notna())
+    returns = prices.pct_change(fill_method=None).mask(bad)
+    if drop_overnight:
+        returns = returns.mask(masks["overnight"])
+
+    coverage = panel.notna().mean()
+    report = pd.DataFrame({
+        'Hisse': aligned.columns,
+        'Bar': aligned.notna().sum().to_numpy(),
+        'Eksik': masks["gap"].sum(axis=0),
+        'Durgun': masks["stale"].sum(axis=0),
+        'İşlemsiz': masks["dead"].sum(axis=0),
+        'Sıçrama': masks["spike"].sum(axis=0),
+        'Gece Boşluğu': masks["overnight"].sum(axis=0),
+        'Kapsama %': (100 * coverage).round(1).to_numpy(),
+        'Kullanıldı': (coverage >= min_coverage).to_numpy(),
+    })
+
+    keep = coverage.index[coverage >= min_coverage]
+    panel = panel[keep]
+    returns = returns[keep].dropna(how="all")
+    return panel, returns, report.sort_values('Kapsama %').reset_index(drop=True)
@@ -0,0 +1,144 @@
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+from compact import CompactPairs
+
+log = logging.getLogger(__name__)
+
+
+def json_safe(value):
+    """``value`` with NaN/inf floats (at any depth) replaced by None, so it dumps as strict JSON."""
+    if isinstance(value, dict):
+        return {k: json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(v) for v in value]
+    if isinstance(value, (float, np.floating)):
+        return float(value) if math.isfinite(value) else None
+    return value
+
+
+def _records(df):
+    return df.to_dict('records') if df is not None and not df.empty else []
+
+
+def json_payload(results):
+    """The Bist30-Full/Kontrat-Tum JSON export structure for a results dict."""
+    matrix = results.get('correlation_matrix')
+    pairs = results.get('correlation_pairs')
+    if isinstance(pairs, CompactPairs):
+        pairs = pairs.to_frame()
+    return json_safe({
+        "metadata": results.get('analysis_metadata') or {},
+        "correlation": {
+            "matrix": matrix.to_dict() if matrix is not None else {},
+            "pairs": _records(pairs),
+            "lead_lag": _records(results.get('lead_lag_df')),
+            "eigen": {
+                "explained": _records(results.get('eigen_df')),
+                "loadings": _records(results.get('eigen_loadings_df'))
+            }
+        },
+        "maruziyet": _records(results.get('maruziyet_df')),
+        "para_akisi": _records(results.get('para_akisi_df')),
+        "sektorel": {
+            "ozet": _records(results.get('sektor_ozet_df')),
+            "detay": _records(results.get('sektor_detay_df'))
+        },
+        "hacim_analizi": _records(results.get('hacim_analiz_df'))
+    })
+
+
+class ResultStore:
+    """
+    Latest full-analysis results per (universe, period, column label).
+
+    Entries live in memory for the app process. When ``directory`` is set,
+    each entry is also written there as the export JSON (atomically), so
+    processes other than the Streamlit server can read it. A ``history``
+    ``SnapshotStore`` additionally keeps every stored run; failures there
+    are logged and never reach the caller.
+    """
+
+    def __init__(self, directory=None, history=None):
+        self.directory = directory
+        self.history = history
+        self._entries = {}
+        self._payloads = {}
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, key):
+        return os.path.join(self.directory, "_".join(key) + ".json")
+
+    def put(self, key, results):
+        with self._lock:
+            self._entries[key] = (time.time(), results)
+        if self.history is not None:
+            # History is a side record: a full or read-only disk must not fail the analysis
+            try:
+                self.history.append(key, results)
+            except Exception:
+                log.exception("Could not append %s to the result history", "/".join(key))
+        if self.directory:
+            path = self.path_for(key)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(json_payload(results), f, ensure_ascii=False, allow_nan=False, default=str)
+            os.replace(tmp, path)
+
+    def get(self, key, max_age=None):
+        """Results for ``key`` or None when missing or older than ``max_age`` seconds."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, results = entry
+        if max_age is not None and time.time() - stored_at > max_age:
+            return None
+        return results
+
+    def keys(self):
+        """Keys held in memory or present as files in ``directory``."""
+        with self._lock:
+            keys = set(self._entries)
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith(".json"):
+                    keys.add(tuple(name[:-len(".json")].split("_")))
+        return sorted(keys)
+
+    def payload(self, key):
+        """
+        (version, export JSON dict) for ``key``, or None.
+
+        Memory entries win; otherwise the file in ``directory`` is read. The
+        decoded payload is kept until the entry (or the file's mtime)
+        changes, so another process (the API server) can follow the app's
+        results without a Streamlit session.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        cached = self._payloads.get(key)
+        if entry is not None:
+            if cached is None or cached[0] != entry[0]:
+                cached = (entry[0], json_payload(entry[1]))
+                self._payloads[key] = cached
+            return cached
+        if not self.directory:
+            return None
+        try:
+            mtime = os.stat(self.path_for(key)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if cached is None or cached[0] != mtime:
+            with open(self.path_for(key), encoding="utf-8") as f:
+                cached = (mtime, json_safe(json.load(f)))
+            self._payloads[key] = cached
+        return cached
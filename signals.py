@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+
+
+def _last_bar_metrics(close, volume, return_window=5, volume_window=20):
+    """Last-bar return (%) and volume strength for every ticker at once."""
+    close = close.dropna(how="all")
+    volume = volume.reindex(columns=close.columns).dropna(how="all")
+    fiyat = (close.iloc[-1] / close.shift(return_window).iloc[-1] - 1) * 100
+    hacim_ort = volume.rolling(volume_window).mean().iloc[-1]
+    hacim_gucu = volume.iloc[-1] / hacim_ort.replace(0, np.nan)
+    return fiyat, hacim_gucu
+
+
+def para_akisi_sinyalleri(close, volume, *, return_window=5, volume_window=20, threshold=1.2):
+    """
+    Para akışı signal table for the whole universe from wide Close/Volume frames.
+
+    Same rule as the per-ticker ``analiz_yap`` loop: price up with strong
+    volume is "GÜÇLÜ GİRİŞ", price down with strong volume is "GÜÇLÜ ÇIKIŞ".
+    """
+    if close is None or close.empty or volume is None or volume.empty:
+        return pd.DataFrame()
+    volume = volume.reindex(columns=close.columns)
+    fiyat, hacim_gucu = _last_bar_metrics(close, volume, return_window, volume_window)
+    valid = fiyat.notna() & (close.notna().sum() > return_window) & (volume.notna().sum() >= volume_window)
+    fiyat, hacim_gucu = fiyat[valid], hacim_gucu[valid].fillna(0.0)
+
+    guclu = hacim_gucu > threshold
+    skor = np.select([(fiyat > 0) & guclu, (fiyat < 0) & guclu], [3, -3], 0)
+    durum = np.select([skor == 3, skor == -3], ["GÜÇLÜ GİRİŞ", "GÜÇLÜ ÇIKIŞ"], "NORMAL / ROTASYON")
+
+    df = pd.DataFrame({
+        'Tarih': pd.Timestamp.now().strftime('%Y-%m-%d'),
+        'Hisse': fiyat.index,
+        f'Fiyat Değişim ({return_window}G %)': fiyat.round(2).values,
+        'Hacim Gücü (x)': hacim_gucu.round(2).values,
+        'Para Akış Sinyali': durum,
+        'Skor': skor,
+    })
+    return df.sort_values(by='Skor', ascending=False).reset_index(drop=True)
+
+
+def para_akisi_skorlari(close, volume, *, return_window=5, volume_window=20, threshold=1.2):
+    """
+    The para akışı score (3 / -3 / 0) at every bar instead of only the last one.
+
+    Same rule as ``para_akisi_sinyalleri``, evaluated on whole (time x ticker)
+    arrays; bars without enough history score 0.
+    """
+    volume = volume.reindex(index=close.index, columns=close.columns)
+    fiyat = (close / close.shift(return_window) - 1).to_numpy(dtype=np.float64, na_value=np.nan)
+    hacim_ort = volume.rolling(volume_window).mean().to_numpy(dtype=np.float64, na_value=np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        hacim_gucu = volume.to_numpy(dtype=np.float64, na_value=np.nan) / np.where(hacim_ort != 0, hacim_ort, np.nan)
+    guclu = hacim_gucu > threshold
+    skor = np.select([(fiyat > 0) & guclu, (fiyat < 0) & guclu], [3, -3], 0).astype(np.int8)
+    return pd.DataFrame(skor, index=close.index, columns=close.columns)
+
+
+def hacim_tablosu(close, volume, *, return_window=5, volume_window=20):
+    """Hacim analizi table (price, weekly return, volume strength) sorted by volume strength."""
+    if close is None or close.empty or volume is None or volume.empty:
+        return pd.DataFrame()
+    fiyat, hacim_gucu = _last_bar_metrics(close, volume, return_window, volume_window)
+    df = pd.DataFrame({
+        'Hisse': fiyat.index,
+        'Güncel Fiyat': close.ffill().iloc[-1].reindex(fiyat.index).round(2).values,
+        'Haftalık Getiri %': fiyat.values,
+        'Hacim Gücü': hacim_gucu.values,
+    })
+    return df.sort_values('Hacim Gücü', ascending=False).reset_index(drop=True)
+
+
+def _window_means(values, starts, ends):
+    """NaN-aware means of rows [T - start, T - end) for every (start, end) pair, from one cumulative sum."""
+    valid = ~np.isnan(values)
+    sums = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(np.where(valid, values, 0.0), axis=0)])
+    counts = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(valid, axis=0)])
+    t = len(values)
+    lo, hi = t - np.asarray(starts), t - np.asarray(ends)
+    inside = lo >= 0
+    lo = np.maximum(lo, 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = (sums[hi] - sums[lo]) / (counts[hi] - counts[lo])
+    return np.where(inside[:, None], means, np.nan)
+
+
+def sektor_momentumu(close, volume, sektor_haritasi, *, windows=(1, 20, 60), volume_window=20,
+                     weighting="equal"):
+    """
+    Sector momentum from wide daily Close/Volume frames.
+
+    The weekly columns keep their original definition: 'Haftalık Getiri %'
+    is the 5-bar return, 'Hacim Gücü' the last bar's volume over the
+    ``volume_window``-bar mean ending at that bar, and 'Sektör Skoru' their
+    product. Every window w in ``windows`` adds the w-bar return (%), a
+    volume strength (average volume of the last w bars over the
+    ``volume_window`` bars before them) and their product; all windows come
+    from one gather of closes and one cumulative sum of volume.
+
+    Sectors average their tickers with ``weighting``: "equal", "volume"
+    (average traded value over the last ``volume_window`` bars) or a Series
+    of weights per ticker such as market caps. Returns (sector summary,
+    ticker detail), both sorted by the weekly score.
+    """
+    if close is None or close.empty or volume is None or volume.empty:
+        return pd.DataFrame(), pd.DataFrame()
+    volume = volume.reindex(index=close.index, columns=close.columns)
+    haftalik, son_hacim_gucu = _last_bar_metrics(close, volume, 5, volume_window)
+    c = close.ffill().to_numpy(dtype=np.float64, na_value=np.nan)
+    v = volume.to_numpy(dtype=np.float64, na_value=np.nan)
+    t = len(c)
+    w = np.asarray(windows, dtype=np.int64).reshape(-1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        getiri = np.where((w < t)[:, None], c[-1] / c[np.maximum(t - 1 - w, 0)] - 1, np.nan) * 100
+        hacim_gucu = _window_means(v, w, 0) / _window_means(v, w + volume_window, w)
+    hacim_gucu[~np.isfinite(hacim_gucu)] = np.nan
+    skor = getiri * hacim_gucu
+
+    tickers = close.columns
+    if isinstance(weighting, pd.Series):
+        agirlik = weighting.reindex(tickers).to_numpy(dtype=np.float64, na_value=np.nan)
+    elif weighting == "volume":
+        agirlik = _window_means(c * v, [volume_window], [0])[0]
+    else:
+        agirlik = np.ones(len(tickers))
+    agirlik = np.nan_to_num(agirlik, nan=0.0)
+
+    detay = {
+        'Hisse': tickers,
+        'Sektör': [sektor_haritasi.get(h, 'Bilinmeyen') for h in tickers],
+        'Haftalık Getiri %': haftalik.reindex(tickers).to_numpy(dtype=np.float64, na_value=np.nan),
+        'Hacim Gücü': son_hacim_gucu.reindex(tickers).to_numpy(dtype=np.float64, na_value=np.nan),
+    }
+    detay['Sektör Skoru'] = detay['Haftalık Getiri %'] * detay['Hacim Gücü']
+    for k, window in enumerate(w):
+        detay[f'Getiri {window}G %'] = getiri[k]
+        detay[f'Hacim Gücü {window}G'] = hacim_gucu[k]
+        detay[f'Skor {window}G'] = skor[k]
+    detay = pd.DataFrame(detay)
+    detay['Ağırlık %'] = 100 * agirlik / (agirlik.sum() or 1.0)
+
+    # Weighted sector means of every metric at once: one-hot (sector x ticker) @ (ticker x metric)
+    kodlar, sektorler = pd.factorize(detay['Sektör'])
+    uyelik = np.zeros((len(sektorler), len(tickers)))
+    uyelik[kodlar, np.arange(len(tickers))] = 1.0
+    metrikler = detay.columns[2:-1]
+    x = detay[metrikler].to_numpy(dtype=np.float64)
+    gecerli = ~np.isnan(x)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ortalama = (uyelik @ (agirlik[:, None] * np.where(gecerli, x, 0.0))) / (uyelik @ (agirlik[:, None] * gecerli))
+    ozet = pd.DataFrame(ortalama, columns=metrikler).rename(columns={'Sektör Skoru': 'Ortalama Sektör Skoru'})
+    ozet.insert(0, 'Sektör', sektorler)
+    ozet.insert(1, 'Ortalama Sektör Skoru', ozet.pop('Ortalama Sektör Skoru'))
+    ozet.insert(2, 'Hisse Sayısı', np.bincount(kodlar, minlength=len(sektorler)))
+
+    ozet = ozet.sort_values('Ortalama Sektör Skoru', ascending=False, na_position="last").reset_index(drop=True)
+    detay = detay.sort_values('Sektör Skoru', ascending=False, na_position="last").reset_index(drop=True)
+    return ozet, detay
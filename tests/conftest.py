@@ -0,0 +1,18 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def returns():
+    """Gapless daily returns for eight tickers with some shared structure."""
+    rng = np.random.default_rng(7)
+    common = rng.normal(0, 0.01, (300, 1))
+    values = common * rng.uniform(0.2, 1.5, 8) + rng.normal(0, 0.01, (300, 8))
+    index = pd.bdate_range("2024-01-02", periods=300)
+    return pd.DataFrame(values, index=index, columns=[f"H{i}" for i in range(8)])
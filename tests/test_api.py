@@ -0,0 +1,29 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from api import ResultAPI
+from results import ResultStore
+
+
+def test_undefined_values_are_null_and_unranked(tmp_path):
+    pairs = pd.DataFrame({
+        "Stock 1": ["A", "A", "B"],
+        "Stock 2": ["B", "C", "C"],
+        "Correlation": [0.5, np.nan, 0.9],
+        "P-Value": [0.01, np.nan, np.inf],
+    })
+    matrix = pd.DataFrame([[1.0, np.nan], [np.nan, 1.0]], index=["A", "B"], columns=["A", "B"])
+    store = ResultStore(directory=str(tmp_path))
+    store.put(("BIST30", "1y", "Close"), {"correlation_pairs": pairs, "correlation_matrix": matrix})
+
+    api = ResultAPI(store)
+    _, body, _ = api.response(("BIST30", "1y", "Close"), "pairs", {"k": "3"})
+    data = json.loads(body)["data"]
+    assert [p["Correlation"] for p in data] == [0.9, 0.5]
+    assert data[0]["P-Value"] is None
+
+    _, body, _ = api.response(("BIST30", "1y", "Close"), "matrix", {})
+    assert json.loads(body)["data"]["A"]["B"] is None
+    assert "NaN" not in (tmp_path / "BIST30_1y_Close.json").read_text()
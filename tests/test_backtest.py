@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import backtest_para_akisi, parametre_taramasi
+
+
+@pytest.fixture
+def panel():
+    rng = np.random.default_rng(3)
+    index = pd.bdate_range("2023-01-02", periods=260)
+    tickers = [f"H{i}" for i in range(6)]
+    close = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.02, (260, 6)), axis=0)), index, tickers)
+    volume = pd.DataFrame(rng.lognormal(10, 0.5, (260, 6)), index, tickers)
+    volume.iloc[50:55, 2] = np.nan
+    return close, volume
+
+
+def test_sweep_matches_backtest_per_parameter_set(panel):
+    close, volume = panel
+    grid = dict(return_windows=(3, 5), volume_windows=(10, 20), thresholds=(1.0, 1.5), horizon=5)
+    tarama = parametre_taramasi(close, volume, **grid)
+
+    for r in grid["return_windows"]:
+        for v in grid["volume_windows"]:
+            for esik in grid["thresholds"]:
+                hisse, _ = backtest_para_akisi(
+                    close, volume, horizons=(5,), return_window=r, volume_window=v, threshold=esik,
+                )
+                toplam = hisse.groupby('Sinyal')[['Sinyal Sayısı']].sum()
+                for sinyal in ("GÜÇLÜ GİRİŞ", "GÜÇLÜ ÇIKIŞ"):
+                    satir = tarama.loc[(r, v, esik, sinyal)]
+                    assert satir['Sinyal Sayısı'] == toplam.loc[sinyal, 'Sinyal Sayısı']
+                    assert satir['Sinyal Sayısı'] > 0
+
+
+def test_sweep_empty_input():
+    assert parametre_taramasi(pd.DataFrame(), pd.DataFrame()).empty
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from correlation import EwmaCorrelation, pairwise_corr, top_k_peers
+
+
+@pytest.mark.parametrize("absolute", [False, True])
+def test_top_k_peers_matches_dataframe_corr(returns, absolute):
+    peers = top_k_peers(returns, "H3", k=4, absolute=absolute)
+    expected = returns.corr()["H3"].drop("H3")
+    ranking = expected.abs() if absolute else expected
+    top = ranking.sort_values(ascending=False).index[:4]
+    assert list(peers["Peer"]) == list(top)
+    np.testing.assert_allclose(peers["Correlation"], expected[top].round(4), atol=1e-4)
+
+
+def test_top_k_peers_unknown_ticker(returns):
+    with pytest.raises(KeyError):
+        top_k_peers(returns, "YOK")
+
+
+def test_pairwise_corr_matches_dataframe_corr_with_gaps(returns):
+    gappy = returns.copy()
+    gappy.iloc[10:40, 1] = np.nan
+    gappy.iloc[::7, 5] = np.nan
+    values = gappy.to_numpy()
+    corr, counts = pairwise_corr(values)
+    np.testing.assert_allclose(corr, gappy.corr().to_numpy(), atol=1e-12)
+    np.testing.assert_array_equal(counts, gappy.notna().T.astype(int) @ gappy.notna().astype(int))
+
+    block, _ = pairwise_corr(values, slice(2, 5))
+    np.testing.assert_allclose(block, corr[2:5], atol=1e-12)
+
+
+def _ewm_reference(returns, halflife):
+    return returns.ewm(halflife=halflife).corr().xs(returns.index[-1], level=0)
+
+
+def test_ewma_correlation_matches_pandas_ewm(returns):
+    gappy = returns.copy()
+    gappy.iloc[50:60, 2] = np.nan
+    ewm = EwmaCorrelation.from_returns(gappy, halflife=15)
+    np.testing.assert_allclose(ewm.corr().to_numpy(), _ewm_reference(gappy, 15).to_numpy(), atol=1e-10)
+
+
+def test_ewma_correlation_incremental_add_and_replace_last(returns):
+    ewm = EwmaCorrelation.from_returns(returns.iloc[:-1], halflife=15)
+    ewm.add(returns.iloc[-1].to_numpy() * 3)
+    ewm.replace_last(returns.iloc[-1].to_numpy())
+    np.testing.assert_allclose(ewm.corr().to_numpy(), _ewm_reference(returns, 15).to_numpy(), atol=1e-10)
+
+    empty = EwmaCorrelation(returns.columns, halflife=15, min_periods=1)
+    empty.replace_last(returns.iloc[0].to_numpy())
+    assert empty.effective_counts()[0, 0] == 1
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from history import SCALE, SnapshotLog, SnapshotStore
+
+
+def _run(returns, tickers, end, run_id):
+    window = returns[tickers].iloc[end - 60:end]
+    return {
+        'run_id': run_id,
+        'correlation_matrix': window.corr(),
+        'para_akisi_df': pd.DataFrame({'Hisse': tickers, 'Skor': np.arange(len(tickers))}),
+        'analysis_metadata': {'last_bar': str(window.index[-1])},
+    }
+
+
+def test_snapshot_log_round_trip(tmp_path, returns):
+    runs = [
+        _run(returns, list(returns.columns[:5]) if k < 3 else list(returns.columns), 100 + 20 * k, f"r{k}")
+        for k in range(8)
+    ]
+    log = SnapshotLog(str(tmp_path / "log"), keyframe_every=3, key=("bist30", "3mo", "Kapanis"))
+    times = pd.date_range("2025-01-01", periods=len(runs), freq="D")
+    for k, (run, when) in enumerate(zip(runs, times)):
+        assert log.append(run, when) == k
+    assert log.append(runs[-1]) is None  # same run id
+    assert log.append(dict(runs[-1], run_id="again")) is None  # same last bar
+
+    reopened = SnapshotLog(str(tmp_path / "log"))
+    assert len(reopened) == len(runs)
+    assert reopened.tickers == list(returns.columns)
+    for k, run in enumerate(runs):
+        expected = run['correlation_matrix']
+        got = reopened.matrix(k).loc[expected.index, expected.columns]
+        np.testing.assert_allclose(got.to_numpy(), expected.to_numpy(), atol=1.0 / SCALE)
+
+    history = reopened.pair_history([("H0", "H1"), ("H2", "H7")], last=6)
+    assert list(history.index) == list(times[2:])
+    np.testing.assert_allclose(
+        history["H0 / H1"], [r['correlation_matrix'].loc["H0", "H1"] for r in runs[2:]], atol=1.0 / SCALE
+    )
+    assert history["H2 / H7"].iloc[0] != history["H2 / H7"].iloc[0]  # H7 not in the first runs yet
+    assert history["H2 / H7"].iloc[1:].notna().all()
+
+    table = reopened.table('para_akisi_df', last=2)
+    assert len(table) == 2 * len(returns.columns)
+    assert set(table['Snapshot']) == set(times[-2:])
+
+
+def test_snapshot_store_keys_keep_underscores(tmp_path, returns):
+    store = SnapshotStore(str(tmp_path))
+    key = ("bist_30", "5d-ewm20", "Kapanis")
+    store.append(key, _run(returns, list(returns.columns), 100, "r0"))
+    assert store.keys() == [key]
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from quality import clean_panel
+
+FLAT = slice(6, 11)
+
+
+@pytest.fixture
+def prices():
+    """Two tickers over February 2025 (no holidays); B holds one price for six bars, then moves 10%."""
+    index = pd.bdate_range("2025-02-03", periods=16)
+    rng = np.random.default_rng(1)
+    a = 50 * np.exp(np.cumsum(rng.normal(0, 0.01, 16)))
+    b = 20 * np.exp(np.cumsum(rng.normal(0, 0.01, 16)))
+    b[FLAT] = b[FLAT.start - 1]
+    b[FLAT.stop:] *= b[FLAT.start - 1] * 1.1 / b[FLAT.stop]
+    return pd.DataFrame({"A": a, "B": b}, index=index)
+
+
+@pytest.fixture
+def volume(prices):
+    return pd.DataFrame(1000.0, index=prices.index, columns=prices.columns)
+
+
+def test_flat_run_with_volume_keeps_the_move(prices, volume):
+    panel, returns, report = clean_panel(prices, volume)
+    flat, move = prices.index[FLAT], prices.index[FLAT.stop]
+
+    pd.testing.assert_frame_equal(panel, prices, check_freq=False)
+    np.testing.assert_allclose(returns.loc[flat, "B"], 0.0)
+    assert returns.loc[move, "B"] == pytest.approx(0.1)
+    assert report.set_index("Hisse").loc["B", "Durgun"] > 0
+    assert report.set_index("Hisse").loc["B", "İşlemsiz"] == 0
+
+
+def test_dead_bars_are_blanked_and_the_move_is_measured_from_the_last_print(prices, volume):
+    volume.iloc[FLAT, 1] = 0.0
+    panel, returns, report = clean_panel(prices, volume)
+    move = prices.index[FLAT.stop]
+
+    dead = panel["B"].isna()
+    assert dead.any()
+    assert set(dead[dead].index) <= set(prices.index[FLAT])
+    assert returns.loc[dead[dead].index, "B"].isna().all()
+    assert returns.loc[move, "B"] == pytest.approx(0.1)
+    assert returns["A"].notna().all()
+    assert report.set_index("Hisse").loc["B", "İşlemsiz"] == dead.sum()
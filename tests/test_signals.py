@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+
+from signals import sektor_momentumu
+
+
+def test_weekly_sector_score_keeps_last_bar_volume_strength(returns):
+    close = 100 * (1 + returns.fillna(0.0)).cumprod()
+    rng = np.random.default_rng(1)
+    volume = pd.DataFrame(rng.uniform(1e5, 2e5, close.shape), index=close.index, columns=close.columns)
+    sektorler = {h: "S" + str(i % 3) for i, h in enumerate(close.columns)}
+
+    ozet, detay = sektor_momentumu(close, volume, sektorler)
+
+    haftalik = close.pct_change(5).iloc[-1] * 100
+    hacim_gucu = volume.iloc[-1] / volume.rolling(20).mean().iloc[-1]
+    skor = (haftalik * hacim_gucu).groupby(pd.Series(sektorler)).mean().sort_values(ascending=False)
+    assert list(ozet["Sektör"]) == list(skor.index)
+    np.testing.assert_allclose(ozet["Ortalama Sektör Skoru"], skor.values)
+    np.testing.assert_allclose(detay.set_index("Hisse")["Hacim Gücü"][hacim_gucu.index], hacim_gucu.values)
+    assert {"Skor 1G", "Skor 20G", "Skor 60G"} <= set(detay.columns)
@@ -0,0 +1,170 @@
+# BIST Data Analysis ticker list
+BIST_DATA = ["FROTO.IS", "BIMAS.IS", "ASELS.IS", "AKBNK.IS","TUPRS.IS","THYAO.IS","TCELL.IS","YKBNK.IS","ISCTR.IS","SAHOL.IS","KCHOL.IS"]
+
+# MSCI Türkiye hisse listesi
+MSCI = ['ASELS.IS', 'BIMAS.IS', 'AKBNK.IS', 'TUPRS.IS', 'KCHOL.IS', 'THYAO.IS', 'TCELL.IS','ISCTR.IS','YKBNK.IS','FROTO.IS']
+
+# BIST30 ticker list
+BIST30 = [
+    'PETKM.IS', 'SASA.IS', 'GUBRF.IS', 'TCELL.IS', 'TTKOM.IS',
+    'ASTOR.IS', 'TAVHL.IS', 'PGSUS.IS', 'THYAO.IS', 'BIMAS.IS',
+    'MGROS.IS', 'AKBNK.IS', 'SAHOL.IS', 'DSTKF.IS', 'EKGYO.IS',
+    'YKBNK.IS', 'GARAN.IS', 'ISCTR.IS', 'EREGL.IS', 'TRALT.IS',
+    'KRDMD.IS', 'TUPRS.IS', 'KCHOL.IS', 'ENKAI.IS', 'ASELS.IS',
+    'SISE.IS', 'TOASO.IS', 'FROTO.IS', 'AEFES.IS', 'ULKER.IS'
+]
+
+# BIST30 sector mapping
+BIST30_SEKTOR = {
+    'PETKM.IS': 'İşlenebilen endüstriler',
+    'SASA.IS': 'İşlenebilen endüstriler',
+    'GUBRF.IS': 'İşlenebilen endüstriler',
+    'TCELL.IS': 'İletişim',
+    'TTKOM.IS': 'İletişim',
+    'ASTOR.IS': 'Üretici imalatı',
+    'TAVHL.IS': 'Taşımacılık',
+    'PGSUS.IS': 'Taşımacılık',
+    'THYAO.IS': 'Taşımacılık',
+    'BIMAS.IS': 'Perakende satış',
+    'MGROS.IS': 'Perakende satış',
+    'AKBNK.IS': 'Finans',
+    'SAHOL.IS': 'Finans',
+    'DSTKF.IS': 'Finans',
+    'EKGYO.IS': 'Finans',
+    'YKBNK.IS': 'Finans',
+    'GARAN.IS': 'Finans',
+    'ISCTR.IS': 'Finans',
+    'EREGL.IS': 'Enerji-dışı mineraller',
+    'TRALT.IS': 'Enerji-dışı mineraller',
+    'KRDMD.IS': 'Enerji-dışı mineraller',
+    'TUPRS.IS': 'Enerji mineralleri',
+    'KCHOL.IS': 'Enerji mineralleri',
+    'ENKAI.IS': 'Endüstriyel hizmetler',
+    'ASELS.IS': 'Elektronik teknoloji',
+    'SISE.IS': 'Dayanıklı tüketim malları',
+    'TOASO.IS': 'Dayanıklı tüketim malları',
+    'FROTO.IS': 'Dayanıklı tüketim malları',
+    'AEFES.IS': 'Dayanıklı olmayan tüketici ürünleri',
+    'ULKER.IS': 'Dayanıklı olmayan tüketici ürünleri'
+}
+
+# Kontrat ticker list (without .IS suffix, will add when fetching)
+KONTRAT_BASE = [
+    'AEFES', 'AKBNK', 'AKSEN', 'ALARK', 'ARCLK', 'ASELS', 'ASTOR', 
+    'BIMAS', 'BRSAN', 'CIMSA', 'DOAS', 'DOHOL', 'EKGYO', 'ENJSA', 
+    'ENKAI', 'EREGL', 'FROTO', 'GARAN', 'GUBRF', 'HALKB', 'HEKTS', 
+    'ISCTR', 'KCHOL', 'KONTR', 'KRDMD', 'MGROS', 'ODAS', 'OYAKC', 
+    'PETKM', 'PGSUS', 'SAHOL', 'SASA', 'SISE', 'SOKM', 'TAVHL', 
+    'TCELL', 'THYAO', 'TKFEN', 'TOASO', 'TRALT', 'TRMET', 'TSKB', 
+    'TTKOM', 'TUPRS', 'ULKER', 'VAKBN', 'VESTL', 'YKBNK'
+]
+
+# Add .IS suffix for yfinance
+KONTRAT = [t + '.IS' for t in KONTRAT_BASE]
+
+# Kontrat sector mapping
+KONTRAT_SEKTOR = {
+    # İşlenebilen endüstriler (Process Industries / Chemicals & Materials)
+    'PETKM.IS': 'İşlenebilen endüstriler',
+    'SASA.IS': 'İşlenebilen endüstriler',
+    'GUBRF.IS': 'İşlenebilen endüstriler',
+    'OYAKC.IS': 'İşlenebilen endüstriler',
+    'CIMSA.IS': 'İşlenebilen endüstriler',
+
+    # İletişim (Communications)
+    'TCELL.IS': 'İletişim',
+    'TTKOM.IS': 'İletişim',
+
+    # Üretici imalatı (Producer Manufacturing / Capital Goods)
+    'ASTOR.IS': 'Üretici imalatı',
+    'KONTR.IS': 'Üretici imalatı',
+    'TKFEN.IS': 'Üretici imalatı',
+    'BRSAN.IS': 'Üretici imalatı',
+
+    # Taşımacılık (Transportation)
+    'TAVHL.IS': 'Taşımacılık',
+    'PGSUS.IS': 'Taşımacılık',
+    'THYAO.IS': 'Taşımacılık',
+
+    # Perakende satış (Retail Trade)
+    'BIMAS.IS': 'Perakende satış',
+    'MGROS.IS': 'Perakende satış',
+    'SOKM.IS': 'Perakende satış',
+    'DOAS.IS': 'Perakende satış',
+
+    # Finans (Finance / Banking / Holding)
+    'AKBNK.IS': 'Finans',
+    'SAHOL.IS': 'Finans',
+    'EKGYO.IS': 'Finans',
+    'YKBNK.IS': 'Finans',
+    'GARAN.IS': 'Finans',
+    'ISCTR.IS': 'Finans',
+    'HALKB.IS': 'Finans',
+    'VAKBN.IS': 'Finans',
+    'TSKB.IS': 'Finans',
+    'ALARK.IS': 'Finans',
+    'DOHOL.IS': 'Finans',
+
+    # Enerji-dışı mineraller (Non-Energy Minerals / Metals)
+    'EREGL.IS': 'Enerji-dışı mineraller',
+    'TRALT.IS': 'Enerji-dışı mineraller',
+    'KRDMD.IS': 'Enerji-dışı mineraller',
+    'TRMET.IS': 'Enerji-dışı mineraller',
+
+    # Enerji mineralleri (Energy Minerals / Oil & Gas)
+    'TUPRS.IS': 'Enerji mineralleri',
+    'KCHOL.IS': 'Enerji mineralleri',
+
+    # Endüstriyel hizmetler (Industrial Services)
+    'ENKAI.IS': 'Endüstriyel hizmetler',
+    'AKSEN.IS': 'Endüstriyel hizmetler',
+    'ENJSA.IS': 'Endüstriyel hizmetler',
+    'ODAS.IS': 'Endüstriyel hizmetler',
+
+    # Elektronik teknoloji (Electronic Technology / Defense)
+    'ASELS.IS': 'Elektronik teknoloji',
+
+    # Dayanıklı tüketim malları (Consumer Durables)
+    'SISE.IS': 'Dayanıklı tüketim malları',
+    'TOASO.IS': 'Dayanıklı tüketim malları',
+    'FROTO.IS': 'Dayanıklı tüketim malları',
+    'ARCLK.IS': 'Dayanıklı tüketim malları',
+    'VESTL.IS': 'Dayanıklı tüketim malları',
+
+    # Dayanıklı olmayan tüketici ürünleri (Consumer Non-Durables)
+    'AEFES.IS': 'Dayanıklı olmayan tüketici ürünleri',
+    'ULKER.IS': 'Dayanıklı olmayan tüketici ürünleri',
+    'HEKTS.IS': 'Dayanıklı olmayan tüketici ürünleri'
+}
+
+# Universes the full-analysis pages (and warm-up / API) work on
+UNIVERSES = {
+    "bist30": (BIST30, BIST30_SEKTOR),
+    "kontrat": (KONTRAT, KONTRAT_SEKTOR),
+}
+
+PERIOD_OPTIONS = ["5d", "7d", "3d", "1mo", "1y"]
+
+# Piyasa endeksi ve uygulamanın sektör gruplarına en yakın BIST sektör endeksleri
+ENDEKS = "XU100.IS"
+SEKTOR_ENDEKSLERI = {
+    'İşlenebilen endüstriler': 'XKMYA.IS',
+    'İletişim': 'XILTM.IS',
+    'Üretici imalatı': 'XUSIN.IS',
+    'Taşımacılık': 'XULAS.IS',
+    'Perakende satış': 'XTCRT.IS',
+    'Finans': 'XUMAL.IS',
+    'Enerji-dışı mineraller': 'XMANA.IS',
+    'Enerji mineralleri': 'XKMYA.IS',
+    'Endüstriyel hizmetler': 'XUHIZ.IS',
+    'Elektronik teknoloji': 'XUTEK.IS',
+    'Dayanıklı tüketim malları': 'XMESY.IS',
+    'Dayanıklı olmayan tüketici ürünleri': 'XGIDA.IS',
+}
+
+COLUMN_OPTIONS = {"Kapanis": "Close", "Hacim": "Volume"}
+
+
+def interval_for(period):
+    """Bar interval used for a period: hourly for short windows, daily otherwise."""
+    return "1h" if period in ["5d", "7d", "3d"] else "1d"
@@ -0,0 +1,89 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from analysis import SEKTOR_PERIYODU, VERI_TTL, fiyat_verisi, gunluk_veri, hisse_gecmisi, sonuc_deposu, tam_analiz
+from quality import ISTANBUL
+from universes import BIST30, BIST30_SEKTOR, COLUMN_OPTIONS, MSCI, PERIOD_OPTIONS, UNIVERSES, interval_for
+
+# Borsa Istanbul pay piyasası açılışı ve kapanışı
+ACILIS_SAATI = (10, 0)
+KAPANIS_SAATI = (18, 10)
+
+
+def next_market_open(now=None):
+    """Next weekday 10:00 Europe/Istanbul after ``now``."""
+    now = now or datetime.now(ISTANBUL)
+    candidate = now.replace(hour=ACILIS_SAATI[0], minute=ACILIS_SAATI[1], second=0, microsecond=0)
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+def market_open(now=None):
+    """Whether ``now`` falls inside a weekday session, 10:00 to 18:10 Europe/Istanbul."""
+    now = now or datetime.now(ISTANBUL)
+    return now.weekday() < 5 and ACILIS_SAATI <= (now.hour, now.minute) < KAPANIS_SAATI
+
+
+def warm_up(universes=None, periods=PERIOD_OPTIONS, default_period="5d", default_column="Kapanis"):
+    """
+    Fill the shared data caches and precompute the default results.
+
+    Every configured universe is prefetched for all periods and both columns,
+    plus the per-ticker histories of the para akışı stage. The default
+    period/column full analysis (which also loads its sector history) is
+    then stored in the result store, so the first user's run is served from
+    memory. Finally the exact daily downloads of the Hacim and Sektörel
+    pages are loaded.
+    """
+    for key in universes or UNIVERSES:
+        tickers, sektor_haritasi = UNIVERSES[key]
+        for period in periods:
+            for column in COLUMN_OPTIONS.values():
+                fiyat_verisi(tickers, period=period, interval=interval_for(period), selected_column=column)
+        for hisse in tickers:
+            hisse_gecmisi(hisse)
+        sonuc = tam_analiz(tickers, sektor_haritasi, default_period, default_column)
+        sonuc_deposu().put((key, default_period, default_column), sonuc)
+
+    gunluk_veri(tuple(BIST30))
+    gunluk_veri(tuple(BIST30_SEKTOR), period=SEKTOR_PERIYODU)
+    for hisse in MSCI:
+        hisse_gecmisi(hisse)
+
+
+def start_warmup(*, at_open=False, refresh_s=None, **kwargs):
+    """
+    Run ``warm_up`` on a daemon thread.
+
+    Warmed data and results expire after ``VERI_TTL``, so while the market
+    is open the warm-up repeats ``refresh_s`` (default ``VERI_TTL``) after
+    each pass ends, when everything it loaded has just expired. Outside the
+    session it stops, or with ``at_open=True`` sleeps until the next market
+    open and starts again, so the cache is fresh when trading starts.
+    """
+    refresh_s = refresh_s or VERI_TTL
+    state = {"last_run": None, "last_error": None}
+
+    def _run():
+        while True:
+            try:
+                warm_up(**kwargs)
+                state["last_run"] = datetime.now(ISTANBUL)
+                state["last_error"] = None
+            except Exception as e:
+                state["last_error"] = str(e)
+            if market_open():
+                time.sleep(refresh_s)
+            elif at_open:
+                time.sleep(max((next_market_open() - datetime.now(ISTANBUL)).total_seconds(), 0))
+            else:
+                return
+
+    thread = threading.Thread(target=_run, name="warmup", daemon=True)
+    thread.start()
+    state["thread"] = thread
+    return state